@@ -1,78 +1,271 @@
 """
 Configuration settings for SDG Chatbot
 """
+from __future__ import annotations
+
+import logging
 import os
+import pathlib
+import sys
+import time
+from collections.abc import Mapping
+from dataclasses import dataclass
+from functools import lru_cache
+from types import MappingProxyType
+
+
+@dataclass(frozen=True, slots=True)
+class Settings:
+    """Environment-driven settings, parsed once per process"""
+    DB_NAME: str
+    DB_USER: str
+    DB_HOST: str
+    DB_PORT: str
+    OPENAI_MODEL: str
+    OPENAI_ROUTER_MODEL: str
+    API_HOST: str
+    API_PORT: int
+    API_RELOAD: bool
+    API_WORKERS: int
+    MAX_TOKENS: int
+    MAX_HISTORY_MESSAGES: int
+    DEFAULT_TOP_N: int
+    DEFAULT_YEAR: int
+    CORS_ORIGINS: tuple
+    LOG_LEVEL: str
+
+    @property
+    def SAFE_TOKEN_LIMIT(self) -> int:
+        # Exact 40% of MAX_TOKENS; derived on access so it can never go stale.
+        # (cached_property needs an instance __dict__, which slots rule out.)
+        return self.MAX_TOKENS * 2 // 5
+
+
+@lru_cache(maxsize=None)
+def _env_str(key: str, default: str) -> str:
+    return os.environ.get(key, default)
+
+
+@lru_cache(maxsize=None)
+def _env_int(key: str, default: int) -> int:
+    value = os.environ.get(key)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"Environment variable {key} must be an integer, got {value!r}") from None
+
+
+@lru_cache(maxsize=None)
+def _env_bool(key: str, default: bool) -> bool:
+    value = os.environ.get(key)
+    if value is None:
+        return default
+    return value.strip().lower() == 'true'
+
+
+def _parse_origins(raw: str) -> tuple:
+    """Split a comma-separated origin list, dropping blanks and stray whitespace"""
+    return tuple(origin.strip() for origin in raw.split(',') if origin.strip()) or ('*',)
+
+
+@lru_cache(maxsize=1)
+def get_config() -> Settings:
+    """Read the environment once and return the cached Settings instance"""
+    return Settings(
+        DB_NAME=_env_str('SDG_DB_NAME', 'sdgquery'),
+        DB_USER=_env_str('SDG_DB_USER', 'postgres'),
+        DB_HOST=_env_str('SDG_DB_HOST', 'localhost'),
+        DB_PORT=_env_str('SDG_DB_PORT', '5432'),
+        OPENAI_MODEL=_env_str('OPENAI_MODEL', 'gpt-4o-2024-08-06'),
+        OPENAI_ROUTER_MODEL=_env_str('OPENAI_ROUTER_MODEL', 'gpt-4o-mini'),
+        API_HOST=_env_str('API_HOST', '0.0.0.0'),
+        API_PORT=_env_int('API_PORT', 8000),
+        API_RELOAD=_env_bool('API_RELOAD', False),
+        API_WORKERS=_env_int('WORKERS', 1),
+        MAX_TOKENS=_env_int('MAX_TOKENS', 128000),
+        MAX_HISTORY_MESSAGES=_env_int('MAX_HISTORY_MESSAGES', 7),
+        DEFAULT_TOP_N=_env_int('DEFAULT_TOP_N', 5),
+        DEFAULT_YEAR=_env_int('DEFAULT_YEAR', 2021),
+        CORS_ORIGINS=_parse_origins(_env_str('CORS_ORIGINS', '*')),
+        LOG_LEVEL=_env_str('LOG_LEVEL', 'INFO'),
+    )
+
 
 # Database Configuration
-DATABASE_CONFIG = {
-    'dbname': os.getenv('SDG_DB_NAME', 'sdgquery'),
-    'user': os.getenv('SDG_DB_USER', 'postgres'),
-    'password': os.getenv('SDG_DB_PASSWORD', 'Happy123-'),
-    'host': os.getenv('SDG_DB_HOST', 'localhost'),
-    'port': os.getenv('SDG_DB_PORT', '5432')
-}
+_DB_PASSWORD_FILE = pathlib.Path('/run/secrets/sdg_db_password')
+
+
+@lru_cache(maxsize=1)
+def _db_password():
+    """
+    Resolve the database password on first use: SDG_DB_PASSWORD, then the
+    mounted secret file. Returns None so libpq can fall back to ~/.pgpass.
+    """
+    password = os.environ.get('SDG_DB_PASSWORD')
+    if password:
+        return password
+    try:
+        return _DB_PASSWORD_FILE.read_text().strip()
+    except OSError:
+        return None
+
 
-# OpenAI Configuration
+class _DatabaseConfig(Mapping):
+    """Read-only connection settings whose password is only looked up when accessed"""
 
-OPENAI_MODEL = os.getenv('OPENAI_MODEL', 'gpt-4o-2024-08-06')
+    def __init__(self, settings):
+        self._values = {
+            'dbname': settings.DB_NAME,
+            'user': settings.DB_USER,
+            'password': None,
+            'host': settings.DB_HOST,
+            'port': settings.DB_PORT
+        }
 
-# API Configuration
-API_HOST = os.getenv('API_HOST', '0.0.0.0')
-API_PORT = int(os.getenv('API_PORT', 8000))
-API_RELOAD = os.getenv('API_RELOAD', 'True').lower() == 'true'
+    def __getitem__(self, key):
+        if key == 'password':
+            return _db_password()
+        return self._values[key]
 
-# Conversation Management
-MAX_TOKENS = int(os.getenv('MAX_TOKENS', 128000))
-SAFE_TOKEN_LIMIT = int(MAX_TOKENS * 0.4)
-MAX_HISTORY_MESSAGES = int(os.getenv('MAX_HISTORY_MESSAGES', 7))
+    def __iter__(self):
+        return iter(self._values)
 
-# Default Query Settings
-DEFAULT_TOP_N = int(os.getenv('DEFAULT_TOP_N', 5))
-DEFAULT_YEAR = int(os.getenv('DEFAULT_YEAR', 2021))
+    def __len__(self):
+        return len(self._values)
+
+
+# Environment-driven names are resolved on first access (PEP 562) so that
+# importing config for its static tables does not read the environment.
+# "from config import API_HOST" and friends keep working unchanged.
+_SETTINGS_EXPORTS = frozenset({
+    # OpenAI Configuration
+    'OPENAI_MODEL', 'OPENAI_ROUTER_MODEL',
+    # API Configuration
+    'API_HOST', 'API_PORT', 'API_RELOAD', 'API_WORKERS',
+    # Conversation Management
+    'MAX_TOKENS', 'SAFE_TOKEN_LIMIT', 'MAX_HISTORY_MESSAGES',
+    # Default Query Settings
+    'DEFAULT_TOP_N', 'DEFAULT_YEAR',
+    # CORS Configuration
+    'CORS_ORIGINS',
+    # Logging Configuration
+    'LOG_LEVEL'
+})
+
+_LAZY = {
+    # Slotted singleton; new code can use settings.API_HOST etc.
+    'settings': get_config,
+    'DATABASE_CONFIG': lambda: _DatabaseConfig(get_config()),
+    'CORS_ORIGINS_SET': lambda: frozenset(get_config().CORS_ORIGINS)
+}
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        value = _LAZY[name]()
+    elif name in _SETTINGS_EXPORTS:
+        value = getattr(get_config(), name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    # Cache in the module dict so later lookups never reach __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | _SETTINGS_EXPORTS | set(_LAZY))
 
 # Supported years
-SUPPORTED_YEARS = [2016, 2021]
+SUPPORTED_YEARS = (2016, 2021)
+_SUPPORTED_YEARS_SET = frozenset(SUPPORTED_YEARS)
+
+
+def is_supported_year(year: int) -> bool:
+    """Return True if data is available for the given survey year"""
+    return year in _SUPPORTED_YEARS_SET
 
 # SDG Goals configuration
-SDG_GOALS = {
-    1: "No Poverty",
-    2: "Zero Hunger", 
-    3: "Good Health and Well-being",
-    4: "Quality Education",
-    5: "Gender Equality",
-    6: "Clean Water and Sanitation",
-    7: "Affordable and Clean Energy",
-    8: "Decent Work and Economic Growth",
-    9: "Industry, Innovation and Infrastructure",
-    10: "Reduced Inequalities",
-    11: "Sustainable Cities and Communities",
-    12: "Responsible Consumption and Production",
-    13: "Climate Action",
-    14: "Life Below Water",
-    15: "Life on Land",
-    16: "Peace, Justice and Strong Institutions",
-    17: "Partnerships for the Goals"
-}
+_SDG_GOALS_ITEMS = (
+    (1, "No Poverty"),
+    (2, "Zero Hunger"),
+    (3, "Good Health and Well-being"),
+    (4, "Quality Education"),
+    (5, "Gender Equality"),
+    (6, "Clean Water and Sanitation"),
+    (7, "Affordable and Clean Energy"),
+    (8, "Decent Work and Economic Growth"),
+    (9, "Industry, Innovation and Infrastructure"),
+    (10, "Reduced Inequalities"),
+    (11, "Sustainable Cities and Communities"),
+    (12, "Responsible Consumption and Production"),
+    (13, "Climate Action"),
+    (14, "Life Below Water"),
+    (15, "Life on Land"),
+    (16, "Peace, Justice and Strong Institutions"),
+    (17, "Partnerships for the Goals")
+)
+# Read-only view; SDG_GOALS[n] lookups work as before
+SDG_GOALS = MappingProxyType(dict(_SDG_GOALS_ITEMS))
 
 # Available SDG Goals with data (update based on your data)
-AVAILABLE_SDG_GOALS = [1, 2, 3, 5, 6, 7, 8, 16, 17]
+AVAILABLE_SDG_GOALS = (1, 2, 3, 5, 6, 7, 8, 16, 17)
+# Use the set for membership checks; the tuple keeps display order
+AVAILABLE_SDG_GOALS_SET = frozenset(AVAILABLE_SDG_GOALS)
 
-# CORS Configuration
-CORS_ORIGINS = os.getenv('CORS_ORIGINS', '*').split(',')
+# Pre-joined strings for prompts and messages
+AVAILABLE_SDG_GOALS_STR = ', '.join(map(str, AVAILABLE_SDG_GOALS))
+SUPPORTED_YEARS_STR = ', '.join(map(str, SUPPORTED_YEARS))
 
 # Logging Configuration
-LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
 LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 
+
+class FastFormatter(logging.Formatter):
+    """
+    Produces the same output as LOG_FORMAT but builds the line with an
+    f-string and reuses the formatted timestamp for records in the same second.
+    """
+
+    def __init__(self):
+        super().__init__(LOG_FORMAT)
+        self._cached_time = (None, "")
+
+    def formatTime(self, record, datefmt=None):
+        second = int(record.created)
+        cached_second, cached_str = self._cached_time
+        if second != cached_second:
+            cached_str = time.strftime(self.default_time_format, self.converter(record.created))
+            self._cached_time = (second, cached_str)
+        return f"{cached_str},{int(record.msecs):03d}"
+
+    def format(self, record):
+        line = f"{self.formatTime(record)} - {record.name} - {record.levelname} - {record.getMessage()}"
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            line = f"{line}\n{record.exc_text}"
+        if record.stack_info:
+            line = f"{line}\n{self.formatStack(record.stack_info)}"
+        return line
+
+
+LOG_FORMATTER = FastFormatter()
+
 # System message for OpenAI
-SYSTEM_MESSAGE = {
-    "role": "system", 
-    "content": (
-        "You are an AI assistant specialized in analyzing Sustainable Development Goals (SDG) data for Indian districts. "
-        "You help users explore SDG indicators, compare district performance, identify trends, and provide insights "
-        "for policy making and development planning. Your responses should be clear, data-driven, and actionable. "
-        "When users ask about SDG goals by number, always show available indicators and let them choose specific ones for analysis. "
-        f"Available SDG Goals with data: {', '.join(map(str, AVAILABLE_SDG_GOALS))}. "
-        f"Available years: {', '.join(map(str, SUPPORTED_YEARS))}."
-    )
-}
\ No newline at end of file
+SYSTEM_MESSAGE_CONTENT = sys.intern(
+    "You are an AI assistant specialized in analyzing Sustainable Development Goals (SDG) data for Indian districts. "
+    "You help users explore SDG indicators, compare district performance, identify trends, and provide insights "
+    "for policy making and development planning. Your responses should be clear, data-driven, and actionable. "
+    "When users ask about SDG goals by number, always show available indicators and let them choose specific ones for analysis. "
+    f"Available SDG Goals with data: {AVAILABLE_SDG_GOALS_STR}. "
+    f"Available years: {SUPPORTED_YEARS_STR}."
+)
+
+# Read-only and shared by every request; use dict(SYSTEM_MESSAGE) where a
+# JSON-serialisable message is needed
+SYSTEM_MESSAGE = MappingProxyType({
+    "role": sys.intern("system"),
+    "content": SYSTEM_MESSAGE_CONTENT
+})
\ No newline at end of file
@@ -2,26 +2,74 @@
 """
 Startup script for SDG Chatbot Server
 """
-import uvicorn
-from config import API_HOST, API_PORT, API_RELOAD
+import os
 import sys
 
+_BANNER = "\n".join([
+    "🚀 Starting SDG Chatbot Server...",
+    "📡 Server will be available at: http://{host}:{port}",
+    "📚 API Documentation: http://{host}:{port}/docs",
+    "🔄 Reload mode: {reload}",
+    "=" * 60,
+    ""
+])
+
+def _server_implementations():
+    """Pick uvloop/httptools when installed, falling back to uvicorn's defaults"""
+    try:
+        import uvloop  # noqa: F401
+        loop = "uvloop"
+    except ImportError:
+        loop = "auto"
+    try:
+        import httptools  # noqa: F401
+        http = "httptools"
+    except ImportError:
+        http = "auto"
+    return loop, http
+
 def main():
     """Start the SDG Chatbot server"""
     try:
-        print("🚀 Starting SDG Chatbot Server...")
-        print(f"📡 Server will be available at: http://{API_HOST}:{API_PORT}")
-        print(f"📚 API Documentation: http://{API_HOST}:{API_PORT}/docs")
-        print(f"🔄 Reload mode: {'Enabled' if API_RELOAD else 'Disabled'}")
-        print("=" * 60)
+        import uvicorn
+        from config import API_HOST, API_PORT, API_RELOAD, API_WORKERS
+
+        if not os.environ.get("QUIET"):
+            sys.stderr.write(_BANNER.format(
+                host=API_HOST,
+                port=API_PORT,
+                reload="Enabled" if API_RELOAD else "Disabled"
+            ))
+            sys.stderr.flush()
+        
+        loop, http = _server_implementations()
+        options = {
+            "host": API_HOST,
+            "port": API_PORT,
+            "reload": API_RELOAD,
+            "log_level": "info",
+            "loop": loop,
+            "http": http,
+            "access_log": API_RELOAD
+        }
+        if API_RELOAD:
+            # Only watch the backend sources, not the whole working tree
+            options["reload_dirs"] = [os.path.dirname(os.path.abspath(__file__))]
+            options["reload_includes"] = ["*.py"]
+            options["reload_excludes"] = [
+                "*.pyc", "__pycache__/*", "*.log",
+                "*.parquet", "*.csv", "*.db", "data/*", "frontend/*"
+            ]
+        else:
+            options["workers"] = API_WORKERS
         
-        uvicorn.run(
-            "sdg_main:app",
-            host=API_HOST,
-            port=API_PORT,
-            reload=API_RELOAD,
-            log_level="info"
-        )
+        # The reloader and multiple workers need an import string; a single
+        # worker can take the app object and skip uvicorn's own import
+        if API_RELOAD or API_WORKERS > 1:
+            uvicorn.run("sdg_main:app", **options)
+        else:
+            from sdg_main import app
+            uvicorn.run(app, **options)
     except KeyboardInterrupt:
         print("\n👋 Server stopped by user")
     except Exception as e:
@@ -0,0 +1,154 @@
+"""
+Query intent analysis for the SDG chatbot.
+
+Pure string/regex work with no I/O apart from the district lookup, kept in its
+own fully annotated module so it can be compiled with mypyc
+(``mypyc sdg_intent.py``) without touching the rest of the backend. The plain
+module is used when no compiled build is present.
+"""
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import Final, NamedTuple
+
+from config import SDG_GOALS
+from sdg_utils import match_district_name
+
+
+# Vocabulary and patterns are built once at import time.
+# The query is split into words once; keyword checks are set intersections.
+_WORD_RE: Final = re.compile(r"[a-z]+")
+_RANK_TOP: Final[frozenset[str]] = frozenset(["top", "best", "highest", "leading", "superior", "good", "better"])
+_RANK_BOTTOM: Final[frozenset[str]] = frozenset(["bottom", "worst", "lowest", "poorest", "lagging", "bad", "worse", "poorly"])
+_RANK_BOTH: Final[frozenset[str]] = frozenset(["compare", "comparison", "trend", "both", "versus", "vs"])
+_BEST_WORDS: Final[frozenset[str]] = frozenset(["best", "top", "highest", "leading"])
+_MANY_WORDS: Final[frozenset[str]] = frozenset(["many", "all", "list"])
+_MULTI_DISTRICT_WORDS: Final[frozenset[str]] = frozenset(["districts", "list", "ranking", "performance", "status"])
+
+_NUM_RE: Final = re.compile(r"(?:top|bottom|show|list|first)\s+(\d+)|(\d+)\s+(?:best|worst|districts)")
+_DIST_RE: Final = re.compile(r"district|city|area|region|place|in |of |for ")
+_BEST_WORST_RE: Final = re.compile(r"(?:best|worst|top|bottom) performing|(?:best|worst) district")
+
+_STATE_KEYWORDS: Final[dict[str, list[str]]] = {
+    "rajasthan": ["rajasthan"],
+    "gujarat": ["gujarat"],
+    "maharashtra": ["maharashtra"],
+    "karnataka": ["karnataka"],
+    "tamil nadu": ["tamil nadu", "tamilnadu"],
+    "kerala": ["kerala"],
+    "west bengal": ["west bengal", "bengal"],
+    "uttar pradesh": ["uttar pradesh", "up"],
+    "bihar": ["bihar"],
+    "odisha": ["odisha", "orissa"]
+}
+_STATE_MAP: Final[dict[str, str]] = {kw: state for state, kws in _STATE_KEYWORDS.items() for kw in kws}
+_STATE_RE: Final = re.compile(r"\b(" + "|".join(sorted(map(re.escape, _STATE_MAP), key=len, reverse=True)) + r")\b")
+
+# Words that can't be (part of) a district name. District lookup fuzzy-matches
+# the query against every district in the database, so it is skipped when a
+# query has no word of 3+ letters outside this vocabulary, e.g. "top 5
+# districts for sdg 3". Unknown words still go through the full lookup.
+_NON_DISTRICT_WORDS: Final[frozenset[str]] = frozenset(
+    word for text in (
+        "sdg sdgs goal goals indicator indicators target targets data value values score scores "
+        "district districts state states india indian country national region regions city cities area areas "
+        "top bottom best worst highest lowest leading lagging poorest superior good better bad worse "
+        "performing performer performers performance perform ranking rank ranked list show give tell find "
+        "compare comparison versus trend trends both and the for with from into over under between across "
+        "what which where who how why are was were has have had does did can could would should will "
+        "this that these those there their them they all any many most least more less much some each "
+        "improved improvement improving change changes progress status classification classify aac "
+        "year years analysis analyse analyze summary overview map maps about please me "
+        "aspirational neighboring neighbouring neighbors neighbours border borders nearby radius within "
+        "time series correlation cross percent percentage rate rates number numbers".split(),
+        (word for kw in _STATE_MAP for word in kw.split()),
+        (word for name in SDG_GOALS.values() for word in _WORD_RE.findall(name.lower())),
+    )
+    for word in text
+)
+
+class QueryIntent(NamedTuple):
+    query_type: str
+    top_n: int
+    state_name: str | None
+    has_specific_district: bool
+    detected_district: str | None
+    is_best_worst_query: bool
+    has_district_pattern: bool
+
+
+def _may_name_district(words: frozenset[str]) -> bool:
+    return any(len(word) >= 3 and word not in _NON_DISTRICT_WORDS for word in words)
+
+@lru_cache(maxsize=2048)
+def analyze_sdg_query_intent(user_query: str) -> QueryIntent:
+    """
+    Analyze user query to determine SDG query intent and parameters.
+    Results are immutable and cached per query string, so repeated tool calls
+    for the same query (and repeated queries) skip the district lookup.
+    A failed district lookup raises instead of caching a result with no
+    district; the caller handles the error and the next call retries.
+    """
+    query_lower = user_query.lower()
+    
+    words = frozenset(_WORD_RE.findall(query_lower))
+    
+    # Enhanced district detection - check for common district names and patterns
+    detected_district: str | None
+    if _may_name_district(words):
+        detected_district = match_district_name(user_query)
+    else:
+        detected_district = None
+    has_specific_district = detected_district is not None
+    
+    # Also check for common district indicators in the query
+    has_district_pattern = _DIST_RE.search(query_lower) is not None
+    
+    # Check for best/worst performing district queries
+    is_best_worst_query = _BEST_WORST_RE.search(query_lower) is not None
+    
+    # Extract numbers for top_n
+    top_n: int
+    match = _NUM_RE.search(query_lower)
+    if match:
+        top_n = int(match.group(1) or match.group(2))
+    elif words & _MANY_WORDS:
+        # Default top_n based on query type
+        top_n = 10
+    else:
+        top_n = 5
+    
+    # Determine query type with enhanced district detection
+    query_type = "top_performers"  # default for multiple districts
+    
+    if has_specific_district and not is_best_worst_query:
+        query_type = "individual_district"  # New query type for specific district queries
+    elif is_best_worst_query:
+        # Determine if it's best or worst performing district query
+        if words & _BEST_WORDS:
+            query_type = "best_district"
+        else:
+            query_type = "worst_district"
+    elif words & _RANK_BOTH or ("top" in words and "bottom" in words):
+        query_type = "trend"
+    elif words & _RANK_BOTTOM:
+        query_type = "bottom_performers"
+    elif words & _RANK_TOP or "performing well" in query_lower:
+        query_type = "top_performers"
+    elif words & _MULTI_DISTRICT_WORDS:
+        query_type = "top_performers"  # default for multiple districts
+    
+    # Extract state information
+    match = _STATE_RE.search(query_lower)
+    detected_state: str | None = _STATE_MAP[match.group(1)] if match else None
+    
+    return QueryIntent(
+        query_type=query_type,
+        top_n=top_n,
+        state_name=detected_state,
+        has_specific_district=has_specific_district,
+        detected_district=detected_district,
+        is_best_worst_query=is_best_worst_query,
+        has_district_pattern=has_district_pattern
+    )
@@ -1,17 +1,21 @@
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
-import json
-from openai import OpenAI
+import orjson
+from openai import AsyncOpenAI
 from openai import OpenAIError
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import Response, StreamingResponse
 import psycopg2
+import asyncpg
+import asyncio
+import threading
+import httpx
 from sdg_utils import (
     get_sdg_goal_data,
     format_sdg_goal_response,
-    get_db_connection,
     get_indicators_by_sdg_goal,
     get_sdg_goal_classification,
-    extract_district_name_from_query,
     get_individual_district_sdg_data,
     get_district_indicator_selection_prompt,
     get_best_worst_district_for_indicator,
@@ -28,12 +32,19 @@ from sdg_utils import (
     get_state_wise_indicator_extremes,
     get_most_least_improved_districts,
     get_border_districts,
-    get_districts_within_radius
+    get_districts_within_radius,
+    get_spatial_index
 )
-import tiktoken
+from config import CORS_ORIGINS, OPENAI_MODEL, OPENAI_ROUTER_MODEL
+from sdg_intent import analyze_sdg_query_intent
+from sdg_tools import TOOLS, TOOLS_JSON, decode_arguments
 from datetime import datetime
 import os
+import time
 import logging
+from collections import OrderedDict
+from itertools import chain
+from types import MappingProxyType
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
@@ -105,171 +116,759 @@ You excel at transforming complex SDG data into actionable insights for policy m
 
 MAX_TOKENS = 128000  
 SAFE_TOKEN_LIMIT = int(MAX_TOKENS * 0.4)  
+# The tool schemas go out with every routed request and share the context window
+# with the history, so their size (estimated at ~3 bytes per token, a safe
+# upper bound for English text and JSON) comes off the history budget.
+HISTORY_TOKEN_LIMIT = SAFE_TOKEN_LIMIT - len(TOOLS_JSON) // 3
 
-def count_tokens(messages, model="gpt-4o"):
+# Encoders are expensive to build (BPE merge tables), so keep one per model.
+# tiktoken itself is imported on first use, so workers that never need an exact
+# count don't pay for it at boot.
+_ENC_CACHE = {}
+
+def _get_enc(model):
+    """Return the cached tiktoken encoding for a model"""
+    enc = _ENC_CACHE.get(model)
+    if enc is None:
+        import tiktoken
+        try:
+            # Try to get encoding for the specific model
+            enc = tiktoken.encoding_for_model(model)
+        except KeyError:
+            # Fallback to cl100k_base encoding for GPT-4 models
+            enc = tiktoken.get_encoding("cl100k_base")
+        _ENC_CACHE[model] = enc
+    return enc
+
+TOKENIZER_THREADS = 4
+
+# Token count of SYSTEM_MESSAGE per encoding name. SYSTEM_MESSAGE is a module-level
+# singleton that every history starts with, so it is matched by identity and
+# only ever encoded once per encoding.
+_SYSTEM_MESSAGE_TOKENS = {}
+
+def _message_token_counts(messages: list[dict], enc) -> list[int]:
+    """
+    Count tokens per message, including framing overhead.
+    All field values are encoded in a single batch call so the BPE work runs
+    in tiktoken's native thread pool instead of one Python call per field.
+    """
+    texts = []
+    counts = []
+    encoded = []  # indexes of the messages whose fields are in texts
+    for i, message in enumerate(messages):
+        if message is SYSTEM_MESSAGE and enc.name in _SYSTEM_MESSAGE_TOKENS:
+            counts.append(_SYSTEM_MESSAGE_TOKENS[enc.name])
+            continue
+        num_tokens = 4  # every message follows <|start|>{role/name}\n{content}<|end|>\n
+        if "name" in message:  # if there's a name, the role is omitted
+            num_tokens += -1  # role is always required and always 1 token
+        counts.append(num_tokens)
+        texts.extend(str(value) for value in message.values())
+        encoded.append(i)
+
+    if texts:
+        lengths = iter([len(ids) for ids in enc.encode_ordinary_batch(texts, num_threads=TOKENIZER_THREADS)])
+        for i in encoded:
+            for _ in range(len(messages[i])):
+                counts[i] += next(lengths)
+            if messages[i] is SYSTEM_MESSAGE:
+                _SYSTEM_MESSAGE_TOKENS[enc.name] = counts[i]
+    return counts
+
+def count_tokens(messages: list[dict], model: str = "gpt-4o") -> int:
     """Count tokens in messages with explicit encoding handling"""
-    try:
-        # Try to get encoding for the specific model
-        enc = tiktoken.encoding_for_model(model)
-    except KeyError:
-        # Fallback to cl100k_base encoding for GPT-4 models
-        enc = tiktoken.get_encoding("cl100k_base")
-    
-    num_tokens = 0
-    for message in messages:
-        num_tokens += 4  # every message follows <|start|>{role/name}\n{content}<|end|>\n
-        for key, value in message.items():
-            num_tokens += len(enc.encode(str(value)))
-            if key == "name":  # if there's a name, the role is omitted
-                num_tokens += -1  # role is always required and always 1 token
+    enc = _get_enc(model)
+    num_tokens = sum(_message_token_counts(messages, enc))
     num_tokens += 2  # every reply is primed with <|start|>assistant
     return num_tokens
 
-def manage_conversation_history(history: list, new_message: dict, model="gpt-4o") -> list:
+def reset_history(session, model="gpt-4o"):
+    """
+    Start the session's history with the system message. Per-message token
+    counts are kept in a parallel list with a running total, since extra keys
+    on the message dicts would be rejected by the OpenAI API.
+    """
+    session["history"] = [SYSTEM_MESSAGE]
+    session["history_tokens"] = _message_token_counts(session["history"], _get_enc(model))
+    session["history_token_total"] = session["history_tokens"][0] + 2  # reply priming
+
+def manage_conversation_history(session, new_message: dict, model="gpt-4o", dropped: list | None = None) -> list:
     """
     Manage conversation history by token count.
     Always keeps the system message and as many recent messages as possible under the token limit.
+    Only the new message is tokenized; trimming adjusts the session's running total.
+    Trimmed messages are appended to `dropped` when a list is given.
     """
-    # Ensure system message is always present
-    if not history or history[0].get("role") != "system":
-        history = [SYSTEM_MESSAGE] + history
+    history = session["history"]
+    message_tokens = session["history_tokens"]
+    enc = _get_enc(model)
 
     # Add the new message
     history.append(new_message)
+    new_tokens = _message_token_counts([new_message], enc)[0]
+    message_tokens.append(new_tokens)
+    total_tokens = session["history_token_total"] + new_tokens
 
     # Aggressive trimming to stay under token limit
-    while count_tokens(history, model=model) > SAFE_TOKEN_LIMIT and len(history) > 3:
-        history.pop(1)
-    
-    # If still too large, keep only system message and last 2 messages
-    if count_tokens(history, model=model) > SAFE_TOKEN_LIMIT and len(history) > 3:
-        history = [history[0]] + history[-2:]
+    while total_tokens > HISTORY_TOKEN_LIMIT and len(history) > 3:
+        removed = history.pop(1)
+        total_tokens -= message_tokens.pop(1)
+        if dropped is not None:
+            dropped.append(removed)
     
     # Final safety check - truncate last message if needed
-    if count_tokens(history, model=model) > SAFE_TOKEN_LIMIT and len(history) > 1:
+    if total_tokens > HISTORY_TOKEN_LIMIT and len(history) > 1:
         last_message = history[-1]
         if len(last_message.get("content", "")) > 1000:
             last_message["content"] = last_message["content"][:800] + "... [Message truncated]"
+            total_tokens -= message_tokens[-1]
+            message_tokens[-1] = _message_token_counts([last_message], enc)[0]
+            total_tokens += message_tokens[-1]
 
+    session["history_token_total"] = total_tokens
     return history
 
-def analyze_sdg_query_intent(user_query):
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+def dumps_json(obj):
     """
-    Analyze user query to determine SDG query intent and parameters.
+    Compact JSON for tool results and stream events. orjson is several times
+    faster than json.dumps on the large result dicts, and the compact output
+    leaves more room for data within the tool-result size limits.
     """
-    query_lower = user_query.lower()
-    
-    # Check for ranking/comparison keywords
-    ranking_keywords = {
-        "top": ["top", "best", "highest", "leading", "superior", "good", "better", "performing well"],
-        "bottom": ["bottom", "worst", "lowest", "poorest", "lagging", "bad", "worse", "performing poorly"],
-        "both": ["compare", "comparison", "trend", "both", "top and bottom", "versus", "vs"]
-    }
-    
-    # Enhanced district detection - check for common district names and patterns
-    detected_district = extract_district_name_from_query(user_query)
-    has_specific_district = detected_district is not None
-    
-    # Also check for common district indicators in the query
-    district_keywords = ["district", "city", "area", "region", "place", "in ", "of ", "for "]
-    has_district_pattern = any(keyword in query_lower for keyword in district_keywords)
-    
-    # Check for best/worst performing district queries
-    is_best_worst_query = any(word in query_lower for word in ["best performing", "worst performing", "top performing", "bottom performing", "best district", "worst district"])
-    
-    # Extract numbers for top_n
-    import re
-    number_patterns = [
-        r"top\s+(\d+)", r"bottom\s+(\d+)", r"(\d+)\s+best", r"(\d+)\s+worst",
-        r"(\d+)\s+districts", r"show\s+(\d+)", r"list\s+(\d+)", r"first\s+(\d+)"
-    ]
-    
-    top_n = None
-    for pattern in number_patterns:
-        match = re.search(pattern, query_lower)
-        if match:
-            top_n = int(match.group(1))
-            break
+    return orjson.dumps(obj, default=str, option=_ORJSON_OPTIONS).decode()
+
+def _json_chunks(obj, depth=2):
+    """
+    Yield dumps_json(obj) in pieces: the members of dicts and lists (down to
+    depth levels) are encoded one at a time, everything below in one call.
+    """
+    if depth and isinstance(obj, dict) and obj:
+        for i, (key, value) in enumerate(obj.items()):
+            # Encoding {key: 0} gives the key exactly as orjson writes it
+            yield ("{" if i == 0 else ",") + dumps_json({key: 0})[1:-2]
+            yield from _json_chunks(value, depth - 1)
+        yield "}"
+    elif depth and isinstance(obj, (list, tuple)) and obj:
+        for i, item in enumerate(obj):
+            yield "[" if i == 0 else ","
+            yield from _json_chunks(item, depth - 1)
+        yield "]"
+    else:
+        yield dumps_json(obj)
+
+def dumps_json_capped(obj, limit):
+    """
+    Like dumps_json, but stops encoding once the output passes limit characters.
+    Returns (text, truncated); a truncated text is cut to limit characters.
+    Tool results are capped for the model anyway, so large ones are never
+    encoded in full only to be thrown away.
+    """
+    parts = []
+    size = 0
+    for chunk in _json_chunks(obj):
+        parts.append(chunk)
+        size += len(chunk)
+        if size > limit:
+            return "".join(parts)[:limit], True
+    return "".join(parts), False
+
+# Tool results and stored replies are capped in tokens, the unit the model's
+# context is measured in: JSON runs ~2 characters per token and prose ~4, so a
+# character cap either cut analysis short or let dense JSON through.
+MAX_TOOL_RESULT_TOKENS = 1500
+MIN_OTHER_DATA_TOKENS = 300
+MAX_REPLY_HISTORY_TOKENS = 600
+# No token is longer than this many characters on average in our payloads, so
+# encoding can stop at tokens * CHARS_PER_TOKEN_BOUND characters.
+CHARS_PER_TOKEN_BOUND = 4
+
+def truncate_tokens(text, max_tokens, marker, force=False, model="gpt-4o"):
+    """
+    Cut text to its first max_tokens tokens and append marker, if it is longer
+    than that (or force is set because the text was already cut upstream).
+    """
+    enc = _get_enc(model)
+    tokens = enc.encode_ordinary(text)
+    if len(tokens) <= max_tokens and not force:
+        return text
+    return enc.decode(tokens[:max_tokens]) + marker
+
+class ORJSONResponse(Response):
+    """
+    JSON response encoded with orjson, and the app's default response class.
+    Boundary geometries arrive as pre-encoded orjson.Fragment values, which are
+    copied into the body as-is; FastAPI's jsonable_encoder cannot handle them,
+    so results carrying boundaries are returned as an instance directly.
+    Unlike fastapi.responses.ORJSONResponse, unknown types fall back to str().
+    """
+    media_type = "application/json"
+
+    def render(self, content):
+        return orjson.dumps(content, default=str, option=_ORJSON_OPTIONS)
+
+# Tool handlers. Each takes the parsed tool arguments and a per-request
+# context dict (currently just the raw user query) and returns the tool result.
+
+def _h_sdg_goal_data(arguments, context):
+    # Use centralized query intent analysis
+    try:
+        query_intent = analyze_sdg_query_intent(context["user_input"])
+    except Exception as e:
+        # District lookup failed; nothing was cached, so the next query retries it
+        return {"error": f"Error analyzing query: {str(e)}"}
     
-    # Default top_n based on query type
-    if top_n is None:
-        if any(word in query_lower for word in ["many", "all", "list"]):
-            top_n = 10
-        else:
-            top_n = 5
+    # Use OpenAI suggested parameters if they exist, otherwise use analyzed intent
+    final_query_type = arguments.get("query_type", query_intent.query_type)
+    final_top_n = arguments.get("top_n", query_intent.top_n)
+    final_state_name = arguments.get("state_name") or query_intent.state_name
     
-    # Determine query type with enhanced district detection
-    query_type = "top_performers"  # default for multiple districts
+    # Capitalize state name properly for database query
+    if final_state_name:
+        final_state_name = final_state_name.title()
     
-    if has_specific_district and not is_best_worst_query:
-        query_type = "individual_district"  # New query type for specific district queries
-    elif is_best_worst_query:
-        # Determine if it's best or worst performing district query
-        if any(word in query_lower for word in ["best", "top", "highest", "leading"]):
-            query_type = "best_district"
+    print(f"Query analysis: {query_intent}")
+    print(f"OpenAI suggested: query_type={arguments.get('query_type')}, top_n={arguments.get('top_n')}")
+    print(f"Final parameters: query_type={final_query_type}, top_n={final_top_n}")
+    print(f"Indicator names from AI: {arguments.get('indicator_names')}")
+    print(f"State name: {final_state_name}")
+
+    result = get_sdg_goal_data(
+        sdg_goal_number=arguments.get("sdg_goal_number"),
+        indicator_names=arguments.get("indicator_names"),
+        year=arguments.get("year", 2021),
+        query_type=final_query_type,
+        top_n=final_top_n,
+        district_name=arguments.get("district_name"),
+        state_name=final_state_name,
+        include_labels=arguments.get("include_labels", True)
+    )
+    # Safe result summary printing
+    try:
+        if isinstance(result, dict) and 'data' in result:
+            data = result['data']
+            if isinstance(data, dict) and 'combined_data' in data:
+                top_count = len(data.get('top_performers', []))
+                bottom_count = len(data.get('bottom_performers', []))
+                print(f"Function result summary: {top_count} top, {bottom_count} bottom performers")
+            elif isinstance(data, list):
+                print(f"Function result summary: {len(data)} districts returned")
+            else:
+                print(f"Function result summary: data type = {type(data)}")
         else:
-            query_type = "worst_district"
-    elif any(word in query_lower for word in ranking_keywords["both"]):
-        query_type = "trend"
-    elif any(word in query_lower for word in ranking_keywords["bottom"]):
-        query_type = "bottom_performers"
-    elif any(word in query_lower for word in ranking_keywords["top"]):
-        query_type = "top_performers"
-    elif any(word in query_lower for word in ["districts", "list", "ranking", "performance", "status"]):
-        query_type = "top_performers"  # default for multiple districts
-    
-    # Extract state information
-    state_keywords = {
-        "rajasthan": ["rajasthan"],
-        "gujarat": ["gujarat"],
-        "maharashtra": ["maharashtra"],
-        "karnataka": ["karnataka"],
-        "tamil nadu": ["tamil nadu", "tamilnadu"],
-        "kerala": ["kerala"],
-        "west bengal": ["west bengal", "bengal"],
-        "uttar pradesh": ["uttar pradesh", "up"],
-        "bihar": ["bihar"],
-        "odisha": ["odisha", "orissa"]
-    }
-    
-    detected_state = None
-    for state, keywords in state_keywords.items():
-        if any(keyword in query_lower for keyword in keywords):
-            detected_state = state
-            break
-    
-    return {
-        "query_type": query_type,
-        "top_n": top_n,
-        "state_name": detected_state,
-        "has_specific_district": has_specific_district,
-        "detected_district": detected_district,
-        "is_best_worst_query": is_best_worst_query,
-        "has_district_pattern": has_district_pattern
-    }
-
-app = FastAPI()
+            print(f"Function result summary: result type = {type(result)}")
+    except Exception as e:
+        print(f"Function result summary: error getting summary - {e}")
+    return result
+
+def _h_indicators_by_sdg_goal(arguments, context):
+    return get_indicators_by_sdg_goal(
+        sdg_goal_number=arguments["sdg_goal_number"]
+    )
+
+# REMOVED: get_indicators_for_classification, classify_districts_by_sdg_status, 
+# get_comprehensive_district_classification - All functionality moved to get_sdg_goal_classification
+
+def _h_sdg_goal_classification(arguments, context):
+    return get_sdg_goal_classification(
+        sdg_goal_number=arguments["sdg_goal_number"],
+        year=arguments.get("year", 2021),
+        state_name=arguments.get("state_name"),
+        classification_type=arguments.get("classification_type", "status"),
+        default_indicator=arguments.get("default_indicator")
+    )
+
+def _h_individual_district_sdg_data(arguments, context):
+    return get_individual_district_sdg_data(
+        district_name=arguments["district_name"],
+        sdg_goal_number=arguments.get("sdg_goal_number"),
+        indicator_names=arguments.get("indicator_names"),
+        year=arguments.get("year", 2021),
+        state_name=arguments.get("state_name")
+    )
+
+def _h_district_indicator_selection_prompt(arguments, context):
+    return get_district_indicator_selection_prompt(
+        district_name=arguments["district_name"],
+        sdg_goal_number=arguments["sdg_goal_number"]
+    )
+
+def _h_best_worst_district_for_indicator(arguments, context):
+    return get_best_worst_district_for_indicator(
+        sdg_goal_number=arguments.get("sdg_goal_number"),
+        indicator_name=arguments.get("indicator_name"),
+        query_type=arguments.get("query_type", "best"),
+        year=arguments.get("year", 2021),
+        state_name=arguments.get("state_name")
+    )
+
+def _h_aac_classification(arguments, context):
+    return get_aac_classification(
+        sdg_goal_number=arguments["sdg_goal_number"],
+        year=arguments.get("year", 2021),
+        state_name=arguments.get("state_name"),
+        classification_method=arguments.get("classification_method", "quantile"),
+        default_indicator=arguments.get("default_indicator")
+    )
+
+def _h_most_least_improved_districts(arguments, context):
+    return get_most_least_improved_districts(
+        sdg_goal_number=arguments["sdg_goal_number"],
+        indicator_name=arguments.get("indicator_name"),
+        query_type=arguments.get("query_type", "most_improved"),
+        top_n=arguments.get("top_n", 5),
+        state_name=arguments.get("state_name")
+    )
+
+def _h_border_districts(arguments, context):
+    return get_border_districts(
+        state1=arguments["state1"],
+        state2=arguments.get("state2"),
+        sdg_goal_number=arguments.get("sdg_goal_number"),
+        indicator_names=arguments.get("indicator_names"),
+        year=arguments.get("year", 2021),
+        include_boundary_data=arguments.get("include_boundary_data", True)
+    )
+
+def _h_districts_within_radius(arguments, context):
+    return get_districts_within_radius(
+        center_point=arguments["center_point"],
+        radius_km=arguments["radius_km"],
+        sdg_goal_number=arguments.get("sdg_goal_number"),
+        indicator_names=arguments.get("indicator_names"),
+        max_districts=arguments.get("max_districts", 50),
+        include_boundary_data=arguments.get("include_boundary_data", True)
+    )
+
+def _passthrough(func):
+    """Handler for tools whose arguments map one-to-one onto the utility function"""
+    def handler(arguments, context):
+        return func(**arguments)
+    return handler
+
+_TOOL_HANDLERS = MappingProxyType({
+    "get_sdg_goal_data": _h_sdg_goal_data,
+    "get_indicators_by_sdg_goal": _h_indicators_by_sdg_goal,
+    "get_sdg_goal_classification": _h_sdg_goal_classification,
+    "get_individual_district_sdg_data": _h_individual_district_sdg_data,
+    "get_district_indicator_selection_prompt": _h_district_indicator_selection_prompt,
+    "get_best_worst_district_for_indicator": _h_best_worst_district_for_indicator,
+    "get_aac_classification": _h_aac_classification,
+    # New high-priority functions
+    "get_state_wise_summary": _passthrough(get_state_wise_summary),
+    "get_time_series_comparison": _passthrough(get_time_series_comparison),
+    "get_aspirational_district_tracking": _passthrough(get_aspirational_district_tracking),
+    "get_cross_sdg_analysis": _passthrough(get_cross_sdg_analysis),
+    "get_neighboring_districts_comparison": _passthrough(get_neighboring_districts_comparison),
+    "get_state_wise_indicator_extremes": _passthrough(get_state_wise_indicator_extremes),
+    "get_most_least_improved_districts": _h_most_least_improved_districts,
+    "get_border_districts": _h_border_districts,
+    "get_districts_within_radius": _h_districts_within_radius,
+})
+
+# Every advertised tool must have a handler and vice versa
+assert _TOOL_HANDLERS.keys() == {tool["function"]["name"] for tool in TOOLS}, "tool handlers out of sync with sdg_tools.TOOLS"
+
+# Result fields that only the frontend uses (map geometry). They stay in the
+# results returned to the client but are never shown to the model.
+CLIENT_ONLY_RESULT_KEYS = frozenset({"boundary", "boundary_data"})
+
+def model_view(result):
+    """The part of a tool result sent to the model: a new dict without client-only fields"""
+    if not isinstance(result, dict):
+        return result
+    return {key: value for key, value in result.items() if key not in CLIENT_ONLY_RESULT_KEYS}
+
+def _as_list(value):
+    if not value:
+        return []
+    return value if isinstance(value, list) else [value]
+
+def collect_boundaries(results):
+    """
+    All boundaries from a turn's tool results (under either "boundary" or
+    "boundary_data"), in call order. Several calls often cover the same
+    districts, so each (district, state) polygon is kept once.
+    """
+    seen = set()
+    boundaries = []
+    for boundary in chain.from_iterable(
+        _as_list(result.get("boundary") or result.get("boundary_data"))
+        for result in results if isinstance(result, dict)
+    ):
+        district = boundary.get("district") if isinstance(boundary, dict) else None
+        if district is not None:
+            key = (district, boundary.get("state"))
+            if key in seen:
+                continue
+            seen.add(key)
+        boundaries.append(boundary)
+    return boundaries
+
+# Summary field -> source field for the performers kept from trend results
+_PERFORMER_SUMMARY_FIELDS = (
+    ("district", "district"),
+    ("state", "state"),
+    ("performance", "performance_percentile"),
+    ("annual_change", "annual_change")
+)
+
+def summarize_performers(performers, limit=3):
+    """Compact copies of the first few performers of a trend result, for the model"""
+    return [
+        {name: performer.get(source) for name, source in _PERFORMER_SUMMARY_FIELDS}
+        for performer in performers[:limit]
+    ]
+
+# Tool results depend only on the arguments (and, for CONTEXT_TOOLS, the user's
+# query) and the SDG data only changes on reload, so results are kept in a
+# process-wide LRU cache. Refining a question often repeats an earlier call.
+# Error results are not cached, as they are usually transient database failures.
+# Cached results are shared between requests and must be treated as read-only.
+TOOL_RESULT_CACHE_SIZE = 256
+CONTEXT_TOOLS = frozenset({"get_sdg_goal_data"})
+_tool_result_cache = OrderedDict()
+_tool_result_cache_lock = threading.Lock()
+
+def _tool_cache_key(function_name, arguments, context):
+    key = (function_name, orjson.dumps(arguments, option=orjson.OPT_SORT_KEYS))
+    if function_name in CONTEXT_TOOLS:
+        key += (context["user_input"],)
+    return key
+
+def execute_function_call(function_name, arguments, context):
+    """Execute a single function call and return the result"""
+    handler = _TOOL_HANDLERS.get(function_name)
+    if handler is None:
+        return {"error": f"Unknown function: {function_name}"}
+    key = _tool_cache_key(function_name, arguments, context)
+    with _tool_result_cache_lock:
+        result = _tool_result_cache.get(key)
+        if result is not None:
+            _tool_result_cache.move_to_end(key)
+            return result
+    result = handler(arguments, context)
+    if isinstance(result, dict) and "error" not in result:
+        with _tool_result_cache_lock:
+            _tool_result_cache[key] = result
+            while len(_tool_result_cache) > TOOL_RESULT_CACHE_SIZE:
+                _tool_result_cache.popitem(last=False)
+    return result
+
+async def run_function_call(function_name, arguments, context, error=None):
+    """Run a tool handler in a worker thread so several calls can hit the database at once"""
+    if error is not None:
+        # The arguments were rejected when decoding; report that as the result
+        return error
+    try:
+        return await asyncio.to_thread(execute_function_call, function_name, arguments, context)
+    except psycopg2.Error as e:
+        raise HTTPException(status_code=500, detail=f"Database error in {function_name}: {str(e)}")
+
+app = FastAPI(default_response_class=ORJSONResponse)
 app.add_middleware(
     CORSMiddleware, 
-    allow_origins=["*"],
+    allow_origins=CORS_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"]
 )
+# Boundary GeoJSON dominates most responses and compresses several times over.
+# Event streams are sent with Content-Encoding: identity, which GZipMiddleware
+# passes through untouched, since gzip would hold events back in its buffer.
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+SSE_HEADERS = {"Content-Encoding": "identity"}
+
+# Shared asyncpg pool for async database access from request handlers.
+# The utility functions in sdg_utils still use their own psycopg2 connections.
+_db_pool_lock = asyncio.Lock()
+
+async def get_db_pool():
+    """Return the shared asyncpg pool, creating it on first use"""
+    pool = getattr(app.state, "db_pool", None)
+    if pool is not None:
+        return pool
+    async with _db_pool_lock:
+        pool = getattr(app.state, "db_pool", None)
+        if pool is None:
+            pool = await asyncpg.create_pool(
+                host=os.getenv('DB_HOST'),
+                port=int(os.getenv('DB_PORT', 5432)),
+                database=os.getenv('DB_NAME'),
+                user=os.getenv('DB_USER'),
+                password=os.getenv('DB_PASSWORD'),
+                ssl='require',
+                min_size=5,
+                max_size=20,
+                command_timeout=30
+            )
+            app.state.db_pool = pool
+    return pool
+
+# Every turn makes two or three completion calls, plus background summaries.
+# One shared async HTTP/2 client keeps the TLS connection to the API open
+# between them (and between turns) and multiplexes concurrent calls over it.
+# Calls are awaited, so a session waiting on a completion doesn't hold up the
+# event loop for the others.
+OPENAI_KEEPALIVE_SECONDS = 60
+
+@app.on_event("startup")
+async def create_openai_client():
+    app.state.oai = AsyncOpenAI(
+        api_key=os.getenv("OPEN_API_KEY"),
+        http_client=httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=50, keepalive_expiry=OPENAI_KEEPALIVE_SECONDS)
+        )
+    )
+
+@app.on_event("shutdown")
+async def close_openai_client():
+    client = getattr(app.state, "oai", None)
+    if client is not None:
+        await client.close()
+
+@app.on_event("startup")
+async def open_db_pool():
+    try:
+        await get_db_pool()
+        logger.info("Database pool ready")
+    except Exception as e:
+        # Don't block startup; the pool is retried on the next request
+        logger.warning(f"Could not create database pool at startup: {e}")
+
+@app.on_event("startup")
+async def warm_spatial_index():
+    # The neighbour/radius index is built once from District_Geometry; do it in
+    # the background so startup doesn't wait and the first query doesn't pay
+    def build():
+        try:
+            get_spatial_index()
+            logger.info("Spatial index ready")
+        except Exception as e:
+            # Built on first use instead
+            logger.warning(f"Could not build spatial index at startup: {e}")
+    threading.Thread(target=build, name="spatial-index", daemon=True).start()
+
+@app.on_event("shutdown")
+async def close_db_pool():
+    pool = getattr(app.state, "db_pool", None)
+    if pool is not None:
+        await pool.close()
+
+# Session storage: one conversation per session id, least recently used first.
+# Idle sessions expire after SESSION_TTL_SECONDS and the store never holds more
+# than MAX_SESSIONS conversations. Clients that don't send a session id share
+# DEFAULT_SESSION_ID, which matches the old single-conversation behaviour.
+MAX_SESSIONS = 1000
+SESSION_TTL_SECONDS = 60 * 60
+DEFAULT_SESSION_ID = "default"
+
+# OpenAI reuses the prefill of a previously seen prompt prefix (system message,
+# tool schemas, then history) when requests are routed to the same cache.
+# Keying the route by session keeps each conversation's prefix warm; history is
+# append-only between trims, so consecutive turns share almost all of it.
+CHAT_MODEL = OPENAI_MODEL
+
+# Picking a tool and its arguments is a classification step, so the first call
+# goes to a cheaper, faster model. The main model writes every answer the user
+# sees: the synthesis after tool calls, and conversational replies when the
+# router calls no tool (the main model is asked again with the same tools, so it
+# may still call one). It also re-plans the call when the router picks one of
+# STRONG_MODEL_TOOLS, whose arguments need more reasoning than the router
+# reliably gives.
+TOOL_ROUTER_MODEL = OPENAI_ROUTER_MODEL
+STRONG_MODEL_TOOLS = frozenset({
+    "get_cross_sdg_analysis",
+    "get_districts_within_radius"
+})
+
+async def create_chat_completion(session, model=CHAT_MODEL, **kwargs):
+    """Call chat.completions.create with the session's prompt cache key and log cache hits"""
+    response = await app.state.oai.chat.completions.create(
+        model=model,
+        extra_body=session["extra_body"],
+        **kwargs
+    )
+    usage = getattr(response, "usage", None)
+    details = getattr(usage, "prompt_tokens_details", None)
+    if usage is not None:
+        logger.info("Prompt tokens: %s (cached: %s)", usage.prompt_tokens, getattr(details, "cached_tokens", 0) or 0)
+    return response
+
+def record_assistant_reply(session, final_response):
+    """Add the assistant's answer to the session history, truncating long answers"""
+    truncated_response = truncate_tokens(
+        final_response, MAX_REPLY_HISTORY_TOKENS, "... [Response truncated for conversation history]", model=CHAT_MODEL
+    )
+    
+    # Add to history with proper token management
+    assistant_message = {"role": "assistant", "content": truncated_response}
+    add_to_history(session, assistant_message)
 
-client = OpenAI(
-    api_key=os.getenv("OPEN_API_KEY")
+# Messages trimmed from a session's history are summarized by the router model in
+# a background task, so trimming never waits on an extra completion. The summary
+# goes in right after the system prompt on the next turn; until then the
+# previous summary (if any) stays in place.
+SUMMARY_PREFIX = "Earlier conversation summary: "
+SUMMARY_PROMPT = (
+    "Summarize this conversation between a user and an SDG data assistant for Indian districts. "
+    "Keep the SDG goals, indicators, districts, states and years discussed, and any conclusions, "
+    "in under 150 words. Reply with the summary only."
 )
+async def summarize_messages(messages):
+    """Summarize messages into a single system message using the router model"""
+    transcript = "\n".join(
+        f"{message.get('role')}: {str(message.get('content') or '')[:2000]}" for message in messages
+    )
+    response = await app.state.oai.chat.completions.create(
+        model=TOOL_ROUTER_MODEL,
+        messages=[
+            {"role": "system", "content": SUMMARY_PROMPT},
+            {"role": "user", "content": transcript}
+        ],
+        max_tokens=300
+    )
+    return {"role": "system", "content": SUMMARY_PREFIX + response.choices[0].message.content}
 
-# Session storage
-session_store = {
-    "history": []
-}
+def is_summary_message(message):
+    return message.get("role") == "system" and str(message.get("content", "")).startswith(SUMMARY_PREFIX)
+
+def schedule_summary(session, dropped):
+    """Queue trimmed messages for summarization, starting a job unless one is running"""
+    session["summary_backlog"].extend(dropped)
+    future = session["summary_future"]
+    if not session["summary_backlog"] or (future is not None and not future.done()):
+        return
+    batch = session["summary_backlog"]
+    session["summary_backlog"] = []
+    session["summary_future"] = asyncio.ensure_future(summarize_messages(batch))
+
+def apply_summary(session):
+    """Swap a finished summary into the history, replacing the previous one"""
+    future = session["summary_future"]
+    if future is None or not future.done():
+        return
+    session["summary_future"] = None
+    try:
+        summary_message = future.result()
+    except Exception as e:
+        logger.warning("History summarization failed: %s", e)
+        return
+    history = session["history"]
+    message_tokens = session["history_tokens"]
+    summary_tokens = _message_token_counts([summary_message], _get_enc("gpt-4o"))[0]
+    if len(history) > 1 and is_summary_message(history[1]):
+        history[1] = summary_message
+        session["history_token_total"] -= message_tokens[1]
+        message_tokens[1] = summary_tokens
+    else:
+        history.insert(1, summary_message)
+        message_tokens.insert(1, summary_tokens)
+    session["history_token_total"] += summary_tokens
+    # More messages were trimmed while this ran; fold this summary into the next one
+    if session["summary_backlog"]:
+        session["summary_backlog"].insert(0, summary_message)
+        schedule_summary(session, [])
+
+def add_to_history(session, message):
+    """Append a message to the session history, summarizing whatever gets trimmed"""
+    dropped = []
+    manage_conversation_history(session, message, dropped=dropped)
+    if dropped:
+        schedule_summary(session, dropped)
+
+def sse_event(payload):
+    return f"data: {dumps_json(payload)}\n\n"
+
+async def stream_synthesis(session, messages, metadata):
+    """
+    Stream the synthesized answer as server-sent events: one "metadata" event
+    carrying the map data, "delta" events as tokens arrive, then "done".
+    The answer is added to the session history when the stream ends; if the
+    client disconnects or the API fails partway, whatever arrived is kept, so
+    the user's question is never left without a reply in the history.
+    """
+    yield sse_event({"type": "metadata", **metadata})
+    parts = []
+    completed = False
+    try:
+        stream = await create_chat_completion(session, messages=messages, stream=True)
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                parts.append(delta)
+                yield sse_event({"type": "delta", "delta": delta})
+        completed = True
+    except OpenAIError as e:
+        yield sse_event({"type": "error", "detail": f"OpenAI API error: {str(e)}"})
+        return
+    finally:
+        if completed:
+            record_assistant_reply(session, "".join(parts))
+        elif parts:
+            record_assistant_reply(session, "".join(parts) + " [Response interrupted]")
+    yield sse_event({"type": "done"})
+
+class SessionStreamingResponse(StreamingResponse):
+    """
+    Event stream that holds its session's lock until the stream has finished.
+    The handler returns while the lock is held and this releases it, so the
+    streamed reply is recorded before the session's next turn can start. The
+    body is closed first, so an interrupted stream's partial reply is still
+    recorded under the lock.
+    """
+    def __init__(self, session, content):
+        super().__init__(content, media_type="text/event-stream", headers=SSE_HEADERS)
+        self.session = session
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            try:
+                await self.body_iterator.aclose()
+            finally:
+                self.session["lock"].release()
+session_store = OrderedDict()
+
+def get_session(session_id):
+    """Return the session for session_id, creating it and evicting stale ones as needed"""
+    now = time.monotonic()
+    session = session_store.get(session_id)
+    if session is not None:
+        session_store.move_to_end(session_id)
+    else:
+        session = {
+            "id": session_id,
+            "lock": asyncio.Lock(),
+            "summary_future": None,
+            "summary_backlog": [],
+            # Sent with every completion for this session; built once here
+            "extra_body": {"prompt_cache_key": f"sdg-chat-{session_id}"}
+        }
+        reset_history(session)
+        session_store[session_id] = session
+    session["last_seen"] = now
+
+    while len(session_store) > MAX_SESSIONS:
+        session_store.popitem(last=False)
+    # Oldest entries sit at the front, so stop at the first live one
+    for sid in list(session_store):
+        if now - session_store[sid]["last_seen"] <= SESSION_TTL_SECONDS:
+            break
+        del session_store[sid]
+    return session
 
 class ChatbotRequest(BaseModel):
     query: str
+    session_id: str | None = None
     history: list[dict] | None = None
     timestamp: int | None = None  # Accept timestamp for cache busting
+    stream: bool = False  # Send the answer as server-sent events instead of one JSON body
     class Config:
         # Allow extra fields to be ignored instead of causing validation errors
         extra = "ignore"
@@ -285,815 +884,102 @@ class MostLeastImprovedRequest(BaseModel):
 def home():
     return {"message": "SDG Chatbot Backend is running!"}
 
+@app.get("/health/db")
+async def health_db():
+    """Database liveness probe for infrastructure health checks"""
+    try:
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            await conn.fetchval("SELECT 1")
+        return {"status": "ok"}
+    except (OSError, asyncio.TimeoutError, asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+        logger.warning("Database health check failed: %s", e)
+        raise HTTPException(status_code=503, detail=f"Database connection error: {str(e)}")
+
 @app.post("/chatbot/")
 async def chatbot(request: ChatbotRequest):
+    session = get_session(request.session_id or DEFAULT_SESSION_ID)
+    # Requests for the same session are handled one at a time so turns don't
+    # interleave in its history; different sessions proceed independently.
+    # A streamed answer keeps the lock until its stream ends (see
+    # SessionStreamingResponse); every other response releases it here.
+    lock = session["lock"]
+    await lock.acquire()
+    response = None
     try:
-        # Test database connection
-        try:
-            conn = get_db_connection()
-            logger.info("Connected to database")
-            conn.close()
-        except psycopg2.Error as e:
-            logger.info("Database error:", str(e))
-            raise HTTPException(status_code=500, detail=f"Database connection error: {str(e)}")
+        response = await handle_chatbot_request(request, session)
+        return response
+    finally:
+        if not isinstance(response, SessionStreamingResponse):
+            lock.release()
 
+async def handle_chatbot_request(request, session):
+    try:
         user_input = request.query
         logger.info("Request body:", request.dict())
         logger.info("User query:", user_input)
-        session = session_store
 
         if "history" not in session:
-            session["history"] = [SYSTEM_MESSAGE]
+            reset_history(session)
 
         # Add user message to history
         user_message = {"role": "user", "content": user_input}
+        tool_context = {"user_input": user_input}
         try:
-             session["history"] = manage_conversation_history(session["history"], user_message)
+             apply_summary(session)
+             add_to_history(session, user_message)
         except Exception as e:
             logger.info("History management error:", str(e))
             raise HTTPException(status_code=500, detail=f"Histroy error: {str(e)}")
             
        
 
-        def execute_function_call(function_name, arguments):
-            """Execute a single function call and return the result"""
-            if function_name == "get_sdg_goal_data":
-                # Use centralized query intent analysis
-                query_intent = analyze_sdg_query_intent(user_input)
-                
-                # Use OpenAI suggested parameters if they exist, otherwise use analyzed intent
-                final_query_type = arguments.get("query_type", query_intent["query_type"])
-                final_top_n = arguments.get("top_n", query_intent["top_n"])
-                final_state_name = arguments.get("state_name") or query_intent.get("state_name")
-                
-                # Capitalize state name properly for database query
-                if final_state_name:
-                    final_state_name = final_state_name.title()
-                
-                print(f"Query analysis: {query_intent}")
-                print(f"OpenAI suggested: query_type={arguments.get('query_type')}, top_n={arguments.get('top_n')}")
-                print(f"Final parameters: query_type={final_query_type}, top_n={final_top_n}")
-                print(f"Indicator names from AI: {arguments.get('indicator_names')}")
-                print(f"State name: {final_state_name}")
-
-                result = get_sdg_goal_data(
-                    sdg_goal_number=arguments.get("sdg_goal_number"),
-                    indicator_names=arguments.get("indicator_names"),
-                    year=arguments.get("year", 2021),
-                    query_type=final_query_type,
-                    top_n=final_top_n,
-                    district_name=arguments.get("district_name"),
-                    state_name=final_state_name,
-                    include_labels=arguments.get("include_labels", True)
-                )
-                # Safe result summary printing
-                try:
-                    if isinstance(result, dict) and 'data' in result:
-                        data = result['data']
-                        if isinstance(data, dict) and 'combined_data' in data:
-                            top_count = len(data.get('top_performers', []))
-                            bottom_count = len(data.get('bottom_performers', []))
-                            print(f"Function result summary: {top_count} top, {bottom_count} bottom performers")
-                        elif isinstance(data, list):
-                            print(f"Function result summary: {len(data)} districts returned")
-                        else:
-                            print(f"Function result summary: data type = {type(data)}")
-                    else:
-                        print(f"Function result summary: result type = {type(result)}")
-                except Exception as e:
-                    print(f"Function result summary: error getting summary - {e}")
-                return result
-            
-            elif function_name == "get_indicators_by_sdg_goal":
-                result = get_indicators_by_sdg_goal(
-                    sdg_goal_number=arguments["sdg_goal_number"]
-                )
-                return result
-            
-            # REMOVED: get_indicators_for_classification, classify_districts_by_sdg_status, 
-            # get_comprehensive_district_classification - All functionality moved to get_sdg_goal_classification
-            
-            elif function_name == "get_sdg_goal_classification":
-                result = get_sdg_goal_classification(
-                    sdg_goal_number=arguments["sdg_goal_number"],
-                    year=arguments.get("year", 2021),
-                    state_name=arguments.get("state_name"),
-                    classification_type=arguments.get("classification_type", "status"),
-                    default_indicator=arguments.get("default_indicator")
-                )
-                return result
-            
-            elif function_name == "get_individual_district_sdg_data":
-                result = get_individual_district_sdg_data(
-                    district_name=arguments["district_name"],
-                    sdg_goal_number=arguments.get("sdg_goal_number"),
-                    indicator_names=arguments.get("indicator_names"),
-                    year=arguments.get("year", 2021),
-                    state_name=arguments.get("state_name")
-                )
-                return result
-            
-            elif function_name == "get_district_indicator_selection_prompt":
-                result = get_district_indicator_selection_prompt(
-                    district_name=arguments["district_name"],
-                    sdg_goal_number=arguments["sdg_goal_number"]
-                )
-                return result
-            
-            elif function_name == "get_best_worst_district_for_indicator":
-                result = get_best_worst_district_for_indicator(
-                    sdg_goal_number=arguments.get("sdg_goal_number"),
-                    indicator_name=arguments.get("indicator_name"),
-                    query_type=arguments.get("query_type", "best"),
-                    year=arguments.get("year", 2021),
-                    state_name=arguments.get("state_name")
-                )
-                return result
-            
-            elif function_name == "get_aac_classification":
-                result = get_aac_classification(
-                    sdg_goal_number=arguments["sdg_goal_number"],
-                    year=arguments.get("year", 2021),
-                    state_name=arguments.get("state_name"),
-                    classification_method=arguments.get("classification_method", "quantile"),
-                    default_indicator=arguments.get("default_indicator")
-                )
-                return result
-            
-            # New high-priority functions
-            elif function_name == "get_state_wise_summary":
-                return get_state_wise_summary(**arguments)
-            
-            elif function_name == "get_time_series_comparison":
-                return get_time_series_comparison(**arguments)
-            
-            elif function_name == "get_aspirational_district_tracking":
-                return get_aspirational_district_tracking(**arguments)
-            
-            elif function_name == "get_cross_sdg_analysis":
-                return get_cross_sdg_analysis(**arguments)
-            
-            elif function_name == "get_neighboring_districts_comparison":
-                return get_neighboring_districts_comparison(**arguments)
-            
-            elif function_name == "get_state_wise_indicator_extremes":
-                return get_state_wise_indicator_extremes(**arguments)
-            
-            # Add new function call for most/least improved districts
-            elif function_name == "get_most_least_improved_districts":
-                return get_most_least_improved_districts(
-                    sdg_goal_number=arguments["sdg_goal_number"],
-                    indicator_name=arguments.get("indicator_name"),
-                    query_type=arguments.get("query_type", "most_improved"),
-                    top_n=arguments.get("top_n", 5),
-                    state_name=arguments.get("state_name")
-                )
-            
-            # Add new function call for border districts
-            elif function_name == "get_border_districts":
-                return get_border_districts(
-                    state1=arguments["state1"],
-                    state2=arguments.get("state2"),
-                    sdg_goal_number=arguments.get("sdg_goal_number"),
-                    indicator_names=arguments.get("indicator_names"),
-                    year=arguments.get("year", 2021),
-                    include_boundary_data=arguments.get("include_boundary_data", True)
-                )
-            
-            # Add new function call for districts within radius
-            elif function_name == "get_districts_within_radius":
-                return get_districts_within_radius(
-                    center_point=arguments["center_point"],
-                    radius_km=arguments["radius_km"],
-                    sdg_goal_number=arguments.get("sdg_goal_number"),
-                    indicator_names=arguments.get("indicator_names"),
-                    max_districts=arguments.get("max_districts", 50),
-                    include_boundary_data=arguments.get("include_boundary_data", True)
-                )
-            
-            else:
-                return {"error": f"Unknown function: {function_name}"}
-
         # Initial call to OpenAI
-        response = client.chat.completions.create(
-            model="gpt-4o-2024-08-06",
+        response = await create_chat_completion(
+            session,
+            model=TOOL_ROUTER_MODEL,
             messages=session["history"],
-            tools=[
-                {
-                    "type": "function",
-                    "function": {
-                        "name": "get_indicators_by_sdg_goal",
-                        "description": "Get all available indicators for a specific SDG goal number. Use this when user mentions an SDG goal number but doesn't specify which indicators they want to analyze. EXCEPTION: Do NOT use this for SDG Goals 8 and 17 (they have only 1 indicator each) - use get_sdg_goal_data directly instead.",
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "sdg_goal_number": {
-                                    "type": "integer",
-                                    "description": "SDG goal number (1-17), but NOT 8 or 17"
-                                }
-                            },
-                            "required": ["sdg_goal_number"]
-                        }
-                    }
-                },
-                {
-                    "type": "function",
-                    "function": {
-                        "name": "get_sdg_goal_data",
-                        "description": """Analyze SDG goal performance for Indian districts. Use this for detailed performance analysis.
-                        
-                        IMPORTANT: 
-                        - For SDG Goals 8 and 17: Use this DIRECTLY since they have only 1 indicator each (no need to show indicators first)
-                        - For other SDG goals: If user mentions SDG goal but no specific indicators, first call get_indicators_by_sdg_goal to show available indicators
-                        
-                        QUERY TYPES:
-                        - 'individual': Get data for specific district(s) - use when user asks about specific district
-                        - 'top_performers': Show top N districts with best performance (lowest values) - use for "best", "top", "highest performing"
-                        - 'bottom_performers': Show bottom N districts with worst performance (highest values) - use for "worst", "bottom", "poorest performing"
-                        - 'trend': Show both top and bottom N districts for comparison - use for "compare", "trends", "both"
-                        
-                        EXAMPLES:
-                        - "Best districts for SDG 1" → First call get_indicators_by_sdg_goal(1), then get_sdg_goal_data
-                        - "Best districts for SDG 8" → DIRECTLY call get_sdg_goal_data(8) since SDG 8 has only 1 indicator
-                        - "Best districts for SDG 17" → DIRECTLY call get_sdg_goal_data(17) since SDG 17 has only 1 indicator
-                        - "Worst performing districts SDG 3" → query_type='bottom_performers', top_n=5  
-                        - "SDG 2 trends" → query_type='trend', top_n=5
-                        - "Mumbai SDG 4 data" → query_type='individual', district_name='Mumbai'
-                        - "Top 10 districts in Karnataka for SDG 5" → query_type='top_performers', top_n=10, state_name='Karnataka'
-                        """,
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "sdg_goal_number": {
-                                    "type": "integer",
-                                    "description": "SDG goal number (1-17)"
-                                },
-                                "indicator_names": {
-                                    "type": "array",
-                                    "items": {"type": "string"},
-                                    "description": "List of specific indicator names. If not provided, uses all indicators for the SDG goal."
-                                },
-                                "year": {
-                                    "type": "integer",
-                                    "description": "Year for analysis (2016 or 2021)",
-                                    "enum": [2016, 2021]
-                                },
-                                "query_type": {
-                                    "type": "string",
-                                    "enum": ["individual", "top_performers", "bottom_performers", "trend"],
-                                    "description": "Type of analysis to perform"
-                                },
-                                "top_n": {
-                                    "type": "integer",
-                                    "description": "Number of districts to return (1-20)",
-                                    "minimum": 1,
-                                    "maximum": 20
-                                },
-                                "district_name": {
-                                    "type": "string",
-                                    "description": "Specific district name for individual queries"
-                                },
-                                "state_name": {
-                                    "type": "string",
-                                    "description": "Optional state filter"
-                                },
-                                "include_labels": {
-                                    "type": "boolean",
-                                    "description": "Include descriptive labels (default: true)"
-                                }
-                            },
-                            "required": ["sdg_goal_number"]
-                        }
-                    }
-                },
-                {
-                    "type": "function",
-                    "function": {
-                        "name": "get_sdg_goal_classification",
-                        "description": """Get comprehensive SDG goal classification data for all indicators within the goal. This function provides all indicator data at once, allowing frontend to show classification for any indicator with dropdown selection.
-                        
-                        Use this when user wants to:
-                        - "Classify districts for SDG Goal [number]"
-                        - "Show SDG Goal [number] classification"
-                        - "District classification for SDG [number]"
-                        - "Map districts by SDG Goal [number]"
-                        
-                        This function:
-                        - Returns ALL indicators for the SDG goal
-                        - Provides district classification data for all indicators
-                        - Uses SDG status classification by default (Achiever, Front Runner, Performer, Aspirant)
-                        - Includes complete boundary data for visualization
-                        - Supports state-wise filtering
-                        
-                        EXAMPLES:
-                        - "Classify districts for SDG Goal 3" → Shows all SDG 3 indicators with dropdown selection
-                        - "SDG 1 classification for Karnataka" → state_name='Karnataka'
-                        - "District classification for SDG Goal 5" → All SDG 5 indicators available for selection
-                        """,
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "sdg_goal_number": {
-                                    "type": "integer",
-                                    "description": "SDG goal number (1-17)"
-                                },
-                                "year": {
-                                    "type": "integer",
-                                    "description": "Year for analysis (2016 or 2021)",
-                                    "enum": [2016, 2021]
-                                },
-                                "state_name": {
-                                    "type": "string",
-                                    "description": "Optional state filter (None for all India)"
-                                },
-                                "classification_type": {
-                                    "type": "string",
-                                    "enum": ["status", "performance", "aspirational"],
-                                    "description": "Type of classification to apply. 'status' uses SDG achievement status (default)"
-                                },
-                                "default_indicator": {
-                                    "type": "string",
-                                    "description": "Which indicator to show first (optional, uses first available if not specified)"
-                                }
-                            },
-                            "required": ["sdg_goal_number"]
-                        }
-                    }
-                },
-                {
-                    "type": "function",
-                    "function": {
-                        "name": "get_individual_district_sdg_data",
-                        "description": """Get comprehensive SDG data for a specific district. Use this when user asks about a specific district by name.
-                        
-                        Use this when user mentions a specific district:
-                        - "Tell me about Mumbai's SDG performance"
-                        - "What is Delhi's SDG Goal 3 status?"
-                        - "Show me Chennai's health indicators"
-                        - "How is Bangalore performing on SDG 1?"
-                        
-                        This function:
-                        - Automatically detects and resolves district names using fuzzy matching
-                        - Returns NFHS-4, NFHS-5, and annual change values for all requested indicators
-                        - Can analyze specific SDG goals or all goals for the district
-                        - Provides trend analysis and improvement status
-                        - Includes boundary data for map visualization
-                        
-                        WORKFLOW:
-                        - If no SDG goal specified: Returns all available SDG data for the district
-                        - If SDG goal specified but no indicators: Returns all indicators for that goal
-                        - If specific indicators mentioned: Returns data for those indicators only
-                        
-                        EXAMPLES:
-                        - "Mumbai SDG status" → All SDG goals for Mumbai
-                        - "Delhi SDG Goal 3" → All SDG 3 indicators for Delhi
-                        - "Chennai malnutrition rates" → Specific indicators for Chennai
-                        """,
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "district_name": {
-                                    "type": "string",
-                                    "description": "Name of the district (will be resolved using fuzzy matching)"
-                                },
-                                "sdg_goal_number": {
-                                    "type": "integer",
-                                    "description": "Optional SDG goal number (1-17). If not provided, returns all goals."
-                                },
-                                "indicator_names": {
-                                    "type": "array",
-                                    "items": {"type": "string"},
-                                    "description": "Optional list of specific indicator names. If not provided, returns all indicators for the goal/district."
-                                },
-                                "year": {
-                                    "type": "integer",
-                                    "description": "Year for analysis (2016 or 2021)",
-                                    "enum": [2016, 2021]
-                                },
-                                "state_name": {
-                                    "type": "string",
-                                    "description": "Optional state name for validation"
-                                }
-                            },
-                            "required": ["district_name"]
-                        }
-                    }
-                },
-                {
-                    "type": "function",
-                    "function": {
-                        "name": "get_district_indicator_selection_prompt",
-                        "description": """Generate a selection prompt when user asks about a district and SDG goal but doesn't specify indicators.
-                        
-                        Use this when:
-                        - User mentions district + SDG goal but no specific indicators
-                        - You need to show available indicators for user selection
-                        - User asks "What indicators are available for [district] in SDG [goal]?"
-                        
-                        This will return a list of available indicators with data availability status.
-                        
-                        EXAMPLES:
-                        - "Mumbai SDG Goal 1" (no specific indicators) → Show available SDG 1 indicators for Mumbai
-                        - "What SDG 3 indicators are available for Delhi?" → List SDG 3 indicators
-                        """,
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "district_name": {
-                                    "type": "string",
-                                    "description": "Name of the district"
-                                },
-                                "sdg_goal_number": {
-                                    "type": "integer",
-                                    "description": "SDG goal number (1-17)"
-                                }
-                            },
-                            "required": ["district_name", "sdg_goal_number"]
-                        }
-                    }
-                },
-                {
-                    "type": "function",
-                    "function": {
-                        "name": "get_best_worst_district_for_indicator",
-                        "description": """Find the best or worst performing district for a specific SDG goal or indicator.
-                        
-                        Use this when user asks:
-                        - "Which district performs best on SDG Goal 3?"
-                        - "What is the worst performing district for malnutrition?"
-                        - "Best district for maternal mortality rate"
-                        - "Worst performing district in Karnataka for SDG 1"
-                        
-                        This function:
-                        - Finds single best/worst performing district
-                        - Returns NFHS-4, NFHS-5, and annual change values
-                        - Handles both specific indicators and overall SDG goal performance
-                        - Supports state-wise filtering
-                        - Provides proper ranking based on indicator direction (higher/lower is better)
-                        
-                        EXAMPLES:
-                        - "Best district for SDG Goal 1" → Overall best performing district for SDG 1
-                        - "Worst district for child mortality" → Worst performing district for specific indicator
-                        - "Best performing district in Maharashtra for SDG 3" → State-filtered query
-                        """,
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "sdg_goal_number": {
-                                    "type": "integer",
-                                    "description": "SDG goal number (1-17). Required for overall goal performance."
-                                },
-                                "indicator_name": {
-                                    "type": "string",
-                                    "description": "Specific indicator name (optional). If provided, finds best/worst for this indicator."
-                                },
-                                "query_type": {
-                                    "type": "string",
-                                    "enum": ["best", "worst"],
-                                    "description": "Whether to find best or worst performing district"
-                                },
-                                "year": {
-                                    "type": "integer",
-                                    "description": "Year for analysis (2016 or 2021)",
-                                    "enum": [2016, 2021]
-                                },
-                                "state_name": {
-                                    "type": "string",
-                                    "description": "Optional state filter"
-                                }
-                            },
-                            "required": ["query_type"]
-                        }
-                    }
-                },
-                {
-                    "type": "function",
-                    "function": {
-                        "name": "get_aac_classification",
-                        "description": "Classify districts based on Annual Average Change (AAC) values to understand improvement trends. Use this when users ask about districts improving/declining over time, progress trends, or want to see which districts are making rapid progress vs those declining.",
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "sdg_goal_number": {"type": "integer", "description": "SDG goal number (1-17)"},
-                                "year": {"type": "integer", "description": "Year for analysis (2021 or 2016)", "default": 2021},
-                                "state_name": {"type": "string", "description": "Optional state name to filter results"},
-                                "classification_method": {"type": "string", "enum": ["quantile", "natural_breaks"], "description": "Classification method", "default": "quantile"},
-                                "default_indicator": {"type": "string", "description": "Optional specific indicator name"}
-                            },
-                            "required": ["sdg_goal_number"]
-                        }
-                    }
-                },
-                {
-                    "type": "function",
-                    "function": {
-                        "name": "get_state_wise_summary",
-                        "description": "Get state-level aggregated SDG performance summary with district boundary data for mapping. Use this when users ask about state-level performance, which states are doing best/worst, state comparisons, or want to see performance patterns at state level rather than district level. Returns boundary data for visualization.",
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "sdg_goal_number": {"type": "integer", "description": "Optional SDG goal number (1-17)"},
-                                "indicator_names": {"type": "array", "items": {"type": "string"}, "description": "Optional list of specific indicator names"},
-                                "year": {"type": "integer", "description": "Year for analysis (2021 or 2016)", "default": 2021},
-                                "top_n": {"type": "integer", "description": "Number of states to return", "default": 10},
-                                "sort_by": {"type": "string", "enum": ["average_performance", "improvement_rate", "district_count"], "description": "How to sort states", "default": "average_performance"}
-                            },
-                            "required": []
-                        }
-                    }
-                },
-                {
-                    "type": "function",
-                    "function": {
-                        "name": "get_time_series_comparison",
-                        "description": "Analyze changes between NFHS-4 (2016) and NFHS-5 (2021) data to show trends over time with boundary data for mapping. Use this when users ask about progress over time, trend analysis, which districts improved most, comparing 2016 vs 2021 data, or tracking changes. Returns boundary data for visualization.",
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "sdg_goal_number": {"type": "integer", "description": "Optional SDG goal number (1-17)"},
-                                "indicator_names": {"type": "array", "items": {"type": "string"}, "description": "Optional list of specific indicator names"},
-                                "analysis_type": {"type": "string", "enum": ["district_trends", "state_trends", "top_improvers", "top_decliners"], "description": "Type of time series analysis", "default": "district_trends"},
-                                "top_n": {"type": "integer", "description": "Number of entities to return", "default": 10},
-                                "state_name": {"type": "string", "description": "Optional state name to filter results"}
-                            },
-                            "required": []
-                        }
-                    }
-                },
-                {
-                    "type": "function",
-                    "function": {
-                        "name": "get_aspirational_district_tracking",
-                        "description": "Track and analyze performance of aspirational districts specifically with boundary data for mapping. Use this when users ask about aspirational districts, how they're performing, which ones are improving fastest, or need attention for policy intervention. Returns boundary data for visualization.",
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "sdg_goal_number": {"type": "integer", "description": "Optional SDG goal number (1-17)"},
-                                "indicator_names": {"type": "array", "items": {"type": "string"}, "description": "Optional list of specific indicator names"},
-                                "analysis_type": {"type": "string", "enum": ["performance_summary", "top_performers", "most_improved", "needs_attention"], "description": "Type of aspirational district analysis", "default": "performance_summary"},
-                                "year": {"type": "integer", "description": "Year for analysis (2021 or 2016)", "default": 2021},
-                                "top_n": {"type": "integer", "description": "Number of districts to return", "default": 15},
-                                "state_name": {"type": "string", "description": "Optional state name to filter results"}
-                            },
-                            "required": []
-                        }
-                    }
-                },
-                {
-                    "type": "function",
-                    "function": {
-                        "name": "get_cross_sdg_analysis",
-                        "description": "Analyze relationships and patterns across multiple SDG goals to understand holistic development with boundary data for mapping. Use this when users ask about: correlations between different SDG goals, districts performing well/badly across multiple SDG goals, best and worst performers across multiple SDGs, multi-goal performance analysis, cross-SDG comparisons, districts excelling in several goals simultaneously, synergies and trade-offs between goals, or understanding interconnections between different development areas. Always use this function when the query mentions multiple SDG goals together (e.g., 'SDG 1, 3, and 5'). All analysis types are fully functional. Returns boundary data for visualization.",
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "sdg_goals": {"type": "array", "items": {"type": "integer"}, "description": "List of SDG goal numbers to analyze (minimum 2 goals)"},
-                                "analysis_type": {"type": "string", "enum": ["correlation", "multi_goal_performance", "goal_synergies", "best_worst_performers"], "description": "Type of cross-SDG analysis: 'correlation' for analyzing relationships between goals, 'multi_goal_performance' for districts performing across multiple goals, 'goal_synergies' for identifying synergies and trade-offs, 'best_worst_performers' for top/bottom performers across goals", "default": "correlation"},
-                                "year": {"type": "integer", "description": "Year for analysis (2021 or 2016)", "default": 2021},
-                                "top_n": {"type": "integer", "description": "Number of results to return", "default": 10},
-                                "state_name": {"type": "string", "description": "Optional state name to filter results"}
-                            },
-                            "required": ["sdg_goals"]
-                        }
-                    }
-                },
-                {
-                    "type": "function",
-                    "function": {
-                        "name": "get_neighboring_districts_comparison",
-                        "description": "Compare a district's SDG performance with its neighboring districts using spatial analysis. Use this when users ask about how a district compares to nearby districts, neighboring performance, or spatial comparisons. Examples: 'How is Mumbai performing compared to neighboring districts?', 'Compare Delhi with nearby districts for SDG 3', 'How do neighboring districts perform for malnutrition compared to Chennai?'. Returns boundary data for mapping all districts.",
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "district_name": {"type": "string", "description": "Target district name to compare with neighbors"},
-                                "sdg_goal_number": {"type": "integer", "description": "Optional SDG goal number (1-17) for focused analysis"},
-                                "indicator_names": {"type": "array", "items": {"type": "string"}, "description": "Optional list of specific indicator names"},
-                                "year": {"type": "integer", "description": "Year for analysis (2021 or 2016)", "default": 2021},
-                                "neighbor_method": {"type": "string", "enum": ["distance", "touching", "closest"], "description": "Method to identify neighbors: 'distance' for within specified km, 'touching' for shared boundary, 'closest' for nearest by centroid", "default": "distance"},
-                                "max_distance_km": {"type": "number", "description": "Maximum distance in km for neighbors (used with 'distance' method)", "default": 100.0},
-                                "max_neighbors": {"type": "integer", "description": "Maximum number of neighbors to include", "default": 10}
-                            },
-                            "required": ["district_name"]
-                        }
-                    }
-                },
-                {
-                    "type": "function",
-                    "function": {
-                        "name": "get_state_wise_indicator_extremes",
-                        "description": "Get the best and worst performing districts for a specific indicator in every state. Use this when users ask about state-wise best/worst performers for specific indicators, intra-state comparisons, or want to see which districts lead/lag within each state. Examples: 'Show me the best and worst districts for skilled birth attendance in each state', 'Which districts have the highest and lowest malnutrition rates in every state?', 'State-wise top and bottom performers for vaccination coverage'. Uses actual NFHS values and considers higher_is_better logic.",
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "indicator_name": {"type": "string", "description": "Short name of the indicator (e.g., 'Skilled Birth Attendants', 'Under 5 Mortality')"},
-                                "year": {"type": "integer", "description": "Year for analysis (2021 or 2016)", "default": 2021},
-                                "include_aac": {"type": "boolean", "description": "Whether to include annual average change analysis in results", "default": 'true'},
-                                "min_districts_per_state": {"type": "integer", "description": "Minimum number of districts required per state to include in results", "default": 3}
-                            },
-                            "required": ["indicator_name"]
-                        }
-                    }
-                },
-                {
-                    "type": "function",
-                    "function": {
-                        "name": "get_most_least_improved_districts",
-                        "description": "Get districts with the most or least improvement (annual change) for a given SDG goal or indicator. Use this when users ask: 'Which districts have improved the most in SDG 2 since 2016?' or 'Show districts with the biggest decline in SDG 4.' Supports filtering by indicator and state. Returns top N improved or declined districts, with boundary data for mapping.",
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "sdg_goal_number": {
-                                    "type": "integer",
-                                    "description": "SDG goal number (1-17)"
-                                },
-                                "indicator_name": {
-                                    "type": "string",
-                                    "description": "Optional specific indicator name (if not provided, uses all indicators for the goal)"
-                                },
-                                "query_type": {
-                                    "type": "string",
-                                    "enum": ["most_improved", "least_improved"],
-                                    "description": "Whether to return most improved or least improved districts"
-                                },
-                                "top_n": {
-                                    "type": "integer",
-                                    "description": "Number of districts to return (default 5)",
-                                    "minimum": 1,
-                                    "maximum": 20
-                                },
-                                "state_name": {
-                                    "type": "string",
-                                    "description": "Optional state filter"
-                                }
-                            },
-                            "required": ["sdg_goal_number"]
-                        }
-                    }
-                },
-                {
-                    "type": "function",
-                    "function": {
-                        "name": "get_border_districts",
-                        "description": """Find districts that share borders with a specific state and analyze their SDG performance. Use this when users ask about border districts, inter-state comparisons, or districts at state boundaries.
-                        
-                        IMPORTANT: For multiple separate states (e.g., "border districts of Bihar and Goa"), make SEPARATE function calls for each state.
-                        
-                        Examples:
-                        - "Show districts on the border of Maharashtra" → One call with state1="Maharashtra"
-                        - "Border districts of Bihar and Goa with SDG 1" → TWO calls: state1="Bihar" and state1="Goa"
-                        - "Districts at Gujarat border with SDG 1 performance" → One call with state1="Gujarat"
-                        - "Border districts between Karnataka and Tamil Nadu" → One call with state1="Karnataka" (will show Tamil Nadu districts that border Karnataka)
-                        
-                        Features:
-                        - Identifies districts that physically share borders with the target state using spatial analysis
-                        - Returns districts from OTHER states that border the target state (excludes districts within target state)
-                        - Returns comprehensive SDG data for all border districts
-                        - Supports filtering by specific SDG goals or indicators
-                        - Includes boundary geometry data for mapping
-                        - Provides comparative analysis between neighboring states
-                        
-                        Use Cases:
-                        - Inter-state policy coordination analysis
-                        - Cross-border development patterns
-                        - Regional disparities at state boundaries
-                        - Resource sharing opportunities between neighboring states
-                        """,
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "state1": {
-                                    "type": "string",
-                                    "description": "First state name (required). Example: 'Maharashtra', 'Karnataka'"
-                                },
-                                "state2": {
-                                    "type": "string",
-                                    "description": "Second state name (optional). If not provided, finds all border districts of state1 with neighboring states."
-                                },
-                                "sdg_goal_number": {
-                                    "type": "integer",
-                                    "description": "Optional SDG goal number (1-17) for focused analysis"
-                                },
-                                "indicator_names": {
-                                    "type": "array",
-                                    "items": {"type": "string"},
-                                    "description": "Optional list of specific indicator names. If not provided, returns all indicators for the specified SDG goal."
-                                },
-                                "year": {
-                                    "type": "integer",
-                                    "description": "Year for analysis (2016 or 2021)",
-                                    "enum": [2016, 2021]
-                                },
-                                "include_boundary_data": {
-                                    "type": "boolean",
-                                    "description": "Whether to include boundary geometry data for mapping (default: true)"
-                                }
-                            },
-                            "required": ["state1"]
-                        }
-                    }
-                },
-                {
-                    "type": "function",
-                    "function": {
-                        "name": "get_districts_within_radius",
-                        "description": """Find all districts within a specified radius from a center point and analyze their SDG performance. Use this when users ask about districts within a specific distance, nearby areas, or radius-based analysis.
-                        
-                        Features:
-                        - Accepts either district name or coordinates (lat,lng) as center point
-                        - Finds all districts within specified radius using spatial analysis
-                        - Returns comprehensive SDG data with both 2016 and 2021 values plus AAC (Annual Average Change)
-                        - Supports both SDG goal analysis and specific indicator analysis
-                        - Includes distance information for each district from the center point
-                        - Provides boundary geometry data for mapping
-                        - Generates detailed comparative analysis with improvement trends
-                        
-                        Center Point Formats:
-                        - District name: "Delhi", "Mumbai", "Chennai"
-                        - Coordinates: "28.6139,77.2090" (lat,lng format)
-                        
-                        Examples:
-                        - "List all districts within 100 km of Delhi and their SDG 7 performance"
-                        - "Districts within 50 km of Mumbai with health indicators"
-                        - "Find districts within 200 km of coordinates 22.5726,88.3639 for education data"
-                        - "Show poverty levels in districts within 150 km of Bangalore"
-                        
-                        Use Cases:
-                        - Regional development planning
-                        - Resource allocation for nearby areas
-                        - Spatial pattern analysis
-                        - Identifying clusters of high/low performance
-                        - Cross-district collaboration opportunities
-                        """,
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "center_point": {
-                                    "type": "string",
-                                    "description": "Either a district name (e.g., 'Delhi') or coordinates as 'lat,lng' (e.g., '28.6139,77.2090')"
-                                },
-                                "radius_km": {
-                                    "type": "number",
-                                    "description": "Radius in kilometers to search within",
-                                    "minimum": 1,
-                                    "maximum": 1000
-                                },
-                                "sdg_goal_number": {
-                                    "type": "integer",
-                                    "description": "Optional SDG goal number (1-17) for focused analysis"
-                                },
-                                "indicator_names": {
-                                    "type": "array",
-                                    "items": {"type": "string"},
-                                    "description": "Optional list of specific indicator names. If not provided with SDG goal, returns all indicators for that goal."
-                                },
-                                "max_districts": {
-                                    "type": "integer",
-                                    "description": "Maximum number of districts to return (default: 50)",
-                                    "minimum": 5,
-                                    "maximum": 100
-                                },
-                                "include_boundary_data": {
-                                    "type": "boolean",
-                                    "description": "Whether to include boundary geometry data for mapping (default: true)"
-                                }
-                            },
-                            "required": ["center_point", "radius_km"]
-                        }
-                    }
-                }
-            ]
+            tools=TOOLS
         )
+        tool_calls = response.choices[0].message.tool_calls
+        if not tool_calls or any(tc.function.name in STRONG_MODEL_TOOLS for tc in tool_calls):
+            # The router's text is never shown to the user; the main model answers
+            # (or re-plans the tool calls)
+            response = await create_chat_completion(
+                session,
+                messages=session["history"],
+                tools=TOOLS
+            )
 
         # Handle the response
         if response.choices[0].message.tool_calls:
             # Function calls were made
-            function_results = []
-            all_boundaries = []
 
-            # Execute function calls
+            # Execute function calls concurrently; results come back in call order
+            calls = []
             for tool_call in response.choices[0].message.tool_calls:
                 function_name = tool_call.function.name
-                arguments = json.loads(tool_call.function.arguments)
+                error = None
+                try:
+                    arguments = decode_arguments(function_name, tool_call.function.arguments)
+                except ValueError as e:
+                    arguments = {}
+                    error = {"error": f"Invalid arguments for {function_name}: {e}"}
                 
                 print(f"Executing function: {function_name}")
                 print(f"Arguments: {arguments}")
-                
-                result = execute_function_call(function_name, arguments)
-                
-                # Collect boundaries if present (check both old and new field names)
-                if isinstance(result, dict):
-                    boundaries = result.get("boundary") or result.get("boundary_data")
-                    if boundaries:
-                        if isinstance(boundaries, list):
-                            all_boundaries.extend(boundaries)
-                        else:
-                            all_boundaries.append(boundaries)
-                
-                function_results.append({
-                    "function": function_name,
-                    "arguments": arguments,
-                    "result": result
-                })
+                calls.append((function_name, arguments, error))
+            
+            results = await asyncio.gather(*[
+                run_function_call(function_name, arguments, tool_context, error)
+                for function_name, arguments, error in calls
+            ])
+            
+            all_boundaries = collect_boundaries(results)
+            function_results = [
+                {"function": function_name, "arguments": arguments, "result": result}
+                for (function_name, arguments, _), result in zip(calls, results)
+            ]
 
             # Create function call messages for OpenAI
             messages_with_results = session["history"] + [response.choices[0].message]
@@ -1103,12 +989,8 @@ async def chatbot(request: ChatbotRequest):
                 function_result = function_results[i]["result"]
                 
                 # Clean result for OpenAI (remove large fields but preserve enhanced_analysis)
-                clean_result = dict(function_result) if isinstance(function_result, dict) else function_result
+                clean_result = model_view(function_result)
                 if isinstance(clean_result, dict):
-                    # Remove boundary data but KEEP enhanced_analysis for comprehensive responses
-                    clean_result.pop("boundary", None)
-                    clean_result.pop("boundary_data", None)
-                    
                     # For trend queries, preserve the enhanced_analysis but summarize data arrays
                     if clean_result.get("query_type") == "trend" and "enhanced_analysis" in clean_result:
                         # For trend analysis, prioritize the enhanced_analysis field
@@ -1117,17 +999,9 @@ async def chatbot(request: ChatbotRequest):
                             data_obj = clean_result["data"]
                             if "top_performers" in data_obj and "bottom_performers" in data_obj:
                                 # Create a summary instead of truncating
-                                top_summary = [{"district": d.get("district"), "state": d.get("state"), 
-                                               "performance": d.get("performance_percentile"), 
-                                               "annual_change": d.get("annual_change")} 
-                                              for d in data_obj["top_performers"][:3]]
-                                bottom_summary = [{"district": d.get("district"), "state": d.get("state"), 
-                                                  "performance": d.get("performance_percentile"), 
-                                                  "annual_change": d.get("annual_change")} 
-                                                 for d in data_obj["bottom_performers"][:3]]
                                 clean_result["data_summary"] = {
-                                    "top_performers": top_summary,
-                                    "bottom_performers": bottom_summary,
+                                    "top_performers": summarize_performers(data_obj["top_performers"]),
+                                    "bottom_performers": summarize_performers(data_obj["bottom_performers"]),
                                     "total_top": len(data_obj["top_performers"]),
                                     "total_bottom": len(data_obj["bottom_performers"])
                                 }
@@ -1141,25 +1015,30 @@ async def chatbot(request: ChatbotRequest):
                                 clean_result["data"] = data_obj[:10]
                                 clean_result["data_summary"] = f"Showing first 10 of {len(data_obj)} total districts"
                 
-                # Convert to string with special handling for enhanced_analysis
+                # Convert to string with special handling for enhanced_analysis.
+                # Results are capped at MAX_TOOL_RESULT_TOKENS; encoding stops once
+                # the output is certainly over that.
                 if isinstance(clean_result, dict) and "enhanced_analysis" in clean_result:
-                    # For responses with enhanced_analysis, ensure it's prominently featured
-                    enhanced_analysis = clean_result["enhanced_analysis"]
-                    result_str = f"ENHANCED_ANALYSIS: {enhanced_analysis}\n\nOTHER_DATA: {json.dumps({k: v for k, v in clean_result.items() if k != 'enhanced_analysis'}, default=str)}"
-                else:
-                    result_str = json.dumps(clean_result, default=str)
-                
-                # More generous token limit for enhanced analysis
-                if len(result_str) > 4000:
-                    if "ENHANCED_ANALYSIS:" in result_str:
-                        # Preserve enhanced analysis but truncate other data
-                        parts = result_str.split("OTHER_DATA:", 1)
-                        if len(parts) == 2:
-                            enhanced_part = parts[0]
-                            other_part = parts[1][:1000] + "... [Other data truncated]"
-                            result_str = enhanced_part + "OTHER_DATA:" + other_part
+                    # For responses with enhanced_analysis, put it first and preserve it
+                    # whole, truncating only the other data
+                    analysis_json = dumps_json(clean_result["enhanced_analysis"])
+                    other_data = {k: v for k, v in clean_result.items() if k != 'enhanced_analysis'}
+                    enc = _get_enc(CHAT_MODEL)
+                    other_budget = max(MAX_TOOL_RESULT_TOKENS - len(enc.encode_ordinary(analysis_json)), MIN_OTHER_DATA_TOKENS)
+                    other_json, truncated = dumps_json_capped(other_data, other_budget * CHARS_PER_TOKEN_BOUND)
+                    if truncated or len(enc.encode_ordinary(other_json)) > other_budget:
+                        other_field = ',"other_data_truncated":' + dumps_json(truncate_tokens(
+                            other_json, MIN_OTHER_DATA_TOKENS, "... [Other data truncated]", force=True, model=CHAT_MODEL
+                        ))
                     else:
-                        result_str = result_str[:3800] + "... [Result truncated for token limit]"
+                        other_field = ',"other_data":' + other_json
+                    result_str = '{"enhanced_analysis":' + analysis_json + other_field + '}'
+                else:
+                    result_str, truncated = dumps_json_capped(clean_result, MAX_TOOL_RESULT_TOKENS * CHARS_PER_TOKEN_BOUND)
+                    result_str = truncate_tokens(
+                        result_str, MAX_TOOL_RESULT_TOKENS, "... [Result truncated for token limit]",
+                        force=truncated, model=CHAT_MODEL
+                    )
                 
                 messages_with_results.append({
                     "role": "tool",
@@ -1167,23 +1046,6 @@ async def chatbot(request: ChatbotRequest):
                     "content": result_str
                 })
 
-            # Get synthesized response from OpenAI
-            synthesis_response = client.chat.completions.create(
-                model="gpt-4o-2024-08-06",
-                messages=messages_with_results
-            )
-
-            final_response = synthesis_response.choices[0].message.content
-            
-            # Create truncated version for history
-            truncated_response = final_response
-            if len(final_response) > 2500:
-                truncated_response = final_response[:2000] + "... [Response truncated for conversation history]"
-            
-            # Add to history with proper token management
-            assistant_message = {"role": "assistant", "content": truncated_response}
-            session["history"] = manage_conversation_history(session["history"], assistant_message)
-
             # Determine map type
             map_type = "sdg_analysis"
             if len(function_results) == 1:
@@ -1193,14 +1055,29 @@ async def chatbot(request: ChatbotRequest):
                 else:
                     map_type = "sdg_analysis"
 
-            # Return comprehensive response
-            return {
-                "response": final_response,
+            metadata = {
                 "map_type": map_type,
                 "function_calls": [{"function": fr["function"], "arguments": fr["arguments"]} for fr in function_results],
                 "data": function_results,
                 "boundary": all_boundaries
             }
+            if request.stream:
+                return SessionStreamingResponse(
+                    session,
+                    stream_synthesis(session, messages_with_results, metadata)
+                )
+
+            # Get synthesized response from OpenAI
+            synthesis_response = await create_chat_completion(
+                session,
+                messages=messages_with_results
+            )
+
+            final_response = synthesis_response.choices[0].message.content
+            record_assistant_reply(session, final_response)
+
+            # Return comprehensive response
+            return ORJSONResponse({"response": final_response, **metadata})
 
         else:
             # No function calls - just return conversational response
@@ -1208,10 +1085,19 @@ async def chatbot(request: ChatbotRequest):
             
             # Add to history
             assistant_message = {"role": "assistant", "content": final_response}
-            session["history"] = manage_conversation_history(session["history"], assistant_message)
-            return {"response": final_response}
+            add_to_history(session, assistant_message)
+            if request.stream:
+                # Already complete, so send it as a single delta
+                return StreamingResponse(
+                    iter([sse_event({"type": "delta", "delta": final_response}), sse_event({"type": "done"})]),
+                    media_type="text/event-stream",
+                    headers=SSE_HEADERS
+                )
+            return ORJSONResponse({"response": final_response})
 
-    except json.JSONDecodeError:
+    except HTTPException:
+        raise
+    except orjson.JSONDecodeError:
         raise HTTPException(status_code=400, detail="Invalid JSON format")
     except OpenAIError as e:
         raise HTTPException(status_code=500, detail=f"OpenAI API error: {str(e)}")
@@ -1230,6 +1116,6 @@ async def most_least_improved_districts(request: MostLeastImprovedRequest):
             top_n=request.top_n,
             state_name=request.state_name
         )
-        return result
+        return ORJSONResponse(result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}") 
@@ -0,0 +1,783 @@
+"""
+OpenAI tool (function-calling) schemas for the SDG chatbot.
+"""
+import inspect
+import sys
+from typing import Annotated, Literal
+
+import orjson
+from pydantic import ConfigDict, Field, ValidationError, create_model
+
+# Parameter schemas shared by several tools. Each is a single dict referenced
+# from every tool that uses it (only ever read, never modified); the strict-mode
+# copy made of it below is likewise built once and shared by those tools.
+_SDG_GOAL_PARAM = {
+    "type": "integer",
+    "description": "SDG goal number (1-17)",
+    "minimum": 1,
+    "maximum": 17
+}
+_OPTIONAL_SDG_GOAL_PARAM = {
+    "type": "integer",
+    "description": "Optional SDG goal number (1-17)",
+    "minimum": 1,
+    "maximum": 17
+}
+_FOCUSED_SDG_GOAL_PARAM = {
+    "type": "integer",
+    "description": "Optional SDG goal number (1-17) for focused analysis",
+    "minimum": 1,
+    "maximum": 17
+}
+_YEAR_PARAM = {
+    "type": "integer",
+    "description": "Year for analysis (2016 or 2021)",
+    "enum": [2016, 2021]
+}
+_YEAR_DEFAULT_2021_PARAM = {
+    "type": "integer",
+    "description": "Year for analysis (2021 or 2016)",
+    "enum": [2021, 2016],
+    "default": 2021
+}
+_STATE_FILTER_PARAM = {
+    "type": "string",
+    "description": "Optional state filter"
+}
+_STATE_NAME_PARAM = {
+    "type": "string",
+    "description": "Optional state name to filter results"
+}
+_INDICATOR_NAMES_PARAM = {
+    "type": "array",
+    "items": {"type": "string"},
+    "description": "Optional list of specific indicator names"
+}
+_INCLUDE_BOUNDARY_PARAM = {
+    "type": "boolean",
+    "description": "Whether to include boundary geometry data for mapping (default: true)"
+}
+
+# Tool descriptions, kept apart from the parameter schemas. They are written
+# indented for readability and dedented once at import (inspect.cleandoc), so
+# the indentation whitespace is never sent to the model.
+DESCRIPTIONS = {
+    "get_indicators_by_sdg_goal": "Get all available indicators for a specific SDG goal number. Use this when user mentions an SDG goal number but doesn't specify which indicators they want to analyze. EXCEPTION: Do NOT use this for SDG Goals 8 and 17 (they have only 1 indicator each) - use get_sdg_goal_data directly instead.",
+    "get_sdg_goal_data": """
+        Analyze SDG goal performance for Indian districts. Use this for detailed performance analysis.
+
+        IMPORTANT: 
+        - For SDG Goals 8 and 17: Use this DIRECTLY since they have only 1 indicator each (no need to show indicators first)
+        - For other SDG goals: If user mentions SDG goal but no specific indicators, first call get_indicators_by_sdg_goal to show available indicators
+
+        QUERY TYPES:
+        - 'individual': Get data for specific district(s) - use when user asks about specific district
+        - 'top_performers': Show top N districts with best performance (lowest values) - use for "best", "top", "highest performing"
+        - 'bottom_performers': Show bottom N districts with worst performance (highest values) - use for "worst", "bottom", "poorest performing"
+        - 'trend': Show both top and bottom N districts for comparison - use for "compare", "trends", "both"
+
+        EXAMPLES:
+        - "Best districts for SDG 1" → First call get_indicators_by_sdg_goal(1), then get_sdg_goal_data
+        - "Best districts for SDG 8" → DIRECTLY call get_sdg_goal_data(8) since SDG 8 has only 1 indicator
+        - "Best districts for SDG 17" → DIRECTLY call get_sdg_goal_data(17) since SDG 17 has only 1 indicator
+        - "Worst performing districts SDG 3" → query_type='bottom_performers', top_n=5  
+        - "SDG 2 trends" → query_type='trend', top_n=5
+        - "Mumbai SDG 4 data" → query_type='individual', district_name='Mumbai'
+        - "Top 10 districts in Karnataka for SDG 5" → query_type='top_performers', top_n=10, state_name='Karnataka'
+    """,
+    "get_sdg_goal_classification": """
+        Get comprehensive SDG goal classification data for all indicators within the goal. This function provides all indicator data at once, allowing frontend to show classification for any indicator with dropdown selection.
+
+        Use this when user wants to:
+        - "Classify districts for SDG Goal [number]"
+        - "Show SDG Goal [number] classification"
+        - "District classification for SDG [number]"
+        - "Map districts by SDG Goal [number]"
+
+        This function:
+        - Returns ALL indicators for the SDG goal
+        - Provides district classification data for all indicators
+        - Uses SDG status classification by default (Achiever, Front Runner, Performer, Aspirant)
+        - Includes complete boundary data for visualization
+        - Supports state-wise filtering
+
+        EXAMPLES:
+        - "Classify districts for SDG Goal 3" → Shows all SDG 3 indicators with dropdown selection
+        - "SDG 1 classification for Karnataka" → state_name='Karnataka'
+        - "District classification for SDG Goal 5" → All SDG 5 indicators available for selection
+    """,
+    "get_individual_district_sdg_data": """
+        Get comprehensive SDG data for a specific district. Use this when user asks about a specific district by name.
+
+        Use this when user mentions a specific district:
+        - "Tell me about Mumbai's SDG performance"
+        - "What is Delhi's SDG Goal 3 status?"
+        - "Show me Chennai's health indicators"
+        - "How is Bangalore performing on SDG 1?"
+
+        This function:
+        - Automatically detects and resolves district names using fuzzy matching
+        - Returns NFHS-4, NFHS-5, and annual change values for all requested indicators
+        - Can analyze specific SDG goals or all goals for the district
+        - Provides trend analysis and improvement status
+        - Includes boundary data for map visualization
+
+        WORKFLOW:
+        - If no SDG goal specified: Returns all available SDG data for the district
+        - If SDG goal specified but no indicators: Returns all indicators for that goal
+        - If specific indicators mentioned: Returns data for those indicators only
+
+        EXAMPLES:
+        - "Mumbai SDG status" → All SDG goals for Mumbai
+        - "Delhi SDG Goal 3" → All SDG 3 indicators for Delhi
+        - "Chennai malnutrition rates" → Specific indicators for Chennai
+    """,
+    "get_district_indicator_selection_prompt": """
+        Generate a selection prompt when user asks about a district and SDG goal but doesn't specify indicators.
+
+        Use this when:
+        - User mentions district + SDG goal but no specific indicators
+        - You need to show available indicators for user selection
+        - User asks "What indicators are available for [district] in SDG [goal]?"
+
+        This will return a list of available indicators with data availability status.
+
+        EXAMPLES:
+        - "Mumbai SDG Goal 1" (no specific indicators) → Show available SDG 1 indicators for Mumbai
+        - "What SDG 3 indicators are available for Delhi?" → List SDG 3 indicators
+    """,
+    "get_best_worst_district_for_indicator": """
+        Find the best or worst performing district for a specific SDG goal or indicator.
+
+        Use this when user asks:
+        - "Which district performs best on SDG Goal 3?"
+        - "What is the worst performing district for malnutrition?"
+        - "Best district for maternal mortality rate"
+        - "Worst performing district in Karnataka for SDG 1"
+
+        This function:
+        - Finds single best/worst performing district
+        - Returns NFHS-4, NFHS-5, and annual change values
+        - Handles both specific indicators and overall SDG goal performance
+        - Supports state-wise filtering
+        - Provides proper ranking based on indicator direction (higher/lower is better)
+
+        EXAMPLES:
+        - "Best district for SDG Goal 1" → Overall best performing district for SDG 1
+        - "Worst district for child mortality" → Worst performing district for specific indicator
+        - "Best performing district in Maharashtra for SDG 3" → State-filtered query
+    """,
+    "get_aac_classification": "Classify districts based on Annual Average Change (AAC) values to understand improvement trends. Use this when users ask about districts improving/declining over time, progress trends, or want to see which districts are making rapid progress vs those declining.",
+    "get_state_wise_summary": "Get state-level aggregated SDG performance summary with district boundary data for mapping. Use this when users ask about state-level performance, which states are doing best/worst, state comparisons, or want to see performance patterns at state level rather than district level. Returns boundary data for visualization.",
+    "get_time_series_comparison": "Analyze changes between NFHS-4 (2016) and NFHS-5 (2021) data to show trends over time with boundary data for mapping. Use this when users ask about progress over time, trend analysis, which districts improved most, comparing 2016 vs 2021 data, or tracking changes. Returns boundary data for visualization.",
+    "get_aspirational_district_tracking": "Track and analyze performance of aspirational districts specifically with boundary data for mapping. Use this when users ask about aspirational districts, how they're performing, which ones are improving fastest, or need attention for policy intervention. Returns boundary data for visualization.",
+    "get_cross_sdg_analysis": "Analyze relationships and patterns across multiple SDG goals to understand holistic development with boundary data for mapping. Use this when users ask about: correlations between different SDG goals, districts performing well/badly across multiple SDG goals, best and worst performers across multiple SDGs, multi-goal performance analysis, cross-SDG comparisons, districts excelling in several goals simultaneously, synergies and trade-offs between goals, or understanding interconnections between different development areas. Always use this function when the query mentions multiple SDG goals together (e.g., 'SDG 1, 3, and 5'). All analysis types are fully functional. Returns boundary data for visualization.",
+    "get_neighboring_districts_comparison": "Compare a district's SDG performance with its neighboring districts using spatial analysis. Use this when users ask about how a district compares to nearby districts, neighboring performance, or spatial comparisons. Examples: 'How is Mumbai performing compared to neighboring districts?', 'Compare Delhi with nearby districts for SDG 3', 'How do neighboring districts perform for malnutrition compared to Chennai?'. Returns boundary data for mapping all districts.",
+    "get_state_wise_indicator_extremes": "Get the best and worst performing districts for a specific indicator in every state. Use this when users ask about state-wise best/worst performers for specific indicators, intra-state comparisons, or want to see which districts lead/lag within each state. Examples: 'Show me the best and worst districts for skilled birth attendance in each state', 'Which districts have the highest and lowest malnutrition rates in every state?', 'State-wise top and bottom performers for vaccination coverage'. Uses actual NFHS values and considers higher_is_better logic.",
+    "get_most_least_improved_districts": "Get districts with the most or least improvement (annual change) for a given SDG goal or indicator. Use this when users ask: 'Which districts have improved the most in SDG 2 since 2016?' or 'Show districts with the biggest decline in SDG 4.' Supports filtering by indicator and state. Returns top N improved or declined districts, with boundary data for mapping.",
+    "get_border_districts": """
+        Find districts that share borders with a specific state and analyze their SDG performance. Use this when users ask about border districts, inter-state comparisons, or districts at state boundaries.
+
+        IMPORTANT: For multiple separate states (e.g., "border districts of Bihar and Goa"), make SEPARATE function calls for each state.
+
+        Examples:
+        - "Show districts on the border of Maharashtra" → One call with state1="Maharashtra"
+        - "Border districts of Bihar and Goa with SDG 1" → TWO calls: state1="Bihar" and state1="Goa"
+        - "Districts at Gujarat border with SDG 1 performance" → One call with state1="Gujarat"
+        - "Border districts between Karnataka and Tamil Nadu" → One call with state1="Karnataka" (will show Tamil Nadu districts that border Karnataka)
+
+        Features:
+        - Identifies districts that physically share borders with the target state using spatial analysis
+        - Returns districts from OTHER states that border the target state (excludes districts within target state)
+        - Returns comprehensive SDG data for all border districts
+        - Supports filtering by specific SDG goals or indicators
+        - Includes boundary geometry data for mapping
+        - Provides comparative analysis between neighboring states
+
+        Use Cases:
+        - Inter-state policy coordination analysis
+        - Cross-border development patterns
+        - Regional disparities at state boundaries
+        - Resource sharing opportunities between neighboring states
+    """,
+    "get_districts_within_radius": """
+        Find all districts within a specified radius from a center point and analyze their SDG performance. Use this when users ask about districts within a specific distance, nearby areas, or radius-based analysis.
+
+        Features:
+        - Accepts either district name or coordinates (lat,lng) as center point
+        - Finds all districts within specified radius using spatial analysis
+        - Returns comprehensive SDG data with both 2016 and 2021 values plus AAC (Annual Average Change)
+        - Supports both SDG goal analysis and specific indicator analysis
+        - Includes distance information for each district from the center point
+        - Provides boundary geometry data for mapping
+        - Generates detailed comparative analysis with improvement trends
+
+        Center Point Formats:
+        - District name: "Delhi", "Mumbai", "Chennai"
+        - Coordinates: "28.6139,77.2090" (lat,lng format)
+
+        Examples:
+        - "List all districts within 100 km of Delhi and their SDG 7 performance"
+        - "Districts within 50 km of Mumbai with health indicators"
+        - "Find districts within 200 km of coordinates 22.5726,88.3639 for education data"
+        - "Show poverty levels in districts within 150 km of Bangalore"
+
+        Use Cases:
+        - Regional development planning
+        - Resource allocation for nearby areas
+        - Spatial pattern analysis
+        - Identifying clusters of high/low performance
+        - Cross-district collaboration opportunities
+    """,
+}
+DESCRIPTIONS = {name: inspect.cleandoc(text) for name, text in DESCRIPTIONS.items()}
+
+# Tool schemas offered to the model. Built once at import time and passed by
+# reference on every completion call - treat as read-only. These stay plain
+# dicts: the OpenAI SDK serializes them with json, which rejects mapping proxies.
+TOOLS = (
+    {
+        "type": "function",
+        "function": {
+            "name": "get_indicators_by_sdg_goal",
+            "description": DESCRIPTIONS["get_indicators_by_sdg_goal"],
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "sdg_goal_number": {
+                        "type": "integer",
+                        "description": "SDG goal number (1-17), but NOT 8 or 17",
+                        "minimum": 1,
+                        "maximum": 17
+                    }
+                },
+                "required": ["sdg_goal_number"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_sdg_goal_data",
+            "description": DESCRIPTIONS["get_sdg_goal_data"],
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "sdg_goal_number": _SDG_GOAL_PARAM,
+                    "indicator_names": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "List of specific indicator names. If not provided, uses all indicators for the SDG goal."
+                    },
+                    "year": _YEAR_PARAM,
+                    "query_type": {
+                        "type": "string",
+                        "enum": ["individual", "top_performers", "bottom_performers", "trend"],
+                        "description": "Type of analysis to perform"
+                    },
+                    "top_n": {
+                        "type": "integer",
+                        "description": "Number of districts to return (1-20)",
+                        "minimum": 1,
+                        "maximum": 20
+                    },
+                    "district_name": {
+                        "type": "string",
+                        "description": "Specific district name for individual queries"
+                    },
+                    "state_name": _STATE_FILTER_PARAM,
+                    "include_labels": {
+                        "type": "boolean",
+                        "description": "Include descriptive labels (default: true)"
+                    }
+                },
+                "required": ["sdg_goal_number"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_sdg_goal_classification",
+            "description": DESCRIPTIONS["get_sdg_goal_classification"],
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "sdg_goal_number": _SDG_GOAL_PARAM,
+                    "year": _YEAR_PARAM,
+                    "state_name": {
+                        "type": "string",
+                        "description": "Optional state filter (None for all India)"
+                    },
+                    "classification_type": {
+                        "type": "string",
+                        "enum": ["status", "performance", "aspirational"],
+                        "description": "Type of classification to apply. 'status' uses SDG achievement status (default)"
+                    },
+                    "default_indicator": {
+                        "type": "string",
+                        "description": "Which indicator to show first (optional, uses first available if not specified)"
+                    }
+                },
+                "required": ["sdg_goal_number"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_individual_district_sdg_data",
+            "description": DESCRIPTIONS["get_individual_district_sdg_data"],
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "district_name": {
+                        "type": "string",
+                        "description": "Name of the district (will be resolved using fuzzy matching)"
+                    },
+                    "sdg_goal_number": {
+                        "type": "integer",
+                        "description": "Optional SDG goal number (1-17). If not provided, returns all goals.",
+                        "minimum": 1,
+                        "maximum": 17
+                    },
+                    "indicator_names": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Optional list of specific indicator names. If not provided, returns all indicators for the goal/district."
+                    },
+                    "year": _YEAR_PARAM,
+                    "state_name": {
+                        "type": "string",
+                        "description": "Optional state name for validation"
+                    }
+                },
+                "required": ["district_name"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_district_indicator_selection_prompt",
+            "description": DESCRIPTIONS["get_district_indicator_selection_prompt"],
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "district_name": {
+                        "type": "string",
+                        "description": "Name of the district"
+                    },
+                    "sdg_goal_number": _SDG_GOAL_PARAM
+                },
+                "required": ["district_name", "sdg_goal_number"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_best_worst_district_for_indicator",
+            "description": DESCRIPTIONS["get_best_worst_district_for_indicator"],
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "sdg_goal_number": {
+                        "type": "integer",
+                        "description": "SDG goal number (1-17). Required for overall goal performance.",
+                        "minimum": 1,
+                        "maximum": 17
+                    },
+                    "indicator_name": {
+                        "type": "string",
+                        "description": "Specific indicator name (optional). If provided, finds best/worst for this indicator."
+                    },
+                    "query_type": {
+                        "type": "string",
+                        "enum": ["best", "worst"],
+                        "description": "Whether to find best or worst performing district"
+                    },
+                    "year": _YEAR_PARAM,
+                    "state_name": _STATE_FILTER_PARAM
+                },
+                "required": ["query_type"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_aac_classification",
+            "description": DESCRIPTIONS["get_aac_classification"],
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "sdg_goal_number": _SDG_GOAL_PARAM,
+                    "year": _YEAR_DEFAULT_2021_PARAM,
+                    "state_name": _STATE_NAME_PARAM,
+                    "classification_method": {"type": "string", "enum": ["quantile", "natural_breaks"], "description": "Classification method", "default": "quantile"},
+                    "default_indicator": {"type": "string", "description": "Optional specific indicator name"}
+                },
+                "required": ["sdg_goal_number"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_state_wise_summary",
+            "description": DESCRIPTIONS["get_state_wise_summary"],
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "sdg_goal_number": _OPTIONAL_SDG_GOAL_PARAM,
+                    "indicator_names": _INDICATOR_NAMES_PARAM,
+                    "year": _YEAR_DEFAULT_2021_PARAM,
+                    "top_n": {"type": "integer", "description": "Number of states to return", "default": 10},
+                    "sort_by": {"type": "string", "enum": ["average_performance", "improvement_rate", "district_count"], "description": "How to sort states", "default": "average_performance"}
+                },
+                "required": []
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_time_series_comparison",
+            "description": DESCRIPTIONS["get_time_series_comparison"],
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "sdg_goal_number": _OPTIONAL_SDG_GOAL_PARAM,
+                    "indicator_names": _INDICATOR_NAMES_PARAM,
+                    "analysis_type": {"type": "string", "enum": ["district_trends", "state_trends", "top_improvers", "top_decliners"], "description": "Type of time series analysis", "default": "district_trends"},
+                    "top_n": {"type": "integer", "description": "Number of entities to return", "default": 10},
+                    "state_name": _STATE_NAME_PARAM
+                },
+                "required": []
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_aspirational_district_tracking",
+            "description": DESCRIPTIONS["get_aspirational_district_tracking"],
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "sdg_goal_number": _OPTIONAL_SDG_GOAL_PARAM,
+                    "indicator_names": _INDICATOR_NAMES_PARAM,
+                    "analysis_type": {"type": "string", "enum": ["performance_summary", "top_performers", "most_improved", "needs_attention"], "description": "Type of aspirational district analysis", "default": "performance_summary"},
+                    "year": _YEAR_DEFAULT_2021_PARAM,
+                    "top_n": {"type": "integer", "description": "Number of districts to return", "default": 15},
+                    "state_name": _STATE_NAME_PARAM
+                },
+                "required": []
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_cross_sdg_analysis",
+            "description": DESCRIPTIONS["get_cross_sdg_analysis"],
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "sdg_goals": {"type": "array", "items": {"type": "integer", "minimum": 1, "maximum": 17}, "minItems": 2, "description": "List of SDG goal numbers to analyze (minimum 2 goals)"},
+                    "analysis_type": {"type": "string", "enum": ["correlation", "multi_goal_performance", "goal_synergies", "best_worst_performers"], "description": "Type of cross-SDG analysis: 'correlation' for analyzing relationships between goals, 'multi_goal_performance' for districts performing across multiple goals, 'goal_synergies' for identifying synergies and trade-offs, 'best_worst_performers' for top/bottom performers across goals", "default": "correlation"},
+                    "year": _YEAR_DEFAULT_2021_PARAM,
+                    "top_n": {"type": "integer", "description": "Number of results to return", "default": 10},
+                    "state_name": _STATE_NAME_PARAM
+                },
+                "required": ["sdg_goals"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_neighboring_districts_comparison",
+            "description": DESCRIPTIONS["get_neighboring_districts_comparison"],
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "district_name": {"type": "string", "description": "Target district name to compare with neighbors"},
+                    "sdg_goal_number": _FOCUSED_SDG_GOAL_PARAM,
+                    "indicator_names": _INDICATOR_NAMES_PARAM,
+                    "year": _YEAR_DEFAULT_2021_PARAM,
+                    "neighbor_method": {"type": "string", "enum": ["distance", "touching", "closest"], "description": "Method to identify neighbors: 'distance' for within specified km, 'touching' for shared boundary, 'closest' for nearest by centroid", "default": "distance"},
+                    "max_distance_km": {"type": "number", "description": "Maximum distance in km for neighbors (used with 'distance' method)", "default": 100.0},
+                    "max_neighbors": {"type": "integer", "description": "Maximum number of neighbors to include", "default": 10}
+                },
+                "required": ["district_name"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_state_wise_indicator_extremes",
+            "description": DESCRIPTIONS["get_state_wise_indicator_extremes"],
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "indicator_name": {"type": "string", "description": "Short name of the indicator (e.g., 'Skilled Birth Attendants', 'Under 5 Mortality')"},
+                    "year": _YEAR_DEFAULT_2021_PARAM,
+                    "include_aac": {"type": "boolean", "description": "Whether to include annual average change analysis in results", "default": True},
+                    "min_districts_per_state": {"type": "integer", "description": "Minimum number of districts required per state to include in results", "default": 3}
+                },
+                "required": ["indicator_name"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_most_least_improved_districts",
+            "description": DESCRIPTIONS["get_most_least_improved_districts"],
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "sdg_goal_number": _SDG_GOAL_PARAM,
+                    "indicator_name": {
+                        "type": "string",
+                        "description": "Optional specific indicator name (if not provided, uses all indicators for the goal)"
+                    },
+                    "query_type": {
+                        "type": "string",
+                        "enum": ["most_improved", "least_improved"],
+                        "description": "Whether to return most improved or least improved districts"
+                    },
+                    "top_n": {
+                        "type": "integer",
+                        "description": "Number of districts to return (default 5)",
+                        "minimum": 1,
+                        "maximum": 20
+                    },
+                    "state_name": _STATE_FILTER_PARAM
+                },
+                "required": ["sdg_goal_number"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_border_districts",
+            "description": DESCRIPTIONS["get_border_districts"],
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "state1": {
+                        "type": "string",
+                        "description": "First state name (required). Example: 'Maharashtra', 'Karnataka'"
+                    },
+                    "state2": {
+                        "type": "string",
+                        "description": "Second state name (optional). If not provided, finds all border districts of state1 with neighboring states."
+                    },
+                    "sdg_goal_number": _FOCUSED_SDG_GOAL_PARAM,
+                    "indicator_names": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Optional list of specific indicator names. If not provided, returns all indicators for the specified SDG goal."
+                    },
+                    "year": _YEAR_PARAM,
+                    "include_boundary_data": _INCLUDE_BOUNDARY_PARAM
+                },
+                "required": ["state1"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_districts_within_radius",
+            "description": DESCRIPTIONS["get_districts_within_radius"],
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "center_point": {
+                        "type": "string",
+                        "description": "Either a district name (e.g., 'Delhi') or coordinates as 'lat,lng' (e.g., '28.6139,77.2090')"
+                    },
+                    "radius_km": {
+                        "type": "number",
+                        "description": "Radius in kilometers to search within",
+                        "minimum": 1,
+                        "maximum": 1000
+                    },
+                    "sdg_goal_number": _FOCUSED_SDG_GOAL_PARAM,
+                    "indicator_names": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Optional list of specific indicator names. If not provided with SDG goal, returns all indicators for that goal."
+                    },
+                    "max_districts": {
+                        "type": "integer",
+                        "description": "Maximum number of districts to return (default: 50)",
+                        "minimum": 5,
+                        "maximum": 100
+                    },
+                    "include_boundary_data": _INCLUDE_BOUNDARY_PARAM
+                },
+                "required": ["center_point", "radius_km"]
+            }
+        }
+    }
+)
+
+def _intern_strings(node, seen):
+    """
+    Intern dict keys and identifier-like string values ("type", "integer",
+    "sdg_goal_number", enum members...) in place, so the hundreds of repeats
+    across the schemas share one object each. Shared sub-schemas are visited once.
+    """
+    if id(node) in seen:
+        return
+    seen.add(id(node))
+    if isinstance(node, dict):
+        items = list(node.items())
+        node.clear()
+        for key, value in items:
+            _intern_strings(value, seen)
+            if isinstance(value, str) and value.isidentifier():
+                value = sys.intern(value)
+            node[sys.intern(key)] = value
+    elif isinstance(node, (list, tuple)):
+        for i, value in enumerate(node):
+            _intern_strings(value, seen)
+            if isinstance(node, list) and isinstance(value, str) and value.isidentifier():
+                node[i] = sys.intern(value)
+
+# Defaults are shown to the model, so each must have its property's declared type
+_JSON_TYPES = {"integer": int, "number": (int, float), "string": str, "boolean": bool, "array": list, "object": dict}
+for _tool in TOOLS:
+    for _param, _schema in _tool["function"]["parameters"].get("properties", {}).items():
+        if "default" in _schema:
+            _default = _schema["default"]
+            assert isinstance(_default, _JSON_TYPES[_schema["type"]]) and (
+                isinstance(_default, bool) == (_schema["type"] == "boolean")
+            ), f"{_tool['function']['name']}.{_param}: default {_default!r} is not a {_schema['type']}"
+
+def _strict_property(schema, required):
+    """
+    A property schema in the form strict mode accepts: optional properties become
+    nullable (the model sends null instead of leaving them out), and "default",
+    which strict mode rejects, moves into the description.
+    """
+    strict = {key: value for key, value in schema.items() if key != "default"}
+    if "default" in schema and "default" not in schema["description"].lower():
+        strict["description"] = f"{schema['description']} (default: {orjson.dumps(schema['default']).decode()})"
+    if not required:
+        strict["type"] = [schema["type"], "null"]
+        if "enum" in schema:
+            strict["enum"] = [*schema["enum"], None]
+    return strict
+
+def _make_strict(tool, strict_copies):
+    """
+    Switch a tool to OpenAI strict mode: every property listed in "required",
+    optional ones nullable, and no additional properties. The shared parameter
+    dicts are left untouched. Their strict copies are memoized in strict_copies
+    by (id(schema), required), so tools that shared a parameter dict share its
+    strict copy too; the source schema is kept in the entry so its id stays
+    unique while the memo is alive.
+    """
+    function = tool["function"]
+    parameters = function["parameters"]
+    required = set(parameters.get("required", []))
+    properties = {}
+    for name, schema in parameters["properties"].items():
+        key = (id(schema), name in required)
+        if key not in strict_copies:
+            strict_copies[key] = (schema, _strict_property(schema, name in required))
+        properties[name] = strict_copies[key][1]
+    function["parameters"] = {
+        "type": "object",
+        "properties": properties,
+        "required": list(parameters["properties"]),
+        "additionalProperties": False
+    }
+    function["strict"] = True
+
+# Strict mode lets the API constrain the model's output to the schema, so tool
+# arguments always parse and match their types.
+_strict_copies = {}
+for _tool in TOOLS:
+    _make_strict(_tool, _strict_copies)
+del _strict_copies
+
+_intern_strings(TOOLS, set())
+
+# The schemas never change, so their JSON form is computed once. The SDK still
+# encodes TOOLS itself when sending; this blob is for sizing the prompt.
+TOOLS_JSON = orjson.dumps(TOOLS)
+
+_PY_TYPES = {"integer": int, "number": float, "string": str, "boolean": bool}
+
+def _arg_type(schema):
+    """Python type (with pydantic constraints) equivalent to a property schema."""
+    json_type = schema["type"]
+    nullable = isinstance(json_type, list)
+    if nullable:
+        json_type = json_type[0]
+    if "enum" in schema:
+        arg_type = Literal[tuple(value for value in schema["enum"] if value is not None)]
+    elif json_type == "array":
+        arg_type = list[_arg_type(schema["items"])]
+    else:
+        arg_type = _PY_TYPES[json_type]
+    bounds = {}
+    if "minimum" in schema:
+        bounds["ge"] = schema["minimum"]
+    if "maximum" in schema:
+        bounds["le"] = schema["maximum"]
+    if "minItems" in schema:
+        bounds["min_length"] = schema["minItems"]
+    if bounds:
+        arg_type = Annotated[arg_type, Field(**bounds)]
+    return arg_type | None if nullable else arg_type
+
+# JSON types are matched exactly ("3" is not an integer), as the schemas say
+_ARG_MODEL_CONFIG = ConfigDict(strict=True)
+
+def _arg_model(tool):
+    """
+    Pydantic model for a tool's arguments. Nullable (optional) arguments default
+    to None, so they may also be left out if a reply comes from outside strict mode.
+    """
+    function = tool["function"]
+    fields = {}
+    for name, schema in function["parameters"]["properties"].items():
+        if isinstance(schema["type"], list):
+            fields[name] = (_arg_type(schema), None)
+        else:
+            fields[name] = (_arg_type(schema), ...)
+    model_name = "".join(part.title() for part in function["name"].split("_")) + "Args"
+    return create_model(model_name, __config__=_ARG_MODEL_CONFIG, **fields)
+
+# Argument models, one per tool, generated from the schemas above so the two
+# cannot drift. pydantic-core parses and validates the model's JSON in one pass.
+ARG_MODELS = {tool["function"]["name"]: _arg_model(tool) for tool in TOOLS}
+
+def decode_arguments(function_name, raw_arguments):
+    """
+    Decode and validate a tool call's JSON arguments. Returns a dict holding only
+    the arguments the model gave a value (null means "not given", so handlers
+    apply their own defaults). Raises ValueError on malformed or invalid input.
+    Unknown tools get a plain decode so the dispatcher can report them.
+    """
+    model = ARG_MODELS.get(function_name)
+    if model is None:
+        return orjson.loads(raw_arguments)
+    try:
+        arguments = model.model_validate_json(raw_arguments)
+    except ValidationError as e:
+        raise ValueError("; ".join(
+            f"{'.'.join(str(part) for part in error['loc']) or 'arguments'}: {error['msg']}"
+            for error in e.errors(include_url=False)
+        )) from None
+    return arguments.model_dump(exclude_none=True)
@@ -1,21 +1,83 @@
 import psycopg2
-import pandas as pd
 import numpy as np
-import json
+import orjson
 from typing import List, Dict, Any, Optional
-from rapidfuzz import process, fuzz
+from rapidfuzz import process, fuzz, utils
 import re
 import os
+from contextlib import contextmanager
+from functools import lru_cache
 import socket
+import threading
+import time
 import logging
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 
+# Tool calls run concurrently in worker threads and each opens its own
+# connection, so connections are reused instead of paying the TLS handshake
+# every time: close() on a pooled connection rolls back and parks it here.
+# Nothing tracks connections that are handed out, so one a caller forgets to
+# close is simply garbage collected as before.
+MAX_IDLE_CONNECTIONS = 8
+IDLE_CONNECTION_TTL_SECONDS = 300
+_idle_connections = []  # (connection, released_at), most recently released last
+_idle_lock = threading.Lock()
+
+class PooledConnection(psycopg2.extensions.connection):
+    """psycopg2 connection whose close() returns it to the idle pool when possible"""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Names of the statements PREPAREd in this session (see execute_prepared)
+        self.prepared_statements = set()
+
+    def close(self):
+        if not self.closed and _release_connection(self):
+            return
+        super().close()
+
+def _release_connection(conn):
+    """Park a connection for reuse. Returns False if it should really be closed."""
+    try:
+        # End the read transaction so the next user starts with a fresh snapshot
+        conn.rollback()
+    except psycopg2.Error:
+        return False
+    with _idle_lock:
+        if len(_idle_connections) >= MAX_IDLE_CONNECTIONS:
+            return False
+        _idle_connections.append((conn, time.monotonic()))
+    return True
+
+def _take_idle_connection():
+    """Most recently released live connection, or None. Expired ones are closed."""
+    while True:
+        with _idle_lock:
+            if not _idle_connections:
+                return None
+            conn, released_at = _idle_connections.pop()
+        if conn.closed or time.monotonic() - released_at > IDLE_CONNECTION_TTL_SECONDS:
+            psycopg2.extensions.connection.close(conn)
+            continue
+        try:
+            # The server or pooler may have dropped it while idle
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1;")
+            cursor.fetchone()
+            cursor.close()
+            return conn
+        except psycopg2.Error:
+            psycopg2.extensions.connection.close(conn)
+
 def get_db_connection():
     """
-    Render-optimized database connection for Supabase with IPv6 support
+    Render-optimized database connection for Supabase with IPv6 support.
+    Reuses an idle pooled connection when one is available.
     """
+    conn = _take_idle_connection()
+    if conn is not None:
+        return conn
     
     # Enhanced configuration with IPv6 support
     config = {
@@ -26,7 +88,8 @@ def get_db_connection():
         'password': os.getenv('DB_PASSWORD'),
         'sslmode': 'require',
         'connect_timeout': 30,
-        'application_name': 'SDG_Project'
+        'application_name': 'SDG_Project',
+        'connection_factory': PooledConnection
     }
     
     # Enhanced connection strategies with IPv6 priority
@@ -61,6 +124,85 @@ def get_db_connection():
     # If all strategies fail, raise the last error
     raise last_error or psycopg2.OperationalError("All connection strategies failed")
 
+# Lookups that run on most tool calls. psycopg2 has no statement cache, so they
+# are PREPAREd once per pooled connection and later calls skip parse and plan.
+# A transaction-mode pooler does not keep prepared statements between
+# transactions; execute_prepared recovers when one goes missing, but set
+# DB_PREPARED_STATEMENTS=0 when connecting through one to skip the extra
+# round trips.
+USE_PREPARED_STATEMENTS = os.getenv('DB_PREPARED_STATEMENTS', '1') != '0'
+PREPARED_STATEMENTS = {
+    "district_state": ("text", """
+        SELECT state_name FROM District_State WHERE district_name = $1
+    """),
+    "goal_indicator_ilike": ("integer, text", """
+        SELECT sdg_short_indicator_name, sdg_full_indicator_name,
+               COALESCE(sg.indicator_direction, 'lower_is_better') as direction,
+               COALESCE(sg.higher_is_better, FALSE) as higher_is_better
+        FROM SDG_Goals sg
+        WHERE major_sdg_goal = $1
+        AND (sdg_short_indicator_name ILIKE $2 OR sdg_full_indicator_name ILIKE $2)
+    """),
+    "goal_indicator_exact": ("integer, text", """
+        SELECT sdg_short_indicator_name, sdg_full_indicator_name,
+               COALESCE(sg.indicator_direction, 'lower_is_better') as direction,
+               COALESCE(sg.higher_is_better, FALSE) as higher_is_better
+        FROM SDG_Goals sg
+        WHERE major_sdg_goal = $1
+        AND (sdg_short_indicator_name = $2 OR sdg_full_indicator_name = $2)
+    """),
+    "indicator_info": ("text", """
+        SELECT sdg_short_indicator_name, sdg_full_indicator_name, major_sdg_goal, higher_is_better
+        FROM SDG_Goals
+        WHERE sdg_short_indicator_name = $1 OR sdg_full_indicator_name = $1
+    """),
+}
+
+def execute_prepared(cursor, name, params):
+    """Run the named statement from PREPARED_STATEMENTS with params for $1, $2, ..."""
+    arg_types, sql = PREPARED_STATEMENTS[name]
+    prepared = getattr(cursor.connection, "prepared_statements", None)
+    if not USE_PREPARED_STATEMENTS or prepared is None:
+        cursor.execute(re.sub(r"\$(\d+)", r"%(p\1)s", sql), {f"p{i}": value for i, value in enumerate(params, 1)})
+        return
+    for attempt in range(2):
+        try:
+            if name not in prepared:
+                # Prepared statements belong to the session, not the transaction, so
+                # the rollback when a connection is parked keeps them
+                cursor.execute(f"PREPARE {name} ({arg_types}) AS {sql}")
+                prepared.add(name)
+            cursor.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", tuple(params))
+            return
+        except (psycopg2.errors.InvalidSqlStatementName, psycopg2.errors.DuplicatePreparedStatement) as e:
+            # The server session doesn't match what this connection recorded,
+            # e.g. a pooler moved it to another backend. Roll back the aborted
+            # transaction (callers here only read) and retry once: prepare again
+            # if the statement is missing, just execute if it already exists.
+            if attempt:
+                raise
+            cursor.connection.rollback()
+            if isinstance(e, psycopg2.errors.InvalidSqlStatementName):
+                prepared.discard(name)
+            else:
+                prepared.add(name)
+
+@contextmanager
+def db_cursor():
+    """
+    Cursor on a pooled connection. On leaving the block the cursor is closed and
+    the connection goes back to the idle pool, also on early returns and errors.
+    """
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        try:
+            yield cursor
+        finally:
+            cursor.close()
+    finally:
+        conn.close()
+
 def connect_with_enhanced_config(config):
     """Original hostname with enhanced connection parameters"""
     try:
@@ -100,14 +242,12 @@ def connect_with_ipv4_force(config):
     except Exception:
         raise psycopg2.OperationalError("IPv4 getaddrinfo resolution failed")
 
-def get_indicators_by_sdg_goal(sdg_goal_number: int):
-    """
-    Get all available indicators for a specific SDG goal number.
-    """
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
+# A goal's indicator list is as static as the indicator names below, so the
+# rows are read once per goal. Callers get freshly built dicts every time.
+@lru_cache(maxsize=32)
+def _load_goal_indicators(sdg_goal_number: int) -> tuple:
+    """(short name, full name, indicator number) rows for the goal, in indicator order"""
+    with db_cursor() as cursor:
         # Query to get all indicators for the SDG goal
         query = """
         SELECT 
@@ -120,7 +260,14 @@ def get_indicators_by_sdg_goal(sdg_goal_number: int):
         """
         
         cursor.execute(query, (sdg_goal_number,))
-        results = cursor.fetchall()
+        return tuple(cursor.fetchall())
+
+def get_indicators_by_sdg_goal(sdg_goal_number: int):
+    """
+    Get all available indicators for a specific SDG goal number.
+    """
+    try:
+        results = _load_goal_indicators(sdg_goal_number)
         
         if not results:
             return {
@@ -137,9 +284,6 @@ def get_indicators_by_sdg_goal(sdg_goal_number: int):
                 "indicator_number": row[2]
             })
         
-        cursor.close()
-        conn.close()
-        
         return {
             "message": f"Found {len(indicators)} indicators for SDG Goal {sdg_goal_number}",
             "indicators": indicators,
@@ -150,14 +294,13 @@ def get_indicators_by_sdg_goal(sdg_goal_number: int):
     except Exception as e:
         return {"error": f"Error retrieving indicators: {str(e)}"}
 
-def fuzzy_match_indicator(user_input: str, sdg_goal_number: int = None):
-    """
-    Find best matching indicator using fuzzy matching.
-    """
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
+# Indicator names only change when the data is reloaded, so each goal's list
+# (and the full list, under None) is read once per process. Errors propagate
+# and are not cached.
+@lru_cache(maxsize=32)
+def _load_indicator_names(sdg_goal_number: Optional[int]) -> tuple:
+    """Short and full names of the goal's indicators (all indicators if no goal)"""
+    with db_cursor() as cursor:
         # Get all indicators for the SDG goal or all indicators if no goal specified
         if sdg_goal_number:
             query = """
@@ -174,18 +317,21 @@ def fuzzy_match_indicator(user_input: str, sdg_goal_number: int = None):
             cursor.execute(query)
         
         results = cursor.fetchall()
-        
-        # Create list of all possible indicator names
-        all_indicators = []
-        for row in results:
-            all_indicators.append(row[0])  # short name
-            all_indicators.append(row[1])  # full name
-        
+    
+    # Create list of all possible indicator names
+    all_indicators = []
+    for row in results:
+        all_indicators.append(row[0])  # short name
+        all_indicators.append(row[1])  # full name
+    return tuple(all_indicators)
+
+def fuzzy_match_indicator(user_input: str, sdg_goal_number: int = None):
+    """
+    Find best matching indicator using fuzzy matching.
+    """
+    try:
         # Find best match
-        best_match = process.extractOne(user_input, all_indicators, score_cutoff=60)
-        
-        cursor.close()
-        conn.close()
+        best_match = process.extractOne(user_input, _load_indicator_names(sdg_goal_number or None), score_cutoff=60)
         
         if best_match:
             return best_match[0]
@@ -198,51 +344,189 @@ def fuzzy_match_indicator(user_input: str, sdg_goal_number: int = None):
 def normalize_district_name(name):
     return name.upper().strip() if name else name
 
+# District names only change when the data is reloaded, so they are read from
+# District_State once per process and shared by every name lookup.
+_district_index = None
+_district_index_lock = threading.Lock()
+
+def get_district_index():
+    """
+    Return the cached district name index:
+    - names: sorted distinct district names
+    - match_names: names lower-cased and stripped of punctuation (rapidfuzz default_process)
+    - options: "district, state" strings for fuzzy matching
+    - exact: lower-cased district name -> (district_name, state_name)
+    """
+    global _district_index
+    if _district_index is None:
+        # Concurrent tool calls on a cold start wait for one scan
+        with _district_index_lock:
+            if _district_index is None:
+                conn = get_db_connection()
+                cursor = conn.cursor()
+                try:
+                    cursor.execute("SELECT DISTINCT district_name, state_name FROM District_State ORDER BY district_name")
+                    rows = cursor.fetchall()
+                finally:
+                    cursor.close()
+                    conn.close()
+                exact = {}
+                for district, state in rows:
+                    exact.setdefault(district.lower(), (district, state))
+                names = sorted({row[0] for row in rows})
+                _district_index = {
+                    "names": names,
+                    "match_names": [utils.default_process(name) for name in names],
+                    "options": [f"{district}, {state}" for district, state in rows],
+                    "exact": exact
+                }
+    return _district_index
+
+# District polygons are just as static, so the shared-boundary graph and the
+# projected centroids are read once and neighbour/radius lookups run in memory.
+_spatial_index = None
+_spatial_index_lock = threading.Lock()
+
+def get_spatial_index():
+    """
+    Return the cached spatial index of District_Geometry:
+    - adjacency: normalized district name -> [(district_name, state_name)] sharing a boundary
+    - names / states / dataset_states / has_geom: per-centroid columns
+      (dataset_states is the District_State state, None if the district is missing there)
+    - xy: (n, 2) array of EPSG:3857 centroid coordinates in metres
+    - lnglat: (n, 2) array of WGS84 centroid coordinates
+    - in_dataset: boolean array, True where dataset_states is set
+    - x_order / x_sorted: rows sorted by x, and their x coordinates (radius broad phase)
+    - position: normalized district name -> first row in the arrays above
+    """
+    global _spatial_index
+    if _spatial_index is None:
+        # Concurrent tool calls wait for a single build instead of each running it
+        with _spatial_index_lock:
+            if _spatial_index is None:
+                conn = get_db_connection()
+                cursor = conn.cursor()
+                try:
+                    cursor.execute("""
+                        SELECT d1.district_name, d2.district_name, d2.state_name
+                        FROM District_Geometry d1
+                        JOIN District_Geometry d2
+                          ON ST_Touches(d1.geom, d2.geom)
+                         AND UPPER(TRIM(d1.district_name)) != UPPER(TRIM(d2.district_name))
+                        ORDER BY d1.district_name, d2.district_name
+                    """)
+                    touching_rows = cursor.fetchall()
+                    cursor.execute("""
+                        SELECT dg.district_name, dg.state_name, ds.state_name, dg.geom IS NOT NULL,
+                               ST_X(ST_Transform(dg.centroid, 3857)), ST_Y(ST_Transform(dg.centroid, 3857)),
+                               ST_X(dg.centroid), ST_Y(dg.centroid)
+                        FROM District_Geometry dg
+                        LEFT JOIN District_State ds ON dg.district_name = ds.district_name
+                        WHERE dg.centroid IS NOT NULL
+                    """)
+                    centroid_rows = cursor.fetchall()
+                finally:
+                    cursor.close()
+                    conn.close()
+        
+                adjacency = {}
+                for district, neighbor, neighbor_state in touching_rows:
+                    adjacency.setdefault(normalize_district_name(district), []).append((neighbor, neighbor_state))
+        
+                position = {}
+                for i, row in enumerate(centroid_rows):
+                    position.setdefault(normalize_district_name(row[0]), i)
+        
+                xy = np.array([(row[4], row[5]) for row in centroid_rows], dtype=float).reshape(-1, 2)
+                x_order = np.argsort(xy[:, 0], kind="stable")
+                _spatial_index = {
+                    "adjacency": adjacency,
+                    "names": [row[0] for row in centroid_rows],
+                    "states": [row[1] for row in centroid_rows],
+                    "dataset_states": [row[2] for row in centroid_rows],
+                    "has_geom": np.array([bool(row[3]) for row in centroid_rows], dtype=bool),
+                    "xy": xy,
+                    "lnglat": np.array([(row[6], row[7]) for row in centroid_rows], dtype=float).reshape(-1, 2),
+                    "in_dataset": np.array([row[2] is not None for row in centroid_rows], dtype=bool),
+                    "x_order": x_order,
+                    "x_sorted": xy[x_order, 0],
+                    "position": position
+                }
+    return _spatial_index
+
+def web_mercator_xy(lat, lng):
+    """Project WGS84 lat/lng to EPSG:3857 metres (same as ST_Transform(..., 3857))."""
+    radius = 6378137.0
+    x = radius * np.radians(lng)
+    y = radius * np.log(np.tan(np.pi / 4 + np.radians(lat) / 2))
+    return x, y
+
+def centroid_distances_km(index, x, y):
+    """Planar EPSG:3857 distance in km from (x, y) to every indexed centroid."""
+    return np.hypot(index["xy"][:, 0] - x, index["xy"][:, 1] - y) / 1000.0
+
+def nearest_centroids(distances, mask, limit):
+    """Row positions allowed by mask, ordered by distance, at most limit of them."""
+    candidates = np.flatnonzero(mask)
+    if limit <= 0:
+        return candidates[:0]
+    if len(candidates) > limit:
+        candidates = candidates[np.argpartition(distances[candidates], limit - 1)[:limit]]
+    return candidates[np.argsort(distances[candidates], kind="stable")]
+
+# Boundary GeoJSON is the bulk of most responses and never changes, so each
+# district's geometry is kept as the raw ST_AsGeoJSON text and embedded into the
+# response with orjson.Fragment instead of being parsed and re-encoded every time.
+# Coordinates are rounded by PostGIS to 5 decimals (about 1 m), finer than any
+# web map zoom shows, instead of shipping full double precision.
+BOUNDARY_COORDINATE_DECIMALS = 5
+_boundary_cache = {}
+
 def get_district_boundary_data(district_names: List[str]):
     """
     Get boundary data for specified districts from District_Geometry table.
+    Geometries are orjson.Fragment values (pre-encoded GeoJSON), cached per district.
     """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
         if not district_names:
             return []
         
         # Normalize district names to match database format (uppercase and trimmed)
-        normalized_names = [normalize_district_name(name) for name in district_names]
-        
-        # Create placeholder string for IN clause
-        placeholders = ','.join(['%s'] * len(normalized_names))
-        
-        query = f"""
-        SELECT 
-            district_name,
-            state_name,
-            ST_AsGeoJSON(geom) as geometry,
-            area_sqkm,
-            perimeter_km
-        FROM District_Geometry 
-        WHERE UPPER(TRIM(district_name)) IN ({placeholders})
-        """
-        
-        cursor.execute(query, normalized_names)
-        results = cursor.fetchall()
-        
-        boundaries = []
-        for row in results:
-            boundaries.append({
-                "district": row[0],
-                "state": row[1],
-                "geometry": json.loads(row[2]) if row[2] else None,
-                "area_sqkm": float(row[3]) if row[3] else None,
-                "perimeter_km": float(row[4]) if row[4] else None
-            })
+        normalized_names = list(dict.fromkeys(normalize_district_name(name) for name in district_names))
+        missing = [name for name in normalized_names if name not in _boundary_cache]
         
-        cursor.close()
-        conn.close()
+        if missing:
+            # The names go in as one array parameter, so the statement text is
+            # the same however many districts are missing
+            query = f"""
+            SELECT 
+                district_name,
+                state_name,
+                ST_AsGeoJSON(geom, {BOUNDARY_COORDINATE_DECIMALS}) as geometry,
+                area_sqkm,
+                perimeter_km
+            FROM District_Geometry 
+            WHERE UPPER(TRIM(district_name)) = ANY(%s)
+            """
+            
+            with db_cursor() as cursor:
+                cursor.execute(query, (missing,))
+                results = cursor.fetchall()
+            
+            # Districts without a geometry row are cached as empty too
+            found = {name: [] for name in missing}
+            for row in results:
+                found.setdefault(normalize_district_name(row[0]), []).append({
+                    "district": row[0],
+                    "state": row[1],
+                    "geometry": orjson.Fragment(row[2]) if row[2] else None,
+                    "area_sqkm": float(row[3]) if row[3] else None,
+                    "perimeter_km": float(row[4]) if row[4] else None
+                })
+            _boundary_cache.update(found)
         
-        return boundaries
+        # Copies, so callers can annotate their boundaries without touching the cache
+        return [dict(boundary) for name in normalized_names for boundary in _boundary_cache.get(name, [])]
         
     except Exception as e:
         print(f"Error getting boundary data: {e}")
@@ -301,22 +585,29 @@ def get_sdg_goal_data(
     except Exception as e:
         return {"error": f"Error in SDG goal data routing: {str(e)}"}
 
-def get_individual_district_data(cursor, sdg_goal_number, indicator_names, year, district_name, state_name):
-    """Get data for a specific district."""
-    try:
-        # Build district filter
-        district_filter = "sgd.district_name ILIKE %s"
-        params = [sdg_goal_number, year, f"%{district_name}%"]
-        
-        if state_name:
-            district_filter += " AND ds.state_name ILIKE %s"
-            params.append(f"%{state_name}%")
-        
-        # Create placeholder for indicators
-        indicator_placeholders = ','.join(['%s'] * len(indicator_names))
-        params.extend(indicator_names)
-        
-        query = f"""
+# NFHS round columns by survey year. Other years fall back to NFHS-4, as the
+# "2021 else 2016" checks elsewhere in this module do.
+YEAR_COLUMNS = {2021: "sgd.nfhs_value_5", 2016: "sgd.nfhs_value_4"}
+
+def _sql_variants(template):
+    """
+    Format template once per (year, has_state_filter) so hot queries pick a
+    constant string at call time instead of building one. The template takes
+    {year_column} and {state_filter}; the state filter adds one ILIKE param.
+    """
+    return {
+        (year, has_state): template.format(
+            year_column=year_column,
+            state_filter="AND ds.state_name ILIKE %s" if has_state else ""
+        )
+        for year, year_column in YEAR_COLUMNS.items()
+        for has_state in (False, True)
+    }
+
+def _sql_key(year, state_name=None):
+    return (2021 if year == 2021 else 2016, bool(state_name))
+
+_INDIVIDUAL_DISTRICT_SQL = _sql_variants("""
         SELECT 
             sgd.district_name,
             ds.state_name,
@@ -331,18 +622,29 @@ def get_individual_district_data(cursor, sdg_goal_number, indicator_names, year,
         JOIN SDG_Goals sg ON sgd.sdg_short_indicator_name = sg.sdg_short_indicator_name
         JOIN District_State ds ON sgd.district_name = ds.district_name
         WHERE sg.major_sdg_goal = %s
-        AND ({year}_column IS NOT NULL)
-        AND {district_filter}
-        AND sg.sdg_short_indicator_name IN ({indicator_placeholders})
+        AND {year_column} IS NOT NULL
+        AND sgd.district_name ILIKE %s
+        {state_filter}
+        AND sg.sdg_short_indicator_name = ANY(%s)
         ORDER BY sgd.district_name, sg.sdg_indicator_number
-        """.replace("{year}_column", f"sgd.nfhs_value_{year - 2015}")
+        """)
+
+def get_individual_district_data(cursor, sdg_goal_number, indicator_names, year, district_name, state_name):
+    """Get data for a specific district."""
+    try:
+        params = [sdg_goal_number, f"%{district_name}%"]
         
-        cursor.execute(query, params)
-        results = cursor.fetchall()
+        if state_name:
+            params.append(f"%{state_name}%")
         
-        # Process results
+        params.append(list(indicator_names))
+        
+        cursor.execute(_INDIVIDUAL_DISTRICT_SQL[_sql_key(year, state_name)], params)
+        
+        # Process results, iterating the cursor so rows become tuples one at a
+        # time instead of all at once in a fetchall() list
         district_data = {}
-        for row in results:
+        for row in cursor:
             district_key = f"{row[0]}, {row[1]}"
             if district_key not in district_data:
                 district_data[district_key] = {
@@ -373,85 +675,12 @@ def get_individual_district_data(cursor, sdg_goal_number, indicator_names, year,
 def get_top_performers_data(cursor, sdg_goal_number, indicator_names, year, top_n, state_name):
     """Get top performing districts for SDG goal using database metadata for proper ranking."""
     try:
-        state_filter = ""
-        params = [sdg_goal_number]
-        
-        if state_name:
-            state_filter = "AND ds.state_name ILIKE %s"
-            params.append(f"%{state_name}%")
-        
-        # Create placeholder for indicators
-        indicator_placeholders = ','.join(['%s'] * len(indicator_names))
-        params.extend(indicator_names)
-        params.append(top_n)
-        
-        # Determine year column - NFHS-4 (2016) and NFHS-5 (2021)
-        year_column = "sgd.nfhs_value_5" if year == 2021 else "sgd.nfhs_value_4"
-        
-        # Enhanced query that uses database metadata for proper ranking
-        # Uses normalized scoring to handle mixed indicator directions
-        query = f"""
-        WITH indicator_percentiles AS (
-            SELECT 
-                sgd.district_name,
-                ds.state_name,
-                sg.sdg_short_indicator_name,
-                {year_column} as value,
-                COALESCE(sg.higher_is_better, FALSE) as higher_is_better,
-                sgd.aspirational_status,
-                sgd.district_sdg_status,
-                CASE 
-                    WHEN COALESCE(sg.higher_is_better, FALSE) = TRUE THEN 
-                        PERCENT_RANK() OVER (PARTITION BY sg.sdg_short_indicator_name ORDER BY {year_column} ASC) * 100
-                    ELSE 
-                        PERCENT_RANK() OVER (PARTITION BY sg.sdg_short_indicator_name ORDER BY {year_column} DESC) * 100
-                END as performance_score
-            FROM SDG_Goals_Data sgd
-            JOIN SDG_Goals sg ON sgd.sdg_short_indicator_name = sg.sdg_short_indicator_name
-            JOIN District_State ds ON sgd.district_name = ds.district_name
-            WHERE sg.major_sdg_goal = %s
-            AND {year_column} IS NOT NULL
-            {state_filter}
-            AND sg.sdg_short_indicator_name IN ({indicator_placeholders})
-        ),
-        district_scores AS (
-            SELECT 
-                district_name,
-                state_name,
-                AVG(performance_score) as avg_performance_score,
-                COUNT(*) as indicator_count,
-                MAX(aspirational_status) as aspirational_status,
-                STRING_AGG(DISTINCT district_sdg_status, ', ' ORDER BY district_sdg_status) as district_sdg_status
-            FROM indicator_percentiles
-            GROUP BY district_name, state_name
-        )
-        SELECT 
-            district_name,
-            state_name,
-            avg_performance_score as avg_score,
-            indicator_count,
-            aspirational_status,
-            district_sdg_status
-        FROM district_scores
-        WHERE indicator_count >= 2  -- Ensure we have at least 2 indicators for reliable ranking
-        ORDER BY avg_performance_score DESC  -- Higher performance score is better
-        LIMIT %s
-        """
-        
-        cursor.execute(query, params)
-        results = cursor.fetchall()
-        
-        # Get detailed indicator data for these districts
-        if results:
-            district_names = [row[0] for row in results]
-            detailed_data = get_detailed_indicator_data(cursor, district_names, indicator_names, year)
-        else:
-            detailed_data = {}
+        results = get_ranked_districts(cursor, sdg_goal_number, indicator_names, year, top_n, state_name, best_first=True)
         
         # Format results
         formatted_results = []
         for i, row in enumerate(results):
-            district_indicators = detailed_data.get(row[0], [])
+            district_indicators = row[6]
             primary_indicator = district_indicators[0] if district_indicators else {}
             
             # Calculate overall annual change across all indicators
@@ -487,96 +716,32 @@ def get_top_performers_data(cursor, sdg_goal_number, indicator_names, year, top_
     except Exception as e:
         return {"error": f"Error getting top performers: {str(e)}"}
 
+# The percentile validation only logs warnings and costs a query per indicator,
+# so it stays off the request path unless SDG_VALIDATE=1 (e.g. in CI).
+VALIDATE_PERCENTILES = os.getenv('SDG_VALIDATE') == '1'
+
 def get_bottom_performers_data(cursor, sdg_goal_number, indicator_names, year, top_n, state_name):
     """Get bottom performing districts for SDG goal using database metadata for proper ranking."""
     try:
-        # Validate percentile calculations to detect potential data anomalies
-        validation_results = validate_percentile_calculation(cursor, sdg_goal_number, indicator_names, year)
-        
-        # Log any anomalies detected
-        for indicator, validation in validation_results.items():
-            if validation.get("anomalies"):
-                print(f"⚠️  Data anomalies detected for {indicator}: {validation['anomalies']}")
-                print(f"   Stats: min={validation['min_value']:.2f}, max={validation['max_value']:.2f}, avg={validation['avg_value']:.2f}")
-        
-        state_filter = ""
-        params = [sdg_goal_number]
-        
-        if state_name:
-            state_filter = "AND ds.state_name ILIKE %s"
-            params.append(f"%{state_name}%")
-        
-        indicator_placeholders = ','.join(['%s'] * len(indicator_names))
-        params.extend(indicator_names)
-        params.append(top_n)
-        
-        # Determine year column - NFHS-4 (2016) and NFHS-5 (2021)
-        year_column = "sgd.nfhs_value_5" if year == 2021 else "sgd.nfhs_value_4"
-        
-        # Enhanced query that uses database metadata for proper ranking
-        # For bottom performers, we want lowest performance scores
-        query = f"""
-        WITH indicator_percentiles AS (
-            SELECT 
-                sgd.district_name,
-                ds.state_name,
-                sg.sdg_short_indicator_name,
-                {year_column} as value,
-                COALESCE(sg.higher_is_better, FALSE) as higher_is_better,
-                sgd.aspirational_status,
-                sgd.district_sdg_status,
-                CASE 
-                    WHEN COALESCE(sg.higher_is_better, FALSE) = TRUE THEN 
-                        PERCENT_RANK() OVER (PARTITION BY sg.sdg_short_indicator_name ORDER BY {year_column} ASC) * 100
-                    ELSE 
-                        PERCENT_RANK() OVER (PARTITION BY sg.sdg_short_indicator_name ORDER BY {year_column} DESC) * 100
-                END as performance_score
-            FROM SDG_Goals_Data sgd
-            JOIN SDG_Goals sg ON sgd.sdg_short_indicator_name = sg.sdg_short_indicator_name
-            JOIN District_State ds ON sgd.district_name = ds.district_name
-            WHERE sg.major_sdg_goal = %s
-            AND {year_column} IS NOT NULL
-            {state_filter}
-            AND sg.sdg_short_indicator_name IN ({indicator_placeholders})
-        ),
-        district_scores AS (
-            SELECT 
-                district_name,
-                state_name,
-                AVG(performance_score) as avg_performance_score,
-                COUNT(*) as indicator_count,
-                MAX(aspirational_status) as aspirational_status,
-                STRING_AGG(DISTINCT district_sdg_status, ', ' ORDER BY district_sdg_status) as district_sdg_status
-            FROM indicator_percentiles
-            GROUP BY district_name, state_name
-        )
-        SELECT 
-            district_name,
-            state_name,
-            avg_performance_score as avg_score,
-            indicator_count,
-            aspirational_status,
-            district_sdg_status
-        FROM district_scores
-        WHERE indicator_count >= 2  -- Ensure we have at least 2 indicators for reliable ranking
-        ORDER BY avg_performance_score ASC  -- Lower performance score is worse
-        LIMIT %s
-        """
-        
-        cursor.execute(query, params)
-        results = cursor.fetchall()
+        if VALIDATE_PERCENTILES:
+            # Validate percentile calculations to detect potential data anomalies
+            validation_results = validate_percentile_calculation(cursor, sdg_goal_number, indicator_names, year)
+            
+            # Log any anomalies detected
+            for indicator, validation in validation_results.items():
+                if validation.get("anomalies"):
+                    logger.warning(
+                        "Data anomalies detected for %s: %s (min=%.2f, max=%.2f, avg=%.2f)",
+                        indicator, validation["anomalies"],
+                        validation["min_value"], validation["max_value"], validation["avg_value"],
+                    )
         
-        # Get detailed indicator data
-        if results:
-            district_names = [row[0] for row in results]
-            detailed_data = get_detailed_indicator_data(cursor, district_names, indicator_names, year)
-        else:
-            detailed_data = {}
+        results = get_ranked_districts(cursor, sdg_goal_number, indicator_names, year, top_n, state_name, best_first=False)
         
         # Format results
         formatted_results = []
         for i, row in enumerate(results):
-            district_indicators = detailed_data.get(row[0], [])
+            district_indicators = row[6]
             primary_indicator = district_indicators[0] if district_indicators else {}
             
             # Calculate overall annual change across all indicators
@@ -612,73 +777,150 @@ def get_bottom_performers_data(cursor, sdg_goal_number, indicator_names, year, t
     except Exception as e:
         return {"error": f"Error getting bottom performers: {str(e)}"}
 
-def get_detailed_indicator_data(cursor, district_names, indicator_names, year):
-    """Get detailed indicator data for specific districts with enhanced change interpretation."""
-    try:
-        if not district_names or not indicator_names:
-            return {}
-        
-        district_placeholders = ','.join(['%s'] * len(district_names))
-        indicator_placeholders = ','.join(['%s'] * len(indicator_names))
-        
-        params = district_names + indicator_names
-        
-        # Determine year column - NFHS-4 (2016) and NFHS-5 (2021)
-        year_column = "sgd.nfhs_value_5" if year == 2021 else "sgd.nfhs_value_4"
-        
-        query = f"""
+# Uses normalized scoring to handle mixed indicator directions
+_DISTRICT_SCORES_SQL = _sql_variants("""
+    WITH indicator_percentiles AS (
         SELECT 
             sgd.district_name,
+            ds.state_name,
             sg.sdg_short_indicator_name,
-            sg.sdg_full_indicator_name,
-            sgd.nfhs_value_4,
-            sgd.nfhs_value_5,
-            sgd.actual_annual_change,
-            COALESCE(sg.indicator_direction, 'lower_is_better') as direction,
-            COALESCE(sg.higher_is_better, FALSE) as higher_is_better
-        FROM SDG_Goals_Data sgd
-        JOIN SDG_Goals sg ON sgd.sdg_short_indicator_name = sg.sdg_short_indicator_name
-        WHERE sgd.district_name IN ({district_placeholders})
-        AND sg.sdg_short_indicator_name IN ({indicator_placeholders})
-        AND {year_column} IS NOT NULL
-        ORDER BY sgd.district_name, sg.sdg_indicator_number
-        """
-        
-        cursor.execute(query, params)
-        results = cursor.fetchall()
-        
-        # Organize by district
-        district_indicators = {}
-        for row in results:
-            district = row[0]
-            if district not in district_indicators:
-                district_indicators[district] = []
-            
-            current_value = row[4] if year == 2021 else row[3]
-            direction = row[6]
-            higher_is_better = row[7]
-            annual_change = row[5]
-            
-            # Enhanced change interpretation
-            change_interpretation = interpret_annual_change_enhanced(annual_change, direction)
-            
-            district_indicators[district].append({
-                "indicator_name": row[1],
-                "indicator_full_name": row[2],
-                "nfhs_4_value": float(row[3]) if row[3] is not None else None,
-                "nfhs_5_value": float(row[4]) if row[4] is not None else None,
-                "current_value": float(current_value) if current_value is not None else None,
-                "annual_change": float(annual_change) if annual_change is not None else None,
-                "direction": direction,
-                "higher_is_better": higher_is_better,
-                "change_interpretation": change_interpretation
-            })
-        
-        return district_indicators
-        
-    except Exception as e:
-        print(f"Error getting detailed indicator data: {e}")
-        return {}
+            {year_column} as value,
+            COALESCE(sg.higher_is_better, FALSE) as higher_is_better,
+            sgd.aspirational_status,
+            sgd.district_sdg_status,
+            CASE 
+                WHEN COALESCE(sg.higher_is_better, FALSE) = TRUE THEN 
+                    PERCENT_RANK() OVER (PARTITION BY sg.sdg_short_indicator_name ORDER BY {year_column} ASC) * 100
+                ELSE 
+                    PERCENT_RANK() OVER (PARTITION BY sg.sdg_short_indicator_name ORDER BY {year_column} DESC) * 100
+            END as performance_score
+        FROM SDG_Goals_Data sgd
+        JOIN SDG_Goals sg ON sgd.sdg_short_indicator_name = sg.sdg_short_indicator_name
+        JOIN District_State ds ON sgd.district_name = ds.district_name
+        WHERE sg.major_sdg_goal = %s
+        AND {year_column} IS NOT NULL
+        {state_filter}
+        AND sg.sdg_short_indicator_name = ANY(%s)
+    ),
+    district_scores AS (
+        SELECT 
+            district_name,
+            state_name,
+            AVG(performance_score) as avg_performance_score,
+            COUNT(*) as indicator_count,
+            MAX(aspirational_status) as aspirational_status,
+            ARRAY_AGG(DISTINCT district_sdg_status ORDER BY district_sdg_status)
+                FILTER (WHERE district_sdg_status IS NOT NULL) as district_sdg_status
+        FROM indicator_percentiles
+        GROUP BY district_name, state_name
+    )
+    SELECT 
+        district_name,
+        state_name,
+        avg_performance_score as avg_score,
+        indicator_count,
+        aspirational_status,
+        district_sdg_status
+    FROM district_scores
+    WHERE indicator_count >= 2  -- Ensure we have at least 2 indicators for reliable ranking
+    ORDER BY avg_performance_score DESC
+    """)
+
+# District scores depend only on the goal, year, state filter and indicator set,
+# and the SDG data only changes on reload, so the PERCENT_RANK pass is computed
+# once and shared by top and bottom performer requests. Errors propagate and
+# are not cached.
+@lru_cache(maxsize=256)
+def _district_scores(sdg_goal_number, year, state_name, indicator_names):
+    """
+    (district, state, avg_score, indicator_count, aspirational_status,
+    district_sdg_status) for every district with at least 2 of the indicators,
+    best average performance percentile first. district_sdg_status is the
+    sorted list of distinct statuses (None if there are none).
+    """
+    params = [sdg_goal_number]
+    
+    if state_name:
+        params.append(f"%{state_name}%")
+    
+    params.append(list(indicator_names))
+    
+    with db_cursor() as cursor:
+        cursor.execute(_DISTRICT_SCORES_SQL[_sql_key(year, state_name)], params)
+        return tuple(cursor.fetchall())
+
+_RANKED_DETAIL_SQL = _sql_variants("""
+    SELECT 
+        sgd.district_name,
+        sg.sdg_short_indicator_name,
+        sg.sdg_full_indicator_name,
+        sgd.nfhs_value_4,
+        sgd.nfhs_value_5,
+        sgd.actual_annual_change,
+        COALESCE(sg.indicator_direction, 'lower_is_better') as direction,
+        COALESCE(sg.higher_is_better, FALSE) as higher_is_better
+    FROM SDG_Goals_Data sgd
+    JOIN SDG_Goals sg ON sgd.sdg_short_indicator_name = sg.sdg_short_indicator_name
+    WHERE sgd.district_name = ANY(%s)
+    AND sg.sdg_short_indicator_name = ANY(%s)
+    AND {year_column} IS NOT NULL
+    ORDER BY sg.sdg_indicator_number
+    """)
+
+def get_ranked_districts(cursor, sdg_goal_number, indicator_names, year, top_n, state_name, best_first):
+    """
+    Rank districts by their average performance percentile across the given
+    indicators (best first if best_first, else worst first) and return up to
+    top_n tuples of (district, state, avg_score, indicator_count,
+    aspirational_status, district_sdg_status, indicators). The ranking comes
+    from the cached district scores; only the per-indicator details of the
+    selected districts are read per call.
+    """
+    scores = _district_scores(sdg_goal_number, year, state_name or None, tuple(indicator_names))
+    selected = scores[:top_n] if best_first else scores[::-1][:top_n]
+    if not selected:
+        return []
+    
+    cursor.execute(
+        _RANKED_DETAIL_SQL[_sql_key(year)],
+        ([row[0] for row in selected], list(indicator_names))
+    )
+    
+    indicators = {row[0]: [] for row in selected}
+    for row in cursor:
+        indicators[row[0]].append(build_indicator_detail(row[1:], year))
+    # Statuses are joined only for the districts returned, not for every
+    # district scored
+    return [
+        (*row[:5], ", ".join(row[5]) if row[5] else None, indicators[row[0]])
+        for row in selected
+    ]
+
+def build_indicator_detail(row, year):
+    """
+    Indicator entry for a district from (short name, full name, NFHS-4 value,
+    NFHS-5 value, annual change, direction, higher_is_better), with enhanced
+    change interpretation.
+    """
+    current_value = row[3] if year == 2021 else row[2]
+    direction = row[5]
+    higher_is_better = row[6]
+    annual_change = row[4]
+    
+    # Enhanced change interpretation
+    change_interpretation = interpret_annual_change_enhanced(annual_change, direction)
+    
+    return {
+        "indicator_name": row[0],
+        "indicator_full_name": row[1],
+        "nfhs_4_value": float(row[2]) if row[2] is not None else None,
+        "nfhs_5_value": float(row[3]) if row[3] is not None else None,
+        "current_value": float(current_value) if current_value is not None else None,
+        "annual_change": float(annual_change) if annual_change is not None else None,
+        "direction": direction,
+        "higher_is_better": higher_is_better,
+        "change_interpretation": change_interpretation
+    }
 
 def interpret_annual_change_enhanced(change_value, indicator_direction):
     """
@@ -735,13 +977,17 @@ def format_sdg_goal_response(response_data):
         if response_data.get("data") and isinstance(response_data["data"], list):
             total_districts = len(response_data["data"])
             
-            # Calculate average scores if available
-            scores = [item.get("performance_percentile") for item in response_data["data"] if item.get("performance_percentile") is not None]
-            avg_score = sum(scores) / len(scores) if scores else None
+            # Calculate average and median scores if available
+            scores = np.fromiter(
+                (item["performance_percentile"] for item in response_data["data"]
+                 if item.get("performance_percentile") is not None),
+                dtype=np.float64
+            )
             
             response_data["summary"] = {
                 "total_districts": total_districts,
-                "average_score": round(avg_score, 2) if avg_score else None,
+                "average_score": round(float(scores.mean()), 2) if scores.size else None,
+                "median_score": round(float(np.median(scores)), 2) if scores.size else None,
                 "indicators_analyzed": len(response_data.get("indicators", [])),
                 "analysis_type": response_data.get("query_type", "unknown")
             }
@@ -790,29 +1036,6 @@ def get_sdg_goal_classification(
     - default_indicator: Which indicator to show first (if None, uses first available)
     """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Get all indicators for this SDG goal
-        cursor.execute("""
-            SELECT sdg_short_indicator_name, sdg_full_indicator_name, sdg_indicator_number
-            FROM SDG_Goals 
-            WHERE major_sdg_goal = %s
-            ORDER BY sdg_indicator_number
-        """, (sdg_goal_number,))
-        
-        indicator_results = cursor.fetchall()
-        if not indicator_results:
-            return {
-                "success": False,
-                "error": f"No indicators found for SDG Goal {sdg_goal_number}",
-                "data": []
-            }
-        
-        available_indicators = []
-        indicator_data_map = {}
-        all_districts_data = []
-        
         # Build state filter
         state_filter = ""
         base_params = []
@@ -823,16 +1046,9 @@ def get_sdg_goal_classification(
         # Determine year column
         year_column = "sgd.nfhs_value_5" if year == 2021 else "sgd.nfhs_value_4"
         
-        # Process each indicator
-        for indicator_row in indicator_results:
-            indicator_short_name = indicator_row[0]
-            indicator_full_name = indicator_row[1]
-            indicator_number = indicator_row[2]
-            
-            # Get district data for this indicator
-            params = [indicator_short_name] + base_params
-            
-            query = f"""
+        # District data for all of the goal's indicators in one round trip,
+        # grouped by indicator (last column) instead of a query per indicator
+        query = f"""
             SELECT 
                 sgd.district_name,
                 ds.state_name,
@@ -844,19 +1060,54 @@ def get_sdg_goal_classification(
                 sgd.district_sdg_status,
                 dg.district_name as has_geometry,
                 COALESCE(sg.indicator_direction, 'lower_is_better') as direction,
-                COALESCE(sg.higher_is_better, FALSE) as higher_is_better
+                COALESCE(sg.higher_is_better, FALSE) as higher_is_better,
+                sgd.sdg_short_indicator_name
             FROM SDG_Goals_Data sgd
             JOIN SDG_Goals sg ON sgd.sdg_short_indicator_name = sg.sdg_short_indicator_name
             JOIN District_State ds ON sgd.district_name = ds.district_name
             LEFT JOIN District_Geometry dg ON sgd.district_name = dg.district_name
-            WHERE sgd.sdg_short_indicator_name = %s
+            WHERE sgd.sdg_short_indicator_name = ANY(%s)
             AND {year_column} IS NOT NULL
             {state_filter}
             ORDER BY ds.state_name, sgd.district_name
             """
+        
+        with db_cursor() as cursor:
+            # Get all indicators for this SDG goal
+            cursor.execute("""
+                SELECT sdg_short_indicator_name, sdg_full_indicator_name, sdg_indicator_number
+                FROM SDG_Goals 
+                WHERE major_sdg_goal = %s
+                ORDER BY sdg_indicator_number
+            """, (sdg_goal_number,))
             
-            cursor.execute(query, params)
-            results = cursor.fetchall()
+            indicator_results = cursor.fetchall()
+            
+            rows_by_indicator = {}
+            if indicator_results:
+                cursor.execute(query, [[row[0] for row in indicator_results]] + base_params)
+                for row in cursor:
+                    rows_by_indicator.setdefault(row[11], []).append(row)
+        
+        if not indicator_results:
+            return {
+                "success": False,
+                "error": f"No indicators found for SDG Goal {sdg_goal_number}",
+                "data": []
+            }
+        
+        available_indicators = []
+        indicator_data_map = {}
+        all_districts_data = []
+        seen_districts = set()
+        
+        # Process each indicator
+        for indicator_row in indicator_results:
+            indicator_short_name = indicator_row[0]
+            indicator_full_name = indicator_row[1]
+            indicator_number = indicator_row[2]
+            
+            results = rows_by_indicator.get(indicator_short_name)
             
             if results:
                 # Add to available indicators
@@ -973,15 +1224,13 @@ def get_sdg_goal_classification(
                 
                 # Collect all districts for boundary data (avoiding duplicates)
                 for district in classified_districts:
-                    if district["has_geometry"] and not any(d["district"] == district["district"] for d in all_districts_data):
+                    if district["has_geometry"] and district["district"] not in seen_districts:
+                        seen_districts.add(district["district"])
                         all_districts_data.append({
                             "district": district["district"],
                             "state": district["state"]
                         })
         
-        cursor.close()
-        conn.close()
-        
         if not available_indicators:
             return {
                 "success": False,
@@ -1376,14 +1625,7 @@ def get_specific_indicator_data(
         resolved_indicator = None
         
         # Try exact match first
-        cursor.execute("""
-            SELECT sdg_short_indicator_name, sdg_full_indicator_name, 
-                   COALESCE(sg.indicator_direction, 'lower_is_better') as direction,
-                   COALESCE(sg.higher_is_better, FALSE) as higher_is_better
-            FROM SDG_Goals sg
-            WHERE major_sdg_goal = %s 
-            AND (sdg_short_indicator_name ILIKE %s OR sdg_full_indicator_name ILIKE %s)
-        """, (sdg_goal_number, indicator_name, indicator_name))
+        execute_prepared(cursor, "goal_indicator_ilike", (sdg_goal_number, indicator_name))
         exact_match = cursor.fetchone()
         
         if exact_match:
@@ -1392,14 +1634,7 @@ def get_specific_indicator_data(
             # Try fuzzy matching
             fuzzy_match = fuzzy_match_indicator(indicator_name, sdg_goal_number)
             if fuzzy_match:
-                cursor.execute("""
-                    SELECT sdg_short_indicator_name, sdg_full_indicator_name,
-                           COALESCE(sg.indicator_direction, 'lower_is_better') as direction,
-                           COALESCE(sg.higher_is_better, FALSE) as higher_is_better
-                    FROM SDG_Goals sg
-                    WHERE major_sdg_goal = %s 
-                    AND (sdg_short_indicator_name = %s OR sdg_full_indicator_name = %s)
-                """, (sdg_goal_number, fuzzy_match, fuzzy_match))
+                execute_prepared(cursor, "goal_indicator_exact", (sdg_goal_number, fuzzy_match))
                 resolved_indicator = cursor.fetchone()
         
         if not resolved_indicator:
@@ -1987,37 +2222,46 @@ def calculate_overall_annual_change(district_indicators):
         "average_change": avg_change
     }
 
+def match_district_name(user_query: str):
+    """
+    Match a district name in the user query against the district index.
+    Returns None when nothing matches; errors loading the index (e.g. the
+    database is unreachable) propagate, so callers that cache the result
+    don't keep a miss that was really a failure.
+    """
+    index = get_district_index()
+    db_districts = index["names"]
+    
+    # Exact name (any case) needs no fuzzy matching
+    exact = index["exact"].get(user_query.strip().lower())
+    if exact:
+        return exact[0]
+    
+    # Try fuzzy matching
+    best_match = process.extractOne(user_query, db_districts, score_cutoff=70)
+    
+    if best_match:
+        return best_match[0]
+    
+    # If no good match, try word-by-word matching. All words are scored
+    # against the preprocessed names in one batch; the first word with a
+    # match wins, as before.
+    query_words = [utils.default_process(word) for word in user_query.split() if len(word) > 3]  # Avoid short words
+    if query_words and db_districts:
+        scores = process.cdist(query_words, index["match_names"], scorer=fuzz.WRatio, score_cutoff=80)
+        for word_scores in scores:
+            best = int(np.argmax(word_scores))
+            if word_scores[best] >= 80:
+                return db_districts[best]
+    
+    return None
+
 def extract_district_name_from_query(user_query: str):
     """
     Extract district name from user query using fuzzy matching against database.
     """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Get all district names from database
-        cursor.execute("SELECT DISTINCT district_name FROM District_State ORDER BY district_name")
-        db_districts = [row[0] for row in cursor.fetchall()]
-        
-        cursor.close()
-        conn.close()
-        
-        # Try fuzzy matching
-        best_match = process.extractOne(user_query, db_districts, score_cutoff=70)
-        
-        if best_match:
-            return best_match[0]
-        
-        # If no good match, try word-by-word matching
-        query_words = user_query.lower().split()
-        for word in query_words:
-            if len(word) > 3:  # Avoid short words
-                match = process.extractOne(word, db_districts, score_cutoff=80)
-                if match:
-                    return match[0]
-        
-        return None
-        
+        return match_district_name(user_query)
     except Exception as e:
         print(f"Error extracting district name: {e}")
         return None
@@ -2065,9 +2309,7 @@ def get_individual_district_sdg_data(
                 }
         
         # Get district's state
-        cursor.execute("""
-            SELECT state_name FROM District_State WHERE district_name = %s
-        """, (resolved_district,))
+        execute_prepared(cursor, "district_state", (resolved_district,))
         state_result = cursor.fetchone()
         district_state = state_result[0] if state_result else "Unknown"
         
@@ -2082,9 +2324,8 @@ def get_individual_district_sdg_data(
         
         # Add indicator filter if specified
         if indicator_names:
-            indicator_placeholders = ','.join(['%s'] * len(indicator_names))
-            base_conditions.append(f"sg.sdg_short_indicator_name IN ({indicator_placeholders})")
-            params.extend(indicator_names)
+            base_conditions.append("sg.sdg_short_indicator_name = ANY(%s)")
+            params.append(list(indicator_names))
         
         # Determine year column
         year_column = "sgd.nfhs_value_5" if year == 2021 else "sgd.nfhs_value_4"
@@ -2281,7 +2522,7 @@ def get_district_indicator_selection_prompt(district_name: str, sdg_goal_number:
         # Get district state
         conn = get_db_connection()
         cursor = conn.cursor()
-        cursor.execute("SELECT state_name FROM District_State WHERE district_name = %s", (resolved_district,))
+        execute_prepared(cursor, "district_state", (resolved_district,))
         state_result = cursor.fetchone()
         district_state = state_result[0] if state_result else "Unknown"
         cursor.close()
@@ -2551,6 +2792,75 @@ def get_best_worst_district_overall_sdg(sdg_goal_number: int, query_type: str, y
     except Exception as e:
         return {"error": f"Error finding {query_type} overall SDG performance: {str(e)}"}
 
+def jenks_breaks(values, n_classes: int = 4) -> Optional[List[float]]:
+    """
+    Fisher-Jenks natural breaks for a 1-D list of values.
+
+    Returns the n_classes - 1 boundaries between the optimal classes (the
+    midpoint between the top of one class and the bottom of the next), or
+    None when there are fewer distinct values than classes.
+
+    The dynamic program runs on an n x n matrix of within-class squared
+    deviations built from prefix sums, so each class adds one vectorised
+    pass instead of a Python loop over every (start, end) pair.
+    """
+    x = np.sort(np.asarray(values, dtype=float))
+    n = len(x)
+    if n < n_classes or np.unique(x).size < n_classes:
+        return None
+
+    s1 = np.concatenate(([0.0], np.cumsum(x)))
+    s2 = np.concatenate(([0.0], np.cumsum(x * x)))
+    start = np.arange(n)[:, None]
+    end = np.arange(n)[None, :]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ssd = (s2[end + 1] - s2[start]) - (s1[end + 1] - s1[start]) ** 2 / (end - start + 1)
+    ssd[start > end] = np.inf
+
+    # cost[j] is the best total deviation for x[0..j] split into c classes
+    cost = ssd[0].copy()
+    class_starts = []
+    for _ in range(1, n_classes):
+        total = np.full((n, n), np.inf)
+        total[1:] = cost[:-1, None] + ssd[1:]
+        best_start = total.argmin(axis=0)
+        cost = total[best_start, np.arange(n)]
+        class_starts.append(best_start)
+
+    breaks = []
+    last = n - 1
+    for best_start in reversed(class_starts):
+        first = best_start[last]
+        breaks.append(float((x[first - 1] + x[first]) / 2))
+        last = first - 1
+    return sorted(breaks)
+
+def get_aac_category(aac_value, thresholds, higher_is_better):
+    if not thresholds or aac_value is None:
+        return {"category": "No Data", "color": "#757575", "level": 0}
+    
+    # For indicators where higher is better (like coverage indicators)
+    if higher_is_better:
+        if aac_value >= thresholds["q3"]:
+            return {"category": "Rapidly Improving", "color": "#1a5d1a", "level": 4}
+        elif aac_value >= thresholds["q2"]:
+            return {"category": "Improving", "color": "#2d8f2d", "level": 3}
+        elif aac_value >= thresholds["q1"]:
+            return {"category": "Slowly Improving", "color": "#ffa500", "level": 2}
+        else:
+            return {"category": "Declining", "color": "#d32f2f", "level": 1}
+    else:
+        # For indicators where lower is better (like mortality, disease rates)
+        # Negative change is good (improvement)
+        if aac_value <= thresholds["q1"]:
+            return {"category": "Rapidly Improving", "color": "#1a5d1a", "level": 4}
+        elif aac_value <= thresholds["q2"]:
+            return {"category": "Improving", "color": "#2d8f2d", "level": 3}
+        elif aac_value <= thresholds["q3"]:
+            return {"category": "Slowly Improving", "color": "#ffa500", "level": 2}
+        else:
+            return {"category": "Worsening", "color": "#d32f2f", "level": 1}
+
 def get_aac_classification(
     sdg_goal_number: int,
     year: int = 2021,
@@ -2593,6 +2903,7 @@ def get_aac_classification(
         available_indicators = []
         indicator_data_map = {}
         all_districts_data = []
+        seen_districts = set()
         
         # Build state filter
         state_filter = ""
@@ -2662,42 +2973,14 @@ def get_aac_classification(
                         q2 = np.percentile(aac_values, 50) 
                         q3 = np.percentile(aac_values, 75)
                         thresholds = {"q1": q1, "q2": q2, "q3": q3}
-                    else:  # natural_breaks - simplified implementation
-                        # For now, use quantiles but could implement Jenks natural breaks
-                        sorted_values = sorted(aac_values)
-                        n = len(sorted_values)
-                        q1 = sorted_values[n//4] if n >= 4 else sorted_values[0]
-                        q2 = sorted_values[n//2] if n >= 2 else sorted_values[0]
-                        q3 = sorted_values[3*n//4] if n >= 4 else sorted_values[-1]
+                    else:  # natural_breaks
+                        breaks = jenks_breaks(aac_values, 4)
+                        if breaks is None:
+                            # Too few distinct values for 4 classes; fall back to quartiles
+                            breaks = [float(q) for q in np.percentile(aac_values, [25, 50, 75])]
+                        q1, q2, q3 = breaks
                         thresholds = {"q1": q1, "q2": q2, "q3": q3}
                 
-                # Define AAC classification functions
-                def get_aac_category(aac_value, thresholds, higher_is_better):
-                    if not thresholds or aac_value is None:
-                        return {"category": "No Data", "color": "#757575", "level": 0}
-                    
-                    # For indicators where higher is better (like coverage indicators)
-                    if higher_is_better:
-                        if aac_value >= thresholds["q3"]:
-                            return {"category": "Rapidly Improving", "color": "#1a5d1a", "level": 4}
-                        elif aac_value >= thresholds["q2"]:
-                            return {"category": "Improving", "color": "#2d8f2d", "level": 3}
-                        elif aac_value >= thresholds["q1"]:
-                            return {"category": "Slowly Improving", "color": "#ffa500", "level": 2}
-                        else:
-                            return {"category": "Declining", "color": "#d32f2f", "level": 1}
-                    else:
-                        # For indicators where lower is better (like mortality, disease rates)
-                        # Negative change is good (improvement)
-                        if aac_value <= thresholds["q1"]:
-                            return {"category": "Rapidly Improving", "color": "#1a5d1a", "level": 4}
-                        elif aac_value <= thresholds["q2"]:
-                            return {"category": "Improving", "color": "#2d8f2d", "level": 3}
-                        elif aac_value <= thresholds["q3"]:
-                            return {"category": "Slowly Improving", "color": "#ffa500", "level": 2}
-                        else:
-                            return {"category": "Worsening", "color": "#d32f2f", "level": 1}
-                
                 # Process districts for this indicator
                 classified_districts = []
                 classification_summary = {}
@@ -2754,7 +3037,8 @@ def get_aac_classification(
                 
                 # Collect all districts for boundary data (avoiding duplicates)
                 for district in classified_districts:
-                    if district["has_geometry"] and not any(d["district"] == district["district"] for d in all_districts_data):
+                    if district["has_geometry"] and district["district"] not in seen_districts:
+                        seen_districts.add(district["district"])
                         all_districts_data.append({
                             "district": district["district"],
                             "state": district["state"]
@@ -2862,9 +3146,8 @@ def get_state_wise_summary(
             params.append(sdg_goal_number)
         
         if indicator_names:
-            indicator_placeholders = ','.join(['%s'] * len(indicator_names))
-            conditions.append(f"sg.sdg_short_indicator_name IN ({indicator_placeholders})")
-            params.extend(indicator_names)
+            conditions.append("sg.sdg_short_indicator_name = ANY(%s)")
+            params.append(list(indicator_names))
         
         # Determine year column
         year_column = "sgd.nfhs_value_5" if year == 2021 else "sgd.nfhs_value_4"
@@ -2994,15 +3277,14 @@ def get_state_wise_summary(
             top_state_names = [state["state"] for state in state_summaries]
             
             # Query to get all districts in these states
-            state_placeholders = ','.join(['%s'] * len(top_state_names))
-            district_query = f"""
+            district_query = """
             SELECT DISTINCT ds.district_name
             FROM District_State ds
-            WHERE ds.state_name IN ({state_placeholders})
+            WHERE ds.state_name = ANY(%s)
             ORDER BY ds.district_name
             """
             
-            cursor.execute(district_query, top_state_names)
+            cursor.execute(district_query, (top_state_names,))
             district_results = cursor.fetchall()
             all_districts = [row[0] for row in district_results]
             
@@ -3044,17 +3326,16 @@ def get_state_detailed_indicators(cursor, state_names, sdg_goal_number, indicato
         if not state_names:
             return {}
         
-        conditions = ["ds.state_name IN ({})".format(','.join(['%s'] * len(state_names)))]
-        params = state_names.copy()
+        conditions = ["ds.state_name = ANY(%s)"]
+        params = [list(state_names)]
         
         if sdg_goal_number:
             conditions.append("sg.major_sdg_goal = %s")
             params.append(sdg_goal_number)
         
         if indicator_names:
-            indicator_placeholders = ','.join(['%s'] * len(indicator_names))
-            conditions.append(f"sg.sdg_short_indicator_name IN ({indicator_placeholders})")
-            params.extend(indicator_names)
+            conditions.append("sg.sdg_short_indicator_name = ANY(%s)")
+            params.append(list(indicator_names))
         
         year_column = "sgd.nfhs_value_5" if year == 2021 else "sgd.nfhs_value_4"
         conditions.append(f"{year_column} IS NOT NULL")
@@ -3136,9 +3417,8 @@ def get_time_series_comparison(
             params.append(sdg_goal_number)
         
         if indicator_names:
-            indicator_placeholders = ','.join(['%s'] * len(indicator_names))
-            conditions.append(f"sg.sdg_short_indicator_name IN ({indicator_placeholders})")
-            params.extend(indicator_names)
+            conditions.append("sg.sdg_short_indicator_name = ANY(%s)")
+            params.append(list(indicator_names))
         
         if state_name:
             conditions.append("ds.state_name ILIKE %s")
@@ -3424,9 +3704,8 @@ def get_aspirational_district_tracking(
             params.append(sdg_goal_number)
         
         if indicator_names:
-            indicator_placeholders = ','.join(['%s'] * len(indicator_names))
-            conditions.append(f"sg.sdg_short_indicator_name IN ({indicator_placeholders})")
-            params.extend(indicator_names)
+            conditions.append("sg.sdg_short_indicator_name = ANY(%s)")
+            params.append(list(indicator_names))
         
         if state_name:
             conditions.append("ds.state_name ILIKE %s")
@@ -3742,9 +4021,8 @@ def get_aspirational_comparative_stats(cursor, sdg_goal_number, indicator_names,
             params.append(sdg_goal_number)
         
         if indicator_names:
-            indicator_placeholders = ','.join(['%s'] * len(indicator_names))
-            conditions.append(f"sg.sdg_short_indicator_name IN ({indicator_placeholders})")
-            params.extend(indicator_names)
+            conditions.append("sg.sdg_short_indicator_name = ANY(%s)")
+            params.append(list(indicator_names))
         
         year_column = "sgd.nfhs_value_5" if year == 2021 else "sgd.nfhs_value_4"
         conditions.append(f"{year_column} IS NOT NULL")
@@ -3871,24 +4149,11 @@ def get_cross_sdg_analysis(
         if len(sdg_goals) < 2:
             return {"error": "Cross-SDG analysis requires at least 2 SDG goals"}
         
-        # Build base conditions
-        conditions = [f"sg.major_sdg_goal IN ({','.join(['%s'] * len(sdg_goals))})"]
-        params = sdg_goals.copy()
-        
-        if state_name:
-            conditions.append("ds.state_name ILIKE %s")
-            params.append(f"%{state_name}%")
-        
-        # Determine year column
-        year_column = "sgd.nfhs_value_5" if year == 2021 else "sgd.nfhs_value_4"
-        conditions.append(f"{year_column} IS NOT NULL")
-        conditions.append("sgd.actual_annual_change IS NOT NULL")
-        
-        base_condition = " AND ".join(conditions)
+        year_column, base_condition, params = build_cross_sdg_conditions(sdg_goals, year, state_name)
         
         if analysis_type == "correlation":
-            # Analyze correlations between SDG goals
-            correlation_result = get_sdg_correlation_analysis(cursor, sdg_goals, year_column, base_condition, params)
+            # Analyze correlations between SDG goals (cached per goals/year/state)
+            correlation_result = get_cached_sdg_correlation(sdg_goals, year, state_name)
             
             # Get boundary data for districts in correlation analysis
             all_districts = [result["district"] for result in correlation_result.get("data", []) if "district" in result]
@@ -4123,6 +4388,71 @@ def get_cross_sdg_analysis(
     except Exception as e:
         return {"error": f"Error in cross-SDG analysis: {str(e)}"}
 
+def build_cross_sdg_conditions(sdg_goals, year, state_name=None):
+    """Build the year column, WHERE clause and parameters shared by cross-SDG queries."""
+    conditions = ["sg.major_sdg_goal = ANY(%s)"]
+    params = [list(sdg_goals)]
+    
+    if state_name:
+        conditions.append("ds.state_name ILIKE %s")
+        params.append(f"%{state_name}%")
+    
+    # Determine year column
+    year_column = "sgd.nfhs_value_5" if year == 2021 else "sgd.nfhs_value_4"
+    conditions.append(f"{year_column} IS NOT NULL")
+    conditions.append("sgd.actual_annual_change IS NOT NULL")
+    
+    return year_column, " AND ".join(conditions), params
+
+@lru_cache(maxsize=256)
+def _sdg_correlation_for(sdg_goals, year, state_name):
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        year_column, base_condition, params = build_cross_sdg_conditions(sdg_goals, year, state_name)
+        result = get_sdg_correlation_analysis(cursor, list(sdg_goals), year_column, base_condition, params)
+    finally:
+        cursor.close()
+        conn.close()
+    if "correlations" not in result:
+        # Query failed; raise so the error is not kept in the cache
+        raise RuntimeError(result.get("error", "Error in correlation analysis"))
+    return result
+
+def get_cached_sdg_correlation(sdg_goals, year, state_name=None):
+    """
+    Correlation analysis for a set of SDG goals, cached by (goals, year, state).
+    The SDG data only changes on reload, so repeated questions about the same
+    goals are answered without re-running the percentile query.
+    """
+    try:
+        return _sdg_correlation_for(tuple(sdg_goals), year, state_name)
+    except RuntimeError as e:
+        return {"error": str(e)}
+
+def pairwise_correlations(matrix):
+    """
+    Pearson correlation between every pair of columns of a 2-D array, where NaN
+    marks a missing value. Each pair uses only the rows where both columns have
+    data. Returns (correlations, sample_sizes) as square arrays.
+    """
+    x = np.asarray(matrix, dtype=float)
+    present = (~np.isnan(x)).astype(float)
+    x0 = np.where(present > 0, x, 0.0)
+    
+    # [i, j] entries are sums over the rows where both column i and column j are present
+    n = present.T @ present
+    sum_x = x0.T @ present
+    sum_x2 = (x0 * x0).T @ present
+    sum_xy = x0.T @ x0
+    
+    numerator = n * sum_xy - sum_x * sum_x.T
+    variance = np.clip(n * sum_x2 - sum_x * sum_x, 0, None)
+    denominator = np.sqrt(variance * variance.T)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        correlations = np.where(denominator > 0, numerator / denominator, 0.0)
+    return correlations, n.astype(int)
+
 def get_sdg_correlation_analysis(cursor, sdg_goals, year_column, base_condition, params):
     """Analyze correlations between different SDG goals."""
     try:
@@ -4187,45 +4517,32 @@ def get_sdg_correlation_analysis(cursor, sdg_goals, year_column, base_condition,
                 "note": "Insufficient data for meaningful correlation analysis"
             }
         
-        # Calculate correlations between goals
-        correlations = {}
-        goal_data = {}
-        
-        # Extract goal-specific data (columns are now at positions 2 onwards)
-        for i, goal in enumerate(sdg_goals):
-            goal_data[goal] = [row[i+2] for row in results if row[i+2] is not None]
+        # Districts x goals score matrix (columns are at positions 2 onwards, NaN = no data)
+        scores = np.array([row[2:] for row in results], dtype=float)
+        goal_counts = np.count_nonzero(~np.isnan(scores), axis=0)
         
         # Validate we have enough data points for each goal
-        for goal in sdg_goals:
-            if len(goal_data[goal]) < 3:
+        for goal, count in zip(sdg_goals, goal_counts):
+            if count < 3:
                 return {
                     "correlations": {},
                     "data": [],
-                    "error": f"Insufficient data for SDG Goal {goal}. Found {len(goal_data[goal])} districts with data.",
+                    "error": f"Insufficient data for SDG Goal {goal}. Found {count} districts with data.",
                     "note": "Need at least 3 districts with data for each SDG goal"
                 }
         
-        # Calculate pairwise correlations
+        # Calculate pairwise correlations (only districts with data for both goals)
+        correlation_matrix, sample_sizes = pairwise_correlations(scores)
+        correlations = {}
         for i, goal1 in enumerate(sdg_goals):
-            for j, goal2 in enumerate(sdg_goals):
-                if i < j and len(goal_data[goal1]) > 0 and len(goal_data[goal2]) > 0:
-                    # Create aligned data arrays (only districts with data for both goals)
-                    aligned_data1 = []
-                    aligned_data2 = []
-                    for k, row in enumerate(results):
-                        val1 = row[i+2]
-                        val2 = row[j+2]
-                        if val1 is not None and val2 is not None:
-                            aligned_data1.append(val1)
-                            aligned_data2.append(val2)
-                    
-                    if len(aligned_data1) >= 3:
-                        correlation = calculate_correlation(aligned_data1, aligned_data2)
-                        correlations[f"SDG_{goal1}_vs_SDG_{goal2}"] = {
-                            "correlation": correlation,
-                            "strength": interpret_correlation(correlation),
-                            "sample_size": len(aligned_data1)
-                        }
+            for j in range(i + 1, len(sdg_goals)):
+                if sample_sizes[i, j] >= 3:
+                    correlation = float(correlation_matrix[i, j])
+                    correlations[f"SDG_{goal1}_vs_SDG_{sdg_goals[j]}"] = {
+                        "correlation": correlation,
+                        "strength": interpret_correlation(correlation),
+                        "sample_size": int(sample_sizes[i, j])
+                    }
         
         formatted_results = []
         for row in results:
@@ -4237,37 +4554,16 @@ def get_sdg_correlation_analysis(cursor, sdg_goals, year_column, base_condition,
                 result_data[f"sdg_{goal}_score"] = float(row[i+2]) if row[i+2] is not None else None
             formatted_results.append(result_data)
         
+        goal_means = np.nanmean(scores, axis=0)
         return {
             "correlations": correlations,
             "data": formatted_results,
-            "goal_averages": {f"sdg_{goal}": sum(goal_data[goal])/len(goal_data[goal]) if goal_data[goal] else None 
-                             for goal in sdg_goals}
+            "goal_averages": {f"sdg_{goal}": float(goal_means[i]) for i, goal in enumerate(sdg_goals)}
         }
         
     except Exception as e:
         return {"error": f"Error in correlation analysis: {str(e)}"}
 
-def calculate_correlation(x_data, y_data):
-    """Calculate Pearson correlation coefficient."""
-    try:
-        if len(x_data) != len(y_data) or len(x_data) < 2:
-            return 0
-        
-        n = len(x_data)
-        sum_x = sum(x_data)
-        sum_y = sum(y_data)
-        sum_xy = sum(x_data[i] * y_data[i] for i in range(n))
-        sum_x2 = sum(x * x for x in x_data)
-        sum_y2 = sum(y * y for y in y_data)
-        
-        numerator = n * sum_xy - sum_x * sum_y
-        denominator = ((n * sum_x2 - sum_x * sum_x) * (n * sum_y2 - sum_y * sum_y)) ** 0.5
-        
-        return numerator / denominator if denominator != 0 else 0
-        
-    except Exception:
-        return 0
-
 def interpret_correlation(correlation):
     """Interpret correlation strength."""
     abs_corr = abs(correlation)
@@ -4393,9 +4689,6 @@ def get_cross_sdg_detailed_data(cursor, top_districts, sdg_goals, year_column):
         if not district_names:
             return {}
         
-        district_placeholders = ','.join(['%s'] * len(district_names))
-        goal_placeholders = ','.join(['%s'] * len(sdg_goals))
-        
         query = f"""
         SELECT 
             sgd.district_name,
@@ -4407,13 +4700,13 @@ def get_cross_sdg_detailed_data(cursor, top_districts, sdg_goals, year_column):
             COALESCE(sg.higher_is_better, FALSE) as higher_is_better
         FROM SDG_Goals_Data sgd
         JOIN SDG_Goals sg ON sgd.sdg_short_indicator_name = sg.sdg_short_indicator_name
-        WHERE sgd.district_name IN ({district_placeholders})
-        AND sg.major_sdg_goal IN ({goal_placeholders})
+        WHERE sgd.district_name = ANY(%s)
+        AND sg.major_sdg_goal = ANY(%s)
         AND {year_column} IS NOT NULL
         ORDER BY sgd.district_name, sg.major_sdg_goal, sg.sdg_short_indicator_name
         """
         
-        params = district_names + sdg_goals
+        params = [list(district_names), list(sdg_goals)]
         cursor.execute(query, params)
         results = cursor.fetchall()
         
@@ -4714,22 +5007,16 @@ def get_neighboring_districts_comparison(
 def resolve_district_name(cursor, district_name):
     """Resolve district name using fuzzy matching and return district info."""
     try:
+        index = get_district_index()
+        
         # First try exact match
-        cursor.execute("""
-            SELECT DISTINCT district_name, state_name 
-            FROM District_State 
-            WHERE LOWER(district_name) = LOWER(%s)
-        """, (district_name,))
-        result = cursor.fetchone()
+        result = index["exact"].get(district_name.lower())
         
         if result:
             return {"district_name": result[0], "state_name": result[1]}
         
         # Try fuzzy matching
-        cursor.execute("SELECT DISTINCT district_name, state_name FROM District_State")
-        all_districts = cursor.fetchall()
-        
-        district_options = [f"{row[0]}, {row[1]}" for row in all_districts]
+        district_options = index["options"]
         best_match = process.extractOne(district_name, district_options, score_cutoff=70)
         
         if best_match:
@@ -4749,17 +5036,36 @@ def find_neighboring_districts(cursor, target_district, method, max_distance_km,
         neighbors = []
         
         if method == "touching":
-            # Find districts that share a boundary
-            cursor.execute("""
-                SELECT d2.district_name, d2.state_name, 'Shared Boundary' as relationship
-                FROM District_Geometry d1, District_Geometry d2
-                WHERE UPPER(TRIM(d1.district_name)) = %s
-                AND UPPER(TRIM(d1.district_name)) != UPPER(TRIM(d2.district_name))
-                AND ST_Touches(d1.geom, d2.geom)
-                LIMIT %s
-            """, (normalize_district_name(target_district), max_neighbors))
+            # Districts that share a boundary, from the prebuilt adjacency graph
+            adjacency = get_spatial_index()["adjacency"]
+            for name, state in adjacency.get(normalize_district_name(target_district), [])[:max_neighbors]:
+                neighbors.append({
+                    "district_name": name,
+                    "state_name": state,
+                    "relationship": "Shared Boundary"
+                })
+            return neighbors
+            
+        elif method == "closest":
+            # Closest districts by centroid distance, computed on the cached centroids
+            index = get_spatial_index()
+            target_key = normalize_district_name(target_district)
+            target_pos = index["position"].get(target_key)
+            if target_pos is None:
+                return []
+            distances = centroid_distances_km(index, *index["xy"][target_pos])
+            mask = index["has_geom"] & np.array([normalize_district_name(n) != target_key for n in index["names"]], dtype=bool)
+            for pos in nearest_centroids(distances, mask, max_neighbors):
+                distance_km = round(float(distances[pos]), 2)
+                neighbors.append({
+                    "district_name": index["names"][pos],
+                    "state_name": index["states"][pos],
+                    "distance_km": distance_km,
+                    "relationship": f"Within {distance_km:.2f} km"
+                })
+            return neighbors
             
-        elif method == "distance":
+        else:  # distance
             # Find districts within specified distance
             cursor.execute("""
                 SELECT d2.district_name, d2.state_name,
@@ -4771,36 +5077,16 @@ def find_neighboring_districts(cursor, target_district, method, max_distance_km,
                 ORDER BY ST_Distance(d1.geom, d2.geom)
                 LIMIT %s
             """, (normalize_district_name(target_district), max_distance_km * 1000, max_neighbors))
-            
-        else:  # closest
-            # Find closest districts by centroid distance
-            cursor.execute("""
-                SELECT d2.district_name, d2.state_name,
-                       CAST(ST_Distance(ST_Transform(d1.centroid, 3857), ST_Transform(d2.centroid, 3857))/1000.0 AS NUMERIC(10,2)) as distance_km
-                FROM District_Geometry d1, District_Geometry d2
-                WHERE UPPER(TRIM(d1.district_name)) = %s
-                AND UPPER(TRIM(d1.district_name)) != UPPER(TRIM(d2.district_name))
-                AND d2.geom IS NOT NULL
-                ORDER BY ST_Distance(d1.centroid, d2.centroid)
-                LIMIT %s
-            """, (normalize_district_name(target_district), max_neighbors))
         
         results = cursor.fetchall()
         
         for row in results:
-            neighbor_info = {
+            neighbors.append({
                 "district_name": row[0],
-                "state_name": row[1]
-            }
-            
-            if len(row) > 2:
-                if method == "touching":
-                    neighbor_info["relationship"] = row[2]
-                else:
-                    neighbor_info["distance_km"] = float(row[2])
-                    neighbor_info["relationship"] = f"Within {row[2]} km"
-            
-            neighbors.append(neighbor_info)
+                "state_name": row[1],
+                "distance_km": float(row[2]),
+                "relationship": f"Within {row[2]} km"
+            })
         
         return neighbors
         
@@ -4814,9 +5100,6 @@ def get_districts_indicator_data(cursor, district_names, sdg_goal_number, indica
         year_column = "sgd.nfhs_value_5" if year == 2021 else "sgd.nfhs_value_4"
         other_year_column = "sgd.nfhs_value_4" if year == 2021 else "sgd.nfhs_value_5"
         
-        district_placeholders = ','.join(['%s'] * len(district_names))
-        indicator_placeholders = ','.join(['%s'] * len(indicator_names))
-        
         query = f"""
         SELECT 
             sgd.district_name,
@@ -4837,14 +5120,14 @@ def get_districts_indicator_data(cursor, district_names, sdg_goal_number, indica
         FROM SDG_Goals_Data sgd
         JOIN SDG_Goals sg ON sgd.sdg_short_indicator_name = sg.sdg_short_indicator_name
         JOIN District_State ds ON sgd.district_name = ds.district_name
-        WHERE sgd.district_name IN ({district_placeholders})
+        WHERE sgd.district_name = ANY(%s)
         AND sg.major_sdg_goal = %s
-        AND sg.sdg_short_indicator_name IN ({indicator_placeholders})
+        AND sg.sdg_short_indicator_name = ANY(%s)
         AND {year_column} IS NOT NULL
         ORDER BY sgd.district_name, sg.sdg_short_indicator_name
         """
         
-        params = district_names + [sdg_goal_number] + indicator_names
+        params = [list(district_names), sdg_goal_number, list(indicator_names)]
         cursor.execute(query, params)
         results = cursor.fetchall()
         
@@ -4892,8 +5175,6 @@ def get_districts_overall_sdg_data(cursor, district_names, sdg_goal_number, year
     try:
         year_column = "sgd.nfhs_value_5" if year == 2021 else "sgd.nfhs_value_4"
         
-        district_placeholders = ','.join(['%s'] * len(district_names))
-        
         query = f"""
         WITH district_rankings AS (
             SELECT 
@@ -4910,7 +5191,7 @@ def get_districts_overall_sdg_data(cursor, district_names, sdg_goal_number, year
             FROM SDG_Goals_Data sgd
             JOIN SDG_Goals sg ON sgd.sdg_short_indicator_name = sg.sdg_short_indicator_name
             JOIN District_State ds ON sgd.district_name = ds.district_name
-            WHERE sgd.district_name IN ({district_placeholders})
+            WHERE sgd.district_name = ANY(%s)
             AND sg.major_sdg_goal = %s
             AND {year_column} IS NOT NULL
         )
@@ -4925,7 +5206,7 @@ def get_districts_overall_sdg_data(cursor, district_names, sdg_goal_number, year
         ORDER BY overall_performance DESC
         """
         
-        params = district_names + [sdg_goal_number]
+        params = [list(district_names), sdg_goal_number]
         cursor.execute(query, params)
         results = cursor.fetchall()
         
@@ -4950,8 +5231,6 @@ def get_districts_multi_goal_data(cursor, district_names, year):
     try:
         year_column = "sgd.nfhs_value_5" if year == 2021 else "sgd.nfhs_value_4"
         
-        district_placeholders = ','.join(['%s'] * len(district_names))
-        
         query = f"""
         WITH district_goal_rankings AS (
             SELECT 
@@ -4968,7 +5247,7 @@ def get_districts_multi_goal_data(cursor, district_names, year):
             FROM SDG_Goals_Data sgd
             JOIN SDG_Goals sg ON sgd.sdg_short_indicator_name = sg.sdg_short_indicator_name
             JOIN District_State ds ON sgd.district_name = ds.district_name
-            WHERE sgd.district_name IN ({district_placeholders})
+            WHERE sgd.district_name = ANY(%s)
             AND {year_column} IS NOT NULL
         )
         SELECT 
@@ -4982,7 +5261,7 @@ def get_districts_multi_goal_data(cursor, district_names, year):
         ORDER BY district_name, major_sdg_goal
         """
         
-        cursor.execute(query, district_names)
+        cursor.execute(query, (list(district_names),))
         results = cursor.fetchall()
         
         # Group by district
@@ -5177,11 +5456,7 @@ def get_state_wise_indicator_extremes(
             return {"error": f"Indicator '{indicator_name}' not found. Please check the indicator name."}
         
         # Get indicator metadata using resolved name
-        cursor.execute("""
-            SELECT sdg_short_indicator_name, sdg_full_indicator_name, major_sdg_goal, higher_is_better
-            FROM SDG_Goals 
-            WHERE sdg_short_indicator_name = %s OR sdg_full_indicator_name = %s
-        """, (resolved_indicator, resolved_indicator))
+        execute_prepared(cursor, "indicator_info", (resolved_indicator,))
         
         indicator_info = cursor.fetchone()
         if not indicator_info:
@@ -5872,9 +6147,6 @@ def get_border_districts(
             # Use specific SDG goal
             if indicator_names:
                 # Get data for specific indicators
-                placeholders = ','.join(['%s'] * len(district_names))
-                indicator_placeholders = ','.join(['%s'] * len(indicator_names))
-                
                 year_column = "nfhs_value_5" if year == 2021 else "nfhs_value_4"
                 
                 sdg_query = f"""
@@ -5892,19 +6164,17 @@ def get_border_districts(
                 FROM SDG_Goals_Data sgd
                 JOIN SDG_Goals sg ON sgd.sdg_short_indicator_name = sg.sdg_short_indicator_name
                 JOIN District_State ds ON sgd.district_name = ds.district_name
-                WHERE sgd.district_name IN ({placeholders})
-                AND sg.sdg_short_indicator_name IN ({indicator_placeholders})
+                WHERE sgd.district_name = ANY(%s)
+                AND sg.sdg_short_indicator_name = ANY(%s)
                 AND sg.major_sdg_goal = %s
                 AND sgd.{year_column} IS NOT NULL
                 ORDER BY ds.state_name, sgd.district_name, sg.sdg_indicator_number
                 """
                 
-                params = district_names + indicator_names + [sdg_goal_number]
+                params = [list(district_names), list(indicator_names), sdg_goal_number]
                 cursor.execute(sdg_query, params)
             else:
                 # Get all indicators for the SDG goal
-                placeholders = ','.join(['%s'] * len(district_names))
-                
                 year_column = "nfhs_value_5" if year == 2021 else "nfhs_value_4"
                 
                 sdg_query = f"""
@@ -5922,18 +6192,16 @@ def get_border_districts(
                 FROM SDG_Goals_Data sgd
                 JOIN SDG_Goals sg ON sgd.sdg_short_indicator_name = sg.sdg_short_indicator_name
                 JOIN District_State ds ON sgd.district_name = ds.district_name
-                WHERE sgd.district_name IN ({placeholders})
+                WHERE sgd.district_name = ANY(%s)
                 AND sg.major_sdg_goal = %s
                 AND sgd.{year_column} IS NOT NULL
                 ORDER BY ds.state_name, sgd.district_name, sg.sdg_indicator_number
                 """
                 
-                params = district_names + [sdg_goal_number]
+                params = [list(district_names), sdg_goal_number]
                 cursor.execute(sdg_query, params)
         else:
             # Get all available SDG data for these districts
-            placeholders = ','.join(['%s'] * len(district_names))
-            
             year_column = "nfhs_value_5" if year == 2021 else "nfhs_value_4"
             
             sdg_query = f"""
@@ -5951,12 +6219,12 @@ def get_border_districts(
             FROM SDG_Goals_Data sgd
             JOIN SDG_Goals sg ON sgd.sdg_short_indicator_name = sg.sdg_short_indicator_name
             JOIN District_State ds ON sgd.district_name = ds.district_name
-            WHERE sgd.district_name IN ({placeholders})
+            WHERE sgd.district_name = ANY(%s)
             AND sgd.{year_column} IS NOT NULL
             ORDER BY ds.state_name, sgd.district_name, sg.major_sdg_goal, sg.sdg_indicator_number
             """
             
-            params = district_names
+            params = [list(district_names)]
             cursor.execute(sdg_query, params)
         
         sdg_results = cursor.fetchall()
@@ -6352,14 +6620,11 @@ def get_districts_within_radius(
         if center_type == "district":
             result["center_state"] = center_state
             # Add the actual coordinates of the center district
-            cursor.execute("""
-                SELECT ST_X(centroid) as lng, ST_Y(centroid) as lat 
-                FROM District_Geometry 
-                WHERE UPPER(TRIM(district_name)) = %s
-            """, (normalize_district_name(center_name),))
-            coord_result = cursor.fetchone()
-            if coord_result:
-                result["center_coordinates"] = {"lat": float(coord_result[1]), "lng": float(coord_result[0])}
+            index = get_spatial_index()
+            center_pos = index["position"].get(normalize_district_name(center_name))
+            if center_pos is not None:
+                center_lng, center_lat = index["lnglat"][center_pos]
+                result["center_coordinates"] = {"lat": float(center_lat), "lng": float(center_lng)}
         else:
             result["center_coordinates"] = {"lat": lat, "lng": lng}
         
@@ -6374,42 +6639,8 @@ def get_districts_within_radius(
 def find_districts_within_radius_from_coordinates(cursor, lat, lng, radius_km, max_districts):
     """Find districts within radius from given coordinates."""
     try:
-        query = """
-        SELECT 
-            dg.district_name,
-            ds.state_name,
-            CAST(ST_Distance(
-                ST_Transform(ST_SetSRID(ST_MakePoint(%s, %s), 4326), 3857),
-                ST_Transform(dg.centroid, 3857)
-            )/1000.0 AS NUMERIC(10,2)) as distance_km
-        FROM District_Geometry dg
-        JOIN District_State ds ON dg.district_name = ds.district_name
-        WHERE ST_DWithin(
-            ST_Transform(ST_SetSRID(ST_MakePoint(%s, %s), 4326), 3857),
-            ST_Transform(dg.centroid, 3857),
-            %s
-        )
-        AND dg.centroid IS NOT NULL
-        ORDER BY ST_Distance(
-            ST_SetSRID(ST_MakePoint(%s, %s), 4326),
-            dg.centroid
-        )
-        LIMIT %s
-        """
-        
-        params = [lng, lat, lng, lat, radius_km * 1000, lng, lat, max_districts]
-        cursor.execute(query, params)
-        results = cursor.fetchall()
-        
-        districts = []
-        for row in results:
-            districts.append({
-                "district_name": row[0],
-                "state_name": row[1],
-                "distance_km": float(row[2])
-            })
-        
-        return districts
+        index = get_spatial_index()
+        return districts_within_radius(index, *web_mercator_xy(lat, lng), radius_km, max_districts)
         
     except Exception as e:
         print(f"Error finding districts from coordinates: {e}")
@@ -6418,52 +6649,47 @@ def find_districts_within_radius_from_coordinates(cursor, lat, lng, radius_km, m
 def find_districts_within_radius_from_district(cursor, center_district, radius_km, max_districts):
     """Find districts within radius from a given district's centroid."""
     try:
-        query = """
-        SELECT 
-            d2.district_name,
-            ds2.state_name,
-            CAST(ST_Distance(
-                ST_Transform(d1.centroid, 3857),
-                ST_Transform(d2.centroid, 3857)
-            )/1000.0 AS NUMERIC(10,2)) as distance_km
-        FROM District_Geometry d1
-        CROSS JOIN District_Geometry d2
-        JOIN District_State ds2 ON d2.district_name = ds2.district_name
-        WHERE UPPER(TRIM(d1.district_name)) = %s
-        AND d1.centroid IS NOT NULL
-        AND d2.centroid IS NOT NULL
-        AND ST_DWithin(
-            ST_Transform(d1.centroid, 3857),
-            ST_Transform(d2.centroid, 3857),
-            %s
-        )
-        ORDER BY ST_Distance(d1.centroid, d2.centroid)
-        LIMIT %s
-        """
-        
-        cursor.execute(query, [normalize_district_name(center_district), radius_km * 1000, max_districts])
-        results = cursor.fetchall()
-        
-        districts = []
-        for row in results:
-            districts.append({
-                "district_name": row[0],
-                "state_name": row[1],
-                "distance_km": float(row[2])
-            })
-        
-        return districts
+        index = get_spatial_index()
+        center_pos = index["position"].get(normalize_district_name(center_district))
+        if center_pos is None:
+            return []
+        return districts_within_radius(index, *index["xy"][center_pos], radius_km, max_districts)
         
     except Exception as e:
         print(f"Error finding districts from district: {e}")
         return []
 
+def districts_within_radius(index, x, y, radius_km, max_districts):
+    """Districts (listed in District_State) whose centroid lies within radius_km of (x, y), nearest first."""
+    # Broad phase: the circle fits in a vertical strip, found by binary search on
+    # the x-sorted centroids, so distances are only computed for rows inside it.
+    # Candidates go back to row order so distance ties break as before.
+    radius_m = radius_km * 1000.0
+    lo = np.searchsorted(index["x_sorted"], x - radius_m, side="left")
+    hi = np.searchsorted(index["x_sorted"], x + radius_m, side="right")
+    candidates = np.sort(index["x_order"][lo:hi])
+    candidates = candidates[index["in_dataset"][candidates]]
+    # Narrow phase on squared distances (multiply-adds only); the square root is
+    # taken for the hits alone
+    dx = index["xy"][candidates, 0] - x
+    dy = index["xy"][candidates, 1] - y
+    squared = dx * dx + dy * dy
+    hits = squared <= radius_m * radius_m
+    candidates = candidates[hits]
+    distances = np.sqrt(squared[hits]) / 1000.0
+    districts = []
+    for i in nearest_centroids(distances, np.ones(len(candidates), dtype=bool), max_districts):
+        pos = candidates[i]
+        districts.append({
+            "district_name": index["names"][pos],
+            "state_name": index["dataset_states"][pos],
+            "distance_km": round(float(distances[i]), 2)
+        })
+    return districts
+
 def get_districts_multi_year_indicator_data(cursor, district_names, sdg_goal_number, indicator_names):
     """Get multi-year indicator data for districts with both 2016 and 2021 values plus AAC."""
     try:
-        district_placeholders = ','.join(['%s'] * len(district_names))
-        indicator_placeholders = ','.join(['%s'] * len(indicator_names))
-        
         query = f"""
         SELECT 
             sgd.district_name,
@@ -6491,14 +6717,14 @@ def get_districts_multi_year_indicator_data(cursor, district_names, sdg_goal_num
         FROM SDG_Goals_Data sgd
         JOIN SDG_Goals sg ON sgd.sdg_short_indicator_name = sg.sdg_short_indicator_name
         JOIN District_State ds ON sgd.district_name = ds.district_name
-        WHERE sgd.district_name IN ({district_placeholders})
+        WHERE sgd.district_name = ANY(%s)
         AND sg.major_sdg_goal = %s
-        AND sg.sdg_short_indicator_name IN ({indicator_placeholders})
+        AND sg.sdg_short_indicator_name = ANY(%s)
         AND (sgd.nfhs_value_4 IS NOT NULL OR sgd.nfhs_value_5 IS NOT NULL)
         ORDER BY sgd.district_name, sg.sdg_short_indicator_name
         """
         
-        params = district_names + [sdg_goal_number] + indicator_names
+        params = [list(district_names), sdg_goal_number, list(indicator_names)]
         cursor.execute(query, params)
         results = cursor.fetchall()
         
@@ -6560,8 +6786,6 @@ def get_districts_multi_year_indicator_data(cursor, district_names, sdg_goal_num
 def get_districts_multi_year_overall_data(cursor, district_names, sdg_goal_number):
     """Get multi-year overall SDG goal performance for districts."""
     try:
-        district_placeholders = ','.join(['%s'] * len(district_names))
-        
         query = f"""
         WITH district_rankings_2021 AS (
             SELECT 
@@ -6577,7 +6801,7 @@ def get_districts_multi_year_overall_data(cursor, district_names, sdg_goal_numbe
             FROM SDG_Goals_Data sgd
             JOIN SDG_Goals sg ON sgd.sdg_short_indicator_name = sg.sdg_short_indicator_name
             JOIN District_State ds ON sgd.district_name = ds.district_name
-            WHERE sgd.district_name IN ({district_placeholders})
+            WHERE sgd.district_name = ANY(%s)
             AND sg.major_sdg_goal = %s
             AND sgd.nfhs_value_5 IS NOT NULL
         ),
@@ -6592,7 +6816,7 @@ def get_districts_multi_year_overall_data(cursor, district_names, sdg_goal_numbe
                 END as performance_percentile
             FROM SDG_Goals_Data sgd
             JOIN SDG_Goals sg ON sgd.sdg_short_indicator_name = sg.sdg_short_indicator_name
-            WHERE sgd.district_name IN ({district_placeholders})
+            WHERE sgd.district_name = ANY(%s)
             AND sg.major_sdg_goal = %s
             AND sgd.nfhs_value_4 IS NOT NULL
         )
@@ -6610,7 +6834,7 @@ def get_districts_multi_year_overall_data(cursor, district_names, sdg_goal_numbe
         ORDER BY overall_performance_2021 DESC
         """
         
-        params = district_names + [sdg_goal_number] + district_names + [sdg_goal_number]
+        params = [list(district_names), sdg_goal_number, list(district_names), sdg_goal_number]
         cursor.execute(query, params)
         results = cursor.fetchall()
         
@@ -6644,8 +6868,6 @@ def get_districts_multi_year_overall_data(cursor, district_names, sdg_goal_numbe
 def get_districts_multi_year_multi_goal_data(cursor, district_names):
     """Get multi-year multi-goal performance overview for districts."""
     try:
-        district_placeholders = ','.join(['%s'] * len(district_names))
-        
         query = f"""
         WITH district_goal_rankings_2021 AS (
             SELECT 
@@ -6661,7 +6883,7 @@ def get_districts_multi_year_multi_goal_data(cursor, district_names):
             FROM SDG_Goals_Data sgd
             JOIN SDG_Goals sg ON sgd.sdg_short_indicator_name = sg.sdg_short_indicator_name
             JOIN District_State ds ON sgd.district_name = ds.district_name
-            WHERE sgd.district_name IN ({district_placeholders})
+            WHERE sgd.district_name = ANY(%s)
             AND sgd.nfhs_value_5 IS NOT NULL
         ),
         district_goal_rankings_2016 AS (
@@ -6676,7 +6898,7 @@ def get_districts_multi_year_multi_goal_data(cursor, district_names):
                 END as performance_percentile
             FROM SDG_Goals_Data sgd
             JOIN SDG_Goals sg ON sgd.sdg_short_indicator_name = sg.sdg_short_indicator_name
-            WHERE sgd.district_name IN ({district_placeholders})
+            WHERE sgd.district_name = ANY(%s)
             AND sgd.nfhs_value_4 IS NOT NULL
         )
         SELECT 
@@ -6694,7 +6916,7 @@ def get_districts_multi_year_multi_goal_data(cursor, district_names):
         ORDER BY r21.district_name, r21.major_sdg_goal
         """
         
-        params = district_names + district_names
+        params = [list(district_names), list(district_names)]
         cursor.execute(query, params)
         results = cursor.fetchall()
         